@@ -799,7 +799,10 @@ class MainWindow(QtWidgets.QWidget):
             path.parent.mkdir(parents=True, exist_ok=True)
         body = "CHANNELS = " + repr(channels) + "\n"
         try:
-            path.write_text(body, encoding="utf-8")
+            # write + rename so the running hub never reads a half-written file
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(body, encoding="utf-8")
+            os.replace(tmp, path)
         except Exception as exc:
             self._append_log(f"[ui] config write error: {exc}")
             raise
@@ -893,7 +896,7 @@ class MainWindow(QtWidgets.QWidget):
         self._append_log(f"[ui] new plugin: {res['name']} -> {res['plugin_path']}")
         self._load_channels()
         if self.runner.is_running():
-            self._append_log("[ui] restart hub to apply changes")
+            self._append_log("[ui] hub applies config changes automatically")
 
     def _on_add_existing_plugin(self) -> None:
         file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
@@ -910,7 +913,7 @@ class MainWindow(QtWidgets.QWidget):
         self._append_log(f"[ui] added existing plugin: {name.strip()}")
         self._load_channels()
         if self.runner.is_running():
-            self._append_log("[ui] restart hub to apply changes")
+            self._append_log("[ui] hub applies config changes automatically")
 
     def _selected_channel(self) -> tuple[str, str] | None:
         row = self.table.currentRow()
@@ -1027,9 +1030,7 @@ class MainWindow(QtWidgets.QWidget):
         except Exception:
             return
         self._load_channels()
-        if self.runner.is_running():
-            self._restart_hub()
-        else:
+        if not self.runner.is_running():
             self._append_log("[ui] channel toggled (hub stopped)")
 
     def _set_channel_disabled(self, name: str, disabled: bool) -> None:
@@ -1048,9 +1049,7 @@ class MainWindow(QtWidgets.QWidget):
             self._channel_connected.discard(name)
             self._channel_last_activity.pop(name, None)
         self._load_channels()
-        if self.runner.is_running():
-            self._restart_hub()
-        else:
+        if not self.runner.is_running():
             state = "disabled" if disabled else "enabled"
             self._append_log(f"[ui] channel {state} (hub stopped)")
 
@@ -1108,7 +1107,7 @@ class MainWindow(QtWidgets.QWidget):
         self._write_config(channels)
         self._load_channels()
         if self.runner.is_running():
-            self._append_log("[ui] restart hub to apply removal")
+            self._append_log("[ui] hub applies config changes automatically")
 
     def _open_plugin_file(self, plugin: str) -> None:
         if not plugin:
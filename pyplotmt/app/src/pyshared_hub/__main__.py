@@ -1,11 +1,36 @@
+import os
 import sys
 
-from PyShared_hub_ui import main as ui_main
-from pyshared_hub import main as hub_main
-
 
 if __name__ == "__main__":
-    if "--hub" in sys.argv:
+    # the modules import each other flat (import hub_cache, import pyshared_hub), as
+    # in the zipapp, where this directory is sys.path[0]; "python -m pyshared_hub"
+    # from src/ also needs it there, and "pyshared_hub" must be pyshared_hub.py,
+    # not this package
+    here = os.path.dirname(os.path.abspath(__file__))
+    if here not in sys.path:
+        sys.path.insert(0, here)
+    if hasattr(sys.modules.get("pyshared_hub"), "__path__"):
+        del sys.modules["pyshared_hub"]
+    # import only the side that runs: the hub does not need the UI (PySide6/Qt) and
+    # the UI does not need the hub's plugins
+    if sys.argv[1:2] == ["bench"]:
+        from hub_bench import main as bench_main
+
+        bench_main(sys.argv[2:])
+    elif sys.argv[1:2] == ["sim"]:
+        from hub_sim import main as sim_main
+
+        sim_main(sys.argv[2:])
+    elif sys.argv[1:2] == ["results"]:
+        from hub_results import main as results_main
+
+        sys.exit(results_main(sys.argv[2:]))
+    elif "--hub" in sys.argv:
+        from pyshared_hub import main as hub_main
+
         hub_main()
     else:
+        from PyShared_hub_ui import main as ui_main
+
         ui_main()
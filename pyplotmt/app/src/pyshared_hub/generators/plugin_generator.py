@@ -9,6 +9,9 @@ import numpy as np
 
 
 class Plugin:
+    # Set to True to receive/return chronological arrays (oldest -> newest).
+    chronological = False
+
     def __init__(self, params=None, context=None):
         self.params = params or {{}}
         self.context = context or {{}}
@@ -30,7 +33,44 @@ class Plugin:
     def process_update(self, series, ts):
         series = np.asarray(series, dtype=np.float64)
         # TODO: replace with your logic.
+        # Optional: define process_bar(series, ts) / process_tick(series, ts) instead.
+        # The hub calls process_bar when ts opens a new bar (append) and process_tick
+        # when ts repeats the current bar (replace the forming bar, do not append).
         return np.zeros_like(series)
+
+    # Optional hot reload handshake: when this file is edited the hub builds a new
+    # Plugin and passes export_state() of the old one to import_state() of the new
+    # one. Without it the new instance is rebuilt with process_full.
+    # def export_state(self):
+    #     return {{}}
+    #
+    # def import_state(self, state):
+    #     pass
+
+    # Optional allocation-free (v2) contract: the hub hands a preallocated
+    # (buffers, count) output view to fill in place and reuses it on every call.
+    # Return False for "no output". Takes precedence over process_full/process_update.
+    # def process_full_into(self, series, ts, out):
+    #     out[0, :] = series
+    #
+    # update_output_count = 1  # values per buffer on UPDATE (default: input count)
+    # def process_update_into(self, series, ts, out, new_bar):
+    #     out[0, -1] = series[-1]
+
+    # Optional warm-up: called once after __init__, before the channel connects.
+    # Run dummy transforms at your configured sizes (FFT plans, windows, GPU
+    # kernels) so the first FULL does not pay for them. Must not change state.
+    # def warmup(self):
+    #     np.fft.rfft(np.zeros(256))
+
+    # Optional memory hooks: memory_usage() reports the bytes this plugin holds
+    # (hub metric plugin_memory_bytes); trim(max_bars) keeps at most the newest
+    # max_bars bars of history when the channel is over its history budget.
+    # def memory_usage(self):
+    #     return 0
+    #
+    # def trim(self, max_bars):
+    #     pass
 '''
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(template, encoding="utf-8")
@@ -0,0 +1,147 @@
+"""Cross-channel batching: one vectorized plugin call for several channels.
+
+Channels running the same Plugin class with the same params (e.g. fisher on 20
+symbols) join a BatchGroup. When a channel has a FULL or UPDATE to compute it
+submits it to its group; the first submitter waits up to the batching window for
+the other members, stacks the inputs of equal length into a 2D array and makes
+one call to the class's ``process_full_batch`` / ``process_update_batch``, then
+hands each channel its row of the result. The other channels are blocked in
+``run`` meanwhile, so their plugin instances are not used concurrently.
+
+A hook that returns None declines the batch; one that raises is logged. Either way
+every channel then computes alone, so a hook must not change plugin state before
+it can no longer fail.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from typing import Any
+
+import numpy as np
+
+# returned by BatchGroup.run when the channel must make its own (unbatched) call
+FALLBACK = object()
+
+HOOKS = {"full": "process_full_batch", "update": "process_update_batch"}
+_LOG = logging.getLogger("PySharedHub")
+
+
+class _Request:
+    __slots__ = ("plugin", "data", "ts", "new_bar", "result", "done")
+
+    def __init__(self, plugin, data: np.ndarray, ts: int, new_bar: bool):
+        self.plugin = plugin
+        self.data = data
+        self.ts = int(ts)
+        self.new_bar = bool(new_bar)
+        self.result: Any = FALLBACK
+        self.done = threading.Event()
+
+
+class BatchGroup:
+    def __init__(self, key: tuple):
+        self.key = key
+        self.members = 0
+        self.window_s = 0.0
+        self.calls = 0  # batched plugin calls
+        self.rows = 0  # channel computes served by them
+        self._windows: list[float] = []
+        self._queues: dict[str, list[_Request]] = {"full": [], "update": []}
+        self._cond = threading.Condition()
+
+    def _join(self, window_ms: float) -> None:
+        with self._cond:
+            self.members += 1
+            self._windows.append(float(window_ms))
+            self.window_s = max(self._windows) / 1000.0
+
+    def leave(self, window_ms: float) -> None:
+        with self._cond:
+            self.members -= 1
+            self._windows.remove(float(window_ms))
+            self.window_s = max(self._windows, default=0.0) / 1000.0
+            self._cond.notify_all()
+        if self.members <= 0:
+            with _GROUPS_LOCK:
+                if self.members <= 0 and _GROUPS.get(self.key) is self:
+                    del _GROUPS[self.key]
+
+    def run(self, kind: str, plugin, data: np.ndarray, ts: int, new_bar: bool = True):
+        """Output of ``plugin`` for ``data`` computed in a batch, or FALLBACK."""
+        req = _Request(plugin, data, ts, new_bar)
+        with self._cond:
+            queue = self._queues[kind]
+            queue.append(req)
+            leader = len(queue) == 1
+            self._cond.notify_all()
+            if leader:
+                deadline = time.monotonic() + self.window_s
+                while len(queue) < self.members:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        break
+                    self._cond.wait(left)
+                batch = queue[:]
+                queue.clear()
+        if not leader:
+            req.done.wait()
+            return req.result
+        try:
+            self._compute(kind, batch)
+        finally:
+            for r in batch:
+                r.done.set()
+        return req.result
+
+    def _compute(self, kind: str, batch: list[_Request]) -> None:
+        """Stack requests of equal input length and make one call per stack; single
+        requests are left to their channel (FALLBACK)."""
+        by_size: dict[int, list[_Request]] = {}
+        for r in batch:
+            by_size.setdefault(int(r.data.size), []).append(r)
+        for reqs in by_size.values():
+            if len(reqs) < 2:
+                continue
+            hook = getattr(type(reqs[0].plugin), HOOKS[kind])
+            plugins = [r.plugin for r in reqs]
+            stacked = np.stack([r.data for r in reqs])
+            ts = np.fromiter((r.ts for r in reqs), dtype=np.int64, count=len(reqs))
+            try:
+                if kind == "full":
+                    outs = hook(plugins, stacked, ts)
+                else:
+                    new_bar = np.fromiter((r.new_bar for r in reqs), dtype=bool, count=len(reqs))
+                    outs = hook(plugins, stacked, ts, new_bar)
+                if outs is None:
+                    continue  # declined
+                if len(outs) != len(reqs):
+                    raise ValueError(f"{HOOKS[kind]} returned {len(outs)} rows for {len(reqs)}")
+            except Exception as exc:
+                _LOG.warning("batched %s failed, channels compute alone: %s", kind, exc)
+                continue
+            for r, out in zip(reqs, outs):
+                r.result = out
+            self.calls += 1
+            self.rows += len(reqs)
+
+
+_GROUPS: dict[tuple, BatchGroup] = {}
+_GROUPS_LOCK = threading.Lock()
+
+
+def batchable(plugin) -> bool:
+    return any(hasattr(type(plugin), hook) for hook in HOOKS.values())
+
+
+def join(plugin, params: dict, window_ms: float) -> BatchGroup:
+    """The group of channels running ``plugin``'s class with ``params``."""
+    key = (type(plugin), json.dumps(params, sort_keys=True, default=str))
+    with _GROUPS_LOCK:
+        group = _GROUPS.get(key)
+        if group is None:
+            group = _GROUPS[key] = BatchGroup(key)
+        group._join(window_ms)
+    return group
@@ -0,0 +1,267 @@
+"""Plugin benchmark: ``python -m pyshared_hub bench``.
+
+Runs the plugins of hub_config.CHANNELS (or ``--plugin``) through the hub's own
+FULL/UPDATE path (ChannelWorker.feed: no bridge, no thread) on synthetic or
+recorded closes:
+
+- ``full``: a FULL of each ``--sizes`` bar count, ``--repeat`` times, each time a
+  different series so neither the FULL cache nor prefix reuse applies;
+- ``tick``: ``--updates`` same-bar UPDATEs after a FULL of ``--update-size`` bars;
+- ``bar``: ``--updates`` new-bar UPDATEs after the same FULL.
+
+The channel's own config applies (compute_policy, update_batch, ...), except that
+checkpoints, the FULL cache and hot reload are off. Reports latency p50/p99 (ms),
+throughput and peak RSS per plugin as JSON or CSV. Each channel runs in a process
+of its own, so the RSS is the plugin's (``--inline`` runs them all here).
+``--numpy-only`` hides CuPy: plugins fall back to NumPy or fail to load.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+BENCH_VERSION = 1
+BAR_SECONDS = 60
+TS0 = 1_700_000_000  # time of the first bar
+COLUMNS = (
+    "channel", "plugin", "params", "scenario", "size", "n", "p50_ms", "p99_ms", "mean_ms", "max_ms",
+    "ops_per_s", "bars_per_s", "load_ms", "peak_rss_mb", "error",
+)
+
+
+def _random_walk(n: int, rng: np.random.Generator, start: float = 100.0) -> np.ndarray:
+    """Synthetic closes, chronological: a geometric random walk."""
+    return start * np.exp(np.cumsum(rng.normal(0.0, 1e-3, int(n))))
+
+
+def load_prices(path: Path) -> np.ndarray:
+    """Recorded closes, chronological: a .npy array, or CSV/text with the close in the
+    last column (header and non-numeric rows are skipped)."""
+    if path.suffix.lower() == ".npy":
+        data = np.load(path)
+    else:
+        data = np.genfromtxt(path, delimiter=",", ndmin=2)[:, -1]
+    data = np.asarray(data, dtype=np.float64).ravel()
+    return data[np.isfinite(data)]
+
+
+class _Source:
+    """Input series for one channel: synthetic, or windows of the recorded closes."""
+
+    def __init__(self, recorded: np.ndarray | None, seed: int):
+        self.recorded = recorded
+        self.rng = np.random.default_rng(seed)
+
+    def max_size(self) -> int | None:
+        return None if self.recorded is None else int(self.recorded.size)
+
+    def series(self, size: int, rep: int) -> np.ndarray:
+        if self.recorded is None:
+            return _random_walk(size, self.rng)
+        # scaled per repeat: same shape, different bits (no cache hits)
+        return self.recorded[-size:] * (1.0 + rep * 1e-9)
+
+    def ticks(self, last: float, n: int) -> np.ndarray:
+        return last * np.exp(np.cumsum(self.rng.normal(0.0, 1e-4, n)))
+
+
+def _row(base: dict, scenario: str, size: int, samples: list[float], bars_per_op: int = 1) -> dict:
+    ms = np.asarray(samples, dtype=np.float64) * 1000.0
+    total = float(ms.sum()) / 1000.0
+    ops = len(samples) / total if total > 0 else 0.0
+    p50, p99 = np.percentile(ms, [50, 99])
+    return dict(
+        base,
+        scenario=scenario,
+        size=int(size),
+        n=len(samples),
+        p50_ms=round(float(p50), 4),
+        p99_ms=round(float(p99), 4),
+        mean_ms=round(float(ms.mean()), 4),
+        max_ms=round(float(ms.max()), 4),
+        ops_per_s=round(ops, 2),
+        bars_per_s=round(ops * bars_per_op, 1),
+        samples_ms=[round(float(v), 4) for v in ms],  # for hub_results compare; not in the CSV
+    )
+
+
+def bench_channel(item: dict, opts: dict) -> list[dict]:
+    """Benchmark rows of one channel config (a hub_config.CHANNELS entry)."""
+    if opts["numpy_only"]:
+        sys.modules["cupy"] = None  # "import cupy" raises ImportError
+    import hub_cache
+    import pyshared_hub as hub
+    from hub_metrics import process_memory
+
+    item = dict(item, checkpoint=False, full_cache=False, hot_reload=False)
+    item.pop("disabled", None)
+    item.pop("inputs", None)  # fed from the bench, not from an upstream channel
+    base: dict[str, Any] = {
+        "channel": item.get("name"),
+        "plugin": item.get("plugin"),
+        "params": json.dumps(item.get("params", {}), sort_keys=True, default=str),
+    }
+    channels = hub.build_channels([item])
+    if not channels:
+        return [dict(base, scenario="load", error="invalid channel config")]
+    worker = hub.ChannelWorker(channels[0], "", 0, {"send_bars": None, "derived": hub_cache.DERIVED})
+    t0 = time.perf_counter()
+    try:
+        worker.load()
+    except Exception as exc:
+        return [dict(base, scenario="load", error=f"{type(exc).__name__}: {exc}")]
+    base["load_ms"] = round((time.perf_counter() - t0) * 1000.0, 2)
+
+    src = _Source(opts["recorded"], opts["seed"])
+    limit = src.max_size()
+    rows = []
+    sizes = [s for s in opts["sizes"] if limit is None or s <= limit] or [limit]
+    for size in sizes:
+        samples = []
+        try:
+            for rep in range(opts["repeat"]):
+                series = src.series(size, rep)[::-1].copy()
+                ts = TS0 + (size - 1) * BAR_SECONDS
+                t0 = time.perf_counter()
+                worker.feed([(100, series, ts)])
+                samples.append(time.perf_counter() - t0)
+        except Exception as exc:
+            rows.append(dict(base, scenario="full", size=size, error=f"{type(exc).__name__}: {exc}"))
+            continue
+        rows.append(_row(base, "full", size, samples, bars_per_op=size))
+
+    size = opts["update_size"] if limit is None else min(opts["update_size"], limit)
+    for scenario in ("tick", "bar"):
+        samples = []
+        try:
+            chrono = src.series(size, opts["repeat"] + (scenario == "bar"))
+            ts = TS0 + (size - 1) * BAR_SECONDS
+            worker.feed([(100, chrono[::-1].copy(), ts)])
+            for price in src.ticks(float(chrono[-1]), opts["updates"]):
+                if scenario == "bar":
+                    ts += BAR_SECONDS
+                packet = np.array([price])
+                t0 = time.perf_counter()
+                worker.feed([(101, packet, ts)])
+                samples.append(time.perf_counter() - t0)
+        except Exception as exc:
+            rows.append(dict(base, scenario=scenario, size=size, error=f"{type(exc).__name__}: {exc}"))
+            continue
+        if samples:
+            rows.append(_row(base, scenario, size, samples))
+
+    peak_mb = round(process_memory()[1] / (1024.0 * 1024.0), 1)
+    for row in rows:
+        row["peak_rss_mb"] = peak_mb
+    return rows
+
+
+def _run_isolated(item: dict, opts: dict) -> list[dict]:
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(bench_channel, (item, opts))
+
+
+def _channel_items(args: argparse.Namespace) -> list[dict]:
+    if args.plugin:
+        params = json.loads(args.params) if args.params else {}
+        stem = Path(args.plugin).stem if args.plugin.endswith(".py") else args.plugin.rsplit(".", 1)[-1]
+        return [{"name": args.name or stem.upper(), "plugin": args.plugin, "params": params}]
+    import hub_config
+
+    items = [dict(item) for item in getattr(hub_config, "CHANNELS", []) if item.get("name") and item.get("plugin")]
+    if args.channel:
+        wanted = {name.upper() for name in args.channel}
+        items = [item for item in items if str(item["name"]).upper() in wanted]
+    return items
+
+
+def to_csv(rows: list[dict]) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=COLUMNS, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buf.getvalue()
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(prog="pyshared_hub bench", description="Benchmark hub plugins offline.")
+    ap.add_argument("--channel", action="append", help="channel name in hub_config.CHANNELS (repeatable; default all)")
+    ap.add_argument("--plugin", help="plugin spec (module or .py path) instead of hub_config")
+    ap.add_argument("--params", help="JSON params for --plugin")
+    ap.add_argument("--name", help="channel name for --plugin")
+    ap.add_argument("--sizes", default="1000,10000,50000", help="FULL sizes in bars (comma separated)")
+    ap.add_argument("--repeat", type=int, default=5, help="FULLs per size")
+    ap.add_argument("--updates", type=int, default=200, help="UPDATEs per scenario (tick, bar)")
+    ap.add_argument("--update-size", type=int, default=5000, help="bars of the FULL before the UPDATEs")
+    ap.add_argument("--input", type=Path, help="recorded closes (.npy or CSV, oldest first) instead of synthetic")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--numpy-only", action="store_true", help="run without CuPy (GPU-less machines)")
+    ap.add_argument("--inline", action="store_true", help="run every channel in this process")
+    ap.add_argument("--format", choices=("json", "csv"), default="json")
+    ap.add_argument("--out", type=Path, help="output file (default stdout)")
+    ap.add_argument("--store", nargs="?", const="", metavar="PATH", help="also record the run in the results store")
+    ap.add_argument("--label", help="label of the recorded run")
+    return ap.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Bench document: environment, options and one row per channel and scenario."""
+    opts = {
+        "sizes": sorted({int(s) for s in str(args.sizes).split(",") if s.strip()}),
+        "repeat": max(1, int(args.repeat)),
+        "updates": max(0, int(args.updates)),
+        "update_size": max(2, int(args.update_size)),
+        "seed": int(args.seed),
+        "numpy_only": bool(args.numpy_only),
+        "recorded": load_prices(args.input) if args.input else None,
+    }
+    if opts["numpy_only"] and args.inline:
+        sys.modules["cupy"] = None
+    rows: list[dict] = []
+    for item in _channel_items(args):
+        print(f"bench {item['name']} ({item['plugin']})", file=sys.stderr, flush=True)
+        try:
+            rows.extend(bench_channel(item, opts) if args.inline else _run_isolated(item, opts))
+        except Exception as exc:
+            rows.append({"channel": item["name"], "plugin": item["plugin"], "scenario": "load", "error": str(exc)})
+    options = dict(opts, recorded=str(args.input) if args.input else None, inline=bool(args.inline))
+    return {
+        "bench_version": BENCH_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "options": options,
+        "results": rows,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    doc = run(args)
+    if args.store is not None:
+        import hub_results
+
+        stored = hub_results.record(doc, Path(args.store) if args.store else None, args.label)
+        print(f"recorded {stored['id']}", file=sys.stderr)
+    text = to_csv(doc["results"]) if args.format == "csv" else json.dumps(doc, indent=2) + "\n"
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+    else:
+        sys.stdout.write(text)
+
+
+if __name__ == "__main__":
+    main()
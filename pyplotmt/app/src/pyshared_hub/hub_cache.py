@@ -0,0 +1,234 @@
+"""In-process caches shared by the hub channels."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+
+def digest(*parts: Any) -> str:
+    """blake2b of arrays (raw bytes) and JSON-able values, in order."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            h.update(str(part.dtype).encode("ascii"))
+            h.update(np.ascontiguousarray(part).data)
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(v) for v in value)
+    return 64
+
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    return value
+
+
+class FullResultCache:
+    """LRU of process_full results, bounded by bytes.
+
+    An entry is the plugin output plus the plugin state right after the FULL
+    (export_state), so a hit can also restore the incremental state. Values are
+    copied in and out; callers may keep or mutate what they get.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = int(max_bytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[str, tuple[np.ndarray, dict, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[np.ndarray, dict] | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+        out, state, _size = item
+        return out.copy(), _copy(state)
+
+    def put(self, key: str, out: np.ndarray, state: dict) -> None:
+        out = np.array(out, dtype=np.float64)
+        state = _copy(state)
+        size = int(out.nbytes) + _nbytes(state)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[2]
+            self._items[key] = (out, state, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes and self._items:
+                _key, (_o, _s, evicted) = self._items.popitem(last=False)
+                self.nbytes -= evicted
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+FULL_CACHE = FullResultCache(int(float(os.environ.get("PYSHARED_FULL_CACHE_MB", "64")) * 1024 * 1024))
+
+
+def _rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Centered moving average (np.convolve mode="same"), as used for detrending."""
+    kernel = np.ones(int(window), dtype=np.float64) / float(window)
+    return np.convolve(x, kernel, mode="same")
+
+
+def _log_return(x: np.ndarray) -> np.ndarray:
+    if x.size < 2:
+        return np.empty(0, dtype=np.float64)
+    return np.log(x[1:] / x[:-1])
+
+
+DERIVED_FUNCS: dict[str, Any] = {
+    "reversed": lambda x: x[::-1].copy(),
+    "log": np.log,
+    "log_return": _log_return,
+    "rolling_mean": _rolling_mean,
+}
+
+
+class _BoundInput:
+    """The FULL input a channel thread is processing; its digest is computed on first use."""
+
+    def __init__(self, base: np.ndarray):
+        self.base = base
+        self._key: str | None = None
+
+    @property
+    def key(self) -> str:
+        if self._key is None:
+            self._key = digest(self.base)
+        return self._key
+
+    def locate(self, x: np.ndarray) -> tuple[int, int] | None:
+        """(offset, step) of ``x`` inside the bound input, or None if it is not a view of it."""
+        base = self.base
+        if x.ndim != 1 or x.size == 0 or x.dtype != base.dtype or base.ndim != 1:
+            return None
+        item = base.itemsize
+        lo = base.__array_interface__["data"][0]
+        hi = lo + base.size * item
+        first = x.__array_interface__["data"][0]
+        last = first + (x.size - 1) * x.strides[0]
+        if not (lo <= first < hi and lo <= last < hi) or (first - lo) % item or x.strides[0] % item:
+            return None
+        return (first - lo) // item, x.strides[0] // item
+
+
+class DerivedCache:
+    """Series derived from the input (log, log returns, rolling mean, ...), shared by channels.
+
+    Plugins ask for an entry by name: ``derived.get("log_return", prices)``. It is
+    computed once per input content and returned read-only to every channel that
+    asks for the same thing; a changed input gets new keys and the stale entries
+    age out of the LRU.
+
+    While the hub runs a FULL it binds the input to the channel thread, so arrays
+    that are views of it (the series, a reversed or trimmed slice) are keyed by
+    the input digest and their position instead of hashing their contents again.
+    Other arrays are hashed. Plugins must not write into their input.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = int(max_bytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._funcs = dict(DERIVED_FUNCS)
+        self._items: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._inflight: dict[tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def register(self, name: str, fn) -> None:
+        """Add a derived series ``fn(x, **params) -> ndarray`` under ``name``."""
+        self._funcs[name] = fn
+
+    def bind(self, base: np.ndarray | None) -> _BoundInput | None:
+        """Bind the input this thread is about to process (None to unbind)."""
+        ref = _BoundInput(base) if base is not None else None
+        self._local.input = ref
+        return ref
+
+    def _array_key(self, x: np.ndarray) -> tuple:
+        ref = getattr(self._local, "input", None)
+        if ref is not None:
+            pos = ref.locate(x)
+            if pos is not None:
+                return (ref.key, pos[0], pos[1], x.size)
+        return (digest(x),)
+
+    def get(self, name: str, x: np.ndarray, **params: Any) -> np.ndarray:
+        fn = self._funcs.get(name)
+        if fn is None:
+            raise ValueError(f"unknown derived series: {name}")
+        x = np.asarray(x)
+        key = (name, json.dumps(params, sort_keys=True, default=str)) + self._array_key(x)
+        while True:
+            with self._lock:
+                value = self._items.get(key)
+                if value is not None:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return value
+                event = self._inflight.get(key)
+                if event is None:
+                    # this thread computes it; others asking meanwhile wait for it
+                    event = self._inflight[key] = threading.Event()
+                    self.misses += 1
+                    break
+            event.wait()
+        try:
+            value = np.array(fn(x, **params))
+            value.setflags(write=False)
+            self._put(key, value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+        return value
+
+    def _put(self, key: tuple, value: np.ndarray) -> None:
+        size = int(value.nbytes)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= int(old.nbytes)
+            self._items[key] = value
+            self.nbytes += size
+            while self.nbytes > self.max_bytes and self._items:
+                _key, evicted = self._items.popitem(last=False)
+                self.nbytes -= int(evicted.nbytes)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+DERIVED = DerivedCache(int(float(os.environ.get("PYSHARED_DERIVED_CACHE_MB", "32")) * 1024 * 1024))
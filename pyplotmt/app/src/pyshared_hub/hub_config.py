@@ -27,6 +27,8 @@ CHANNELS = [
             "min_period_bars": 20.0,
             "max_period_bars": 240.0,
         },
+        # full STFT pipeline: one compute per closed bar, phase-projected in between
+        "compute_policy": "bar_close",
         "disabled": False,
     },
     {
@@ -54,5 +56,15 @@ CHANNELS = [
             "forget": 0.995,
             "delta": 100.0,
         },
+        # learns from every tick: receive all drained UPDATEs as one stacked batch
+        "update_batch": True,
+    },
+    {
+        "name": "RLSWAVE",
+        "plugin": "plugins.online_rls_predict",
+        "params": {"lookback": 64},
+        # input is the WAVEV6 output, wired in-process (no MT5 round trip)
+        "inputs": ["WAVEV6"],
+        "disabled": True,
     },
 ]
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""Local metrics endpoint: the channels' in-memory metrics in Prometheus text format.
+
+``--metrics 9464`` (or PYSHARED_METRICS) serves ``GET /metrics`` on 127.0.0.1:9464;
+``HOST:PORT`` binds elsewhere and ``unix:/path/hub.sock`` listens on a Unix socket.
+A scrape reads the ChannelMetrics dicts of every channel (no lock, no log parsing)
+and asks the OS for the RSS once; the channel threads do nothing extra for it.
+
+The same socket takes ``POST /profile?channel=NAME&seconds=10&mode=sample`` to
+profile one channel (hub_profile).
+"""
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable
+from urllib.parse import parse_qs, urlsplit
+
+import hub_cache
+import hub_gc
+import hub_profile
+from hub_metrics import process_memory
+
+PREFIX = "pyshared_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_HOST = "127.0.0.1"
+_LOG = logging.getLogger("PySharedHub")
+
+# counters kept in doubles, exported in bytes
+_BYTES = {"rx_doubles": "rx_bytes", "tx_doubles": "tx_bytes"}
+# gauges renamed after the Prometheus unit conventions
+_GAUGE_NAMES = {"last_rx_time": "last_rx_timestamp_seconds"}
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render(workers: Iterable, started: float | None = None) -> str:
+    """Exposition text for ``workers`` (ChannelWorker-like: ``cfg.name``, ``metrics``,
+    ``is_alive()``, ``ready``)."""
+    counters: dict[str, list[tuple[str, float]]] = {}
+    gauges: dict[str, list[tuple[str, float]]] = {}
+    hists: dict[str, list[tuple[str, tuple]]] = {}
+    up: list[tuple[str, float]] = []
+    for w in workers:
+        m = w.metrics
+        ch = _label(w.cfg.name)
+        up.append((ch, 1.0 if w.is_alive() and w.ready.is_set() else 0.0))
+        for name, value in dict(m.counters).items():
+            if name in _BYTES:
+                counters.setdefault(_BYTES[name], []).append((ch, value * 8))
+            else:
+                counters.setdefault(name, []).append((ch, value))
+        for name, value in dict(m.gauges).items():
+            gauges.setdefault(_GAUGE_NAMES.get(name, name), []).append((ch, value))
+        for name, hist in dict(m.histograms).items():
+            hists.setdefault(name, []).append((ch, hist.snapshot()))
+
+    lines: list[str] = []
+    _family(lines, "channel_up", "gauge", up)
+    for name in sorted(counters):
+        _family(lines, f"{name}_total", "counter", counters[name])
+    for name in sorted(gauges):
+        _family(lines, name, "gauge", gauges[name])
+    for name in sorted(hists):
+        # latencies are observed in ms, exported in seconds (unit conventions)
+        scale = 1000.0 if name.endswith("_ms") else 1.0
+        metric = PREFIX + (name[:-3] + "_seconds" if scale != 1.0 else name)
+        lines.append(f"# TYPE {metric} histogram")
+        for ch, (bounds, counts, total, count) in hists[name]:
+            cum = 0
+            for bound, n in zip(bounds, counts):
+                cum += n
+                lines.append(f'{metric}_bucket{{channel="{ch}",le="{_num(bound / scale)}"}} {cum}')
+            lines.append(f'{metric}_bucket{{channel="{ch}",le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum{{channel="{ch}"}} {_num(total / scale)}')
+            lines.append(f'{metric}_count{{channel="{ch}"}} {count}')
+
+    # process-wide: "hub_" keeps them apart from the per-channel families
+    rss, peak = process_memory()
+    hub = [
+        ("process_resident_memory_bytes", "gauge", rss),
+        ("process_resident_memory_peak_bytes", "gauge", peak),
+        ("hub_derived_cache_hits_total", "counter", hub_cache.DERIVED.hits),
+        ("hub_derived_cache_misses_total", "counter", hub_cache.DERIVED.misses),
+        ("hub_derived_cache_bytes", "gauge", hub_cache.DERIVED.nbytes),
+        ("hub_full_cache_hits_total", "counter", hub_cache.FULL_CACHE.hits),
+        ("hub_full_cache_misses_total", "counter", hub_cache.FULL_CACHE.misses),
+        ("hub_full_cache_bytes", "gauge", hub_cache.FULL_CACHE.nbytes),
+    ]
+    if started is not None:
+        hub.append(("uptime_seconds", "gauge", time.monotonic() - started))
+    for name, kind, value in hub:
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        lines.append(f"{PREFIX}{name} {_num(value)}")
+    # collections of every thread, by generation (per-channel pauses: gc_pause_seconds)
+    for name, values in (
+        ("hub_gc_collections_total", hub_gc.PAUSES.collections),
+        ("hub_gc_pause_seconds_total", hub_gc.PAUSES.seconds),
+    ):
+        lines.append(f"# TYPE {PREFIX}{name} counter")
+        for gen, value in enumerate(list(values)):
+            lines.append(f'{PREFIX}{name}{{generation="{gen}"}} {_num(value)}')
+    lines.append(f"# TYPE {PREFIX}hub_gc_frozen_objects gauge")
+    lines.append(f"{PREFIX}hub_gc_frozen_objects {gc.get_freeze_count()}")
+    return "\n".join(lines) + "\n"
+
+
+def _family(lines: list[str], name: str, kind: str, samples: list[tuple[str, float]]) -> None:
+    metric = PREFIX + name
+    lines.append(f"# TYPE {metric} {kind}")
+    for ch, value in samples:
+        lines.append(f'{metric}{{channel="{ch}"}} {_num(value)}')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "PySharedHub"
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        try:
+            body = self.server.render().encode("utf-8")
+        except Exception as exc:
+            _LOG.warning("metrics render failed: %s", exc)
+            self.send_error(500)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/profile":
+            self.send_error(404)
+            return
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        name = query.get("channel", "").upper()
+        worker = next((w for w in self.server.workers() if str(w.cfg.name).upper() == name), None)
+        if worker is None:
+            self.send_error(404, f"unknown channel: {query.get('channel', '')}")
+            return
+        try:
+            worker.request_profile(float(query.get("seconds", hub_profile.DEFAULT_SECONDS)), query.get("mode", "cprofile"))
+        except ValueError as exc:
+            self.send_error(400, str(exc))
+            return
+        body = f"profiling {worker.cfg.name}\n".encode("utf-8")
+        self.send_response(202)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, fmt: str, *args) -> None:
+        pass  # a scrape every few seconds is not worth a log line
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+if hasattr(socket, "AF_UNIX"):
+
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def get_request(self):
+            request, _addr = super().get_request()
+            return request, ("unix", 0)
+
+
+def parse_address(addr: str) -> tuple[str, object]:
+    """("tcp", (host, port)) or ("unix", path) of a ``--metrics`` value."""
+    addr = addr.strip()
+    if addr.startswith("unix:"):
+        return "unix", addr[5:]
+    host, _, port = addr.rpartition(":")
+    return "tcp", (host.strip("[]") or DEFAULT_HOST, int(port))
+
+
+class MetricsServer:
+    """Serves ``render(workers())`` on a daemon thread until stop()."""
+
+    def __init__(self, addr: str, workers: Callable[[], Iterable]):
+        self.kind, self.address = parse_address(addr)
+        started = time.monotonic()
+        if self.kind == "unix":
+            if not hasattr(socket, "AF_UNIX"):
+                raise ValueError("unix sockets are not available on this platform")
+            if os.path.exists(self.address):
+                os.unlink(self.address)  # stale socket of a previous hub
+            self._server = _UnixServer(self.address, _Handler)
+        else:
+            self._server = _TCPServer(self.address, _Handler)
+            self.address = self._server.server_address[:2]
+        self._server.workers = workers
+        self._server.render = lambda: render(workers(), started)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True)
+
+    def start(self) -> "MetricsServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self.kind == "unix":
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+
+    def describe(self) -> str:
+        if self.kind == "unix":
+            return f"unix:{self.address}"
+        return f"http://{self.address[0]}:{self.address[1]}/metrics"
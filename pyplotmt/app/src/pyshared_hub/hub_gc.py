@@ -0,0 +1,104 @@
+"""Garbage collector settings and pause accounting for the hub.
+
+The channel loops free their arrays by reference counting; the cyclic collector
+only adds pauses, and a full (generation 2) pass walks every object the imports
+left behind (NumPy, SciPy, CuPy: hundreds of thousands). So the hub:
+
+- raises the collection thresholds (THRESHOLDS, ``--gc-threshold`` or
+  PYSHARED_GC_THRESHOLD ``gen0,gen1,gen2``; ``default`` keeps Python's);
+- once every channel has loaded its plugin, collects once and moves everything
+  alive to the permanent generation (gc.freeze), out of later passes;
+- times every collection (gc.callbacks). A pause on a channel thread goes to that
+  channel's ``gc_pause_ms`` histogram (and ``gc_full_collections`` for
+  generation 2); every pause counts in the process totals (PAUSES).
+"""
+from __future__ import annotations
+
+import gc
+import threading
+import time
+
+import hub_metrics
+
+THRESHOLDS = (10_000, 20, 50)
+
+
+class _Pauses:
+    """Process-wide collection counts and pause time, by generation."""
+
+    def __init__(self) -> None:
+        self.collections = [0, 0, 0]
+        self.seconds = [0.0, 0.0, 0.0]
+
+
+PAUSES = _Pauses()
+_CHANNELS: dict[int, hub_metrics.ChannelMetrics] = {}  # thread id -> metrics
+_started: float | None = None
+
+
+def parse_thresholds(value: str) -> tuple[int, ...] | None:
+    """``gen0,gen1,gen2`` (missing ones keep Python's); None for ``default``/empty."""
+    value = value.strip().lower()
+    if value in ("", "default"):
+        return None
+    current = list(gc.get_threshold())
+    for i, part in enumerate(value.split(",")[:3]):
+        if part.strip():
+            current[i] = int(part)
+    if current[0] < 0:
+        raise ValueError(f"invalid gc threshold: {value}")
+    return tuple(current)
+
+
+def set_thresholds(thresholds: tuple[int, ...] | None) -> tuple[int, ...]:
+    if thresholds is not None:
+        gc.set_threshold(*thresholds)
+    return gc.get_threshold()
+
+
+def _callback(phase: str, info: dict) -> None:
+    global _started
+    if phase == "start":
+        _started = time.perf_counter()
+        return
+    if _started is None:
+        return
+    ms = (time.perf_counter() - _started) * 1000.0
+    _started = None
+    gen = min(int(info.get("generation", 0)), 2)
+    PAUSES.collections[gen] += 1
+    PAUSES.seconds[gen] += ms / 1000.0
+    metrics = _CHANNELS.get(threading.get_ident())
+    if metrics is not None:
+        metrics.observe("gc_pause_ms", ms)
+        if gen == 2:
+            metrics.inc("gc_full_collections")
+
+
+def install() -> None:
+    """Start timing collections (once per process)."""
+    if _callback not in gc.callbacks:
+        gc.callbacks.append(_callback)
+
+
+def uninstall() -> None:
+    if _callback in gc.callbacks:
+        gc.callbacks.remove(_callback)
+
+
+def attach(metrics: hub_metrics.ChannelMetrics) -> None:
+    """Attribute collections run on the calling thread to ``metrics``."""
+    _CHANNELS[threading.get_ident()] = metrics
+
+
+def detach() -> None:
+    _CHANNELS.pop(threading.get_ident(), None)
+
+
+def freeze() -> tuple[int, float]:
+    """Collect once, then move every live object to the permanent generation.
+    Returns (frozen objects, ms)."""
+    t0 = time.perf_counter()
+    gc.collect()
+    gc.freeze()
+    return gc.get_freeze_count(), (time.perf_counter() - t0) * 1000.0
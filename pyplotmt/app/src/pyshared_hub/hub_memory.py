@@ -0,0 +1,109 @@
+"""Plugin memory accounting and history budgets.
+
+Every MEMORY_CHECK_SECONDS a channel measures its plugin:
+
+- ``plugin.memory_usage()`` (bytes) when the plugin has it;
+- else tracemalloc, when the hub traces allocations (PYSHARED_TRACEMALLOC=frames):
+  the bytes still allocated from the plugin's source file, split between the
+  channels running that file;
+- else the arrays (NumPy/CuPy) reachable from the plugin's attributes.
+
+A channel over its budget (``history_budget_mb`` in the channel config, or its
+share of the hub budget PYSHARED_HISTORY_BUDGET_MB) calls ``plugin.trim(max_bars)``:
+keep at most the newest ``max_bars`` bars of history. The bars are estimated from
+the channel's history length so the plugin lands at TRIM_TO of the budget.
+"""
+from __future__ import annotations
+
+import threading
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+MEMORY_CHECK_SECONDS = 10.0
+TRIM_TO = 0.75  # a trim aims at this fraction of the budget (no trim every check)
+MIN_TRIM_BARS = 256
+_WALK_DEPTH = 3
+
+_TRACED: dict[str, int] = {}  # source file -> bytes, refreshed by sample_traced()
+_TRACED_LOCK = threading.Lock()
+
+
+def array_bytes(obj: Any, depth: int = _WALK_DEPTH, seen: set[int] | None = None) -> int:
+    """Bytes of the arrays reachable from ``obj`` (attributes, dicts, lists, tuples)."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if hasattr(obj, "dtype") and not isinstance(obj, type):
+        return int(getattr(obj, "nbytes", 0))
+    if depth <= 0 or isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return 0
+    if isinstance(obj, dict):
+        items = obj.values()
+    elif isinstance(obj, (list, tuple, set)):
+        items = obj
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        items = vars(obj).values()
+    else:
+        return 0
+    return sum(array_bytes(v, depth - 1, seen) for v in items)
+
+
+def start_tracing(frames: int) -> None:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(max(1, int(frames)))
+
+
+def sample_traced() -> None:
+    """Snapshot tracemalloc and keep the bytes per source file (hub main thread)."""
+    if not tracemalloc.is_tracing():
+        return
+    stats = tracemalloc.take_snapshot().statistics("filename")
+    by_file = {}
+    for stat in stats:
+        name = stat.traceback[0].filename
+        by_file[name] = by_file.get(name, 0) + stat.size
+    with _TRACED_LOCK:
+        _TRACED.clear()
+        _TRACED.update(by_file)
+
+
+def traced_bytes(source: Path | None) -> int | None:
+    if source is None or not tracemalloc.is_tracing():
+        return None
+    with _TRACED_LOCK:
+        return _TRACED.get(str(source))
+
+
+def plugin_memory(
+    plugin: Any, source: Path | None = None, sharers: int = 1, shared: Any = None
+) -> tuple[int, str]:
+    """(bytes, how it was measured: "hook" / "tracemalloc" / "arrays"). ``shared``
+    (the hub context) is not counted in the arrays walk."""
+    hook = getattr(plugin, "memory_usage", None)
+    if hook is not None:
+        return int(hook()), "hook"
+    traced = traced_bytes(source)
+    if traced is not None:
+        return traced // max(1, sharers), "tracemalloc"
+    seen = {id(shared)} | ({id(v) for v in shared.values()} if isinstance(shared, dict) else set())
+    return array_bytes(plugin, seen=seen), "arrays"
+
+
+def trim_bars(usage: int, bars: int, budget: int) -> int:
+    """History length that brings ``usage`` (for ``bars`` bars) to TRIM_TO of ``budget``."""
+    if usage <= 0 or bars <= 0:
+        return MIN_TRIM_BARS
+    return max(MIN_TRIM_BARS, int(bars * budget * TRIM_TO / usage))
+
+
+def budget_shares(usage: dict[str, int], budget: int) -> dict[str, int | None]:
+    """Per-channel cap under a hub budget: none while the total fits, else each
+    channel's usage scaled down so the total fits."""
+    total = sum(usage.values())
+    if budget <= 0 or total <= budget:
+        return {name: None for name in usage}
+    scale = budget / total
+    return {name: int(used * scale) for name, used in usage.items()}
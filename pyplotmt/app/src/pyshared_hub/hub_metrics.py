@@ -0,0 +1,105 @@
+"""Per-channel hub metrics (in-memory counters and gauges).
+
+Each ChannelWorker owns one ChannelMetrics and is its only writer; readers take a
+snapshot (dict copies are atomic under the GIL). Nothing here does IO besides
+process_memory() asking the OS for the process RSS.
+"""
+from __future__ import annotations
+
+import os
+import sys
+from bisect import bisect_left
+
+# upper bounds (ms) of the latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 5000.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram: per-bucket counts (not cumulative), sum and count."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> tuple[tuple[float, ...], list[int], float, int]:
+        return self.bounds, list(self.counts), self.sum, self.count
+
+
+class ChannelMetrics:
+    def __init__(self, channel: str):
+        self.channel = channel
+        self.counters: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+        self.histograms: dict[str, Histogram] = {}
+
+    def inc(self, name: str, value: float = 1.0) -> None:
+        self.counters[name] = self.counters.get(name, 0.0) + value
+
+    def set(self, name: str, value: float) -> None:
+        self.gauges[name] = float(value)
+
+    def set_max(self, name: str, value: float) -> None:
+        if value > self.gauges.get(name, float("-inf")):
+            self.gauges[name] = float(value)
+
+    def observe(self, name: str, value: float) -> None:
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = Histogram()
+        hist.observe(value)
+
+    def snapshot(self) -> dict[str, float]:
+        out = dict(self.counters)
+        out.update(self.gauges)
+        return out
+
+    def summary(self) -> str:
+        snap = self.snapshot()
+        return " ".join(f"{k}={v:g}" for k, v in sorted(snap.items()))
+
+
+def process_memory() -> tuple[int, int]:
+    """(current, peak) resident set size of this process in bytes; 0 if unknown."""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class _Counters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = _Counters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return 0, 0
+        return int(counters.WorkingSetSize), int(counters.PeakWorkingSetSize)
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak *= 1 if sys.platform == "darwin" else 1024  # bytes on macOS, KiB elsewhere
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            current = int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        current = peak
+    return current, max(current, peak)
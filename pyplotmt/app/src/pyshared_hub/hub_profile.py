@@ -0,0 +1,143 @@
+"""On-demand profiling of one channel thread.
+
+A session runs on the ChannelWorker thread it profiles, for a fixed time:
+
+- ``cprofile``: cProfile enabled on the channel thread only (deterministic, every
+  call; adds overhead while it runs), written as ``.pstats``;
+- ``sample``: a sampler thread reads the channel thread's stack every few ms
+  (sys._current_frames) and writes a speedscope ``.speedscope.json``.
+
+Nothing runs while no session is active. Sessions are requested with
+ChannelWorker.request_profile (hub control endpoint, SIGUSR1) or a META packet
+starting with PROFILE_META: ``[PROFILE_META, seconds, mode]`` (mode 0 cprofile,
+1 sample).
+"""
+from __future__ import annotations
+
+import cProfile
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+MODES = ("cprofile", "sample")
+PROFILE_META = -1001.0  # first META value reserved for profile requests
+DEFAULT_SECONDS = 10.0
+MAX_SECONDS = 600.0
+SAMPLE_INTERVAL_S = 0.005
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+def parse_meta(meta) -> tuple[float, str] | None:
+    """(seconds, mode) of a profile request META, None for a plugin META."""
+    if len(meta) == 0 or float(meta[0]) != PROFILE_META:
+        return None
+    seconds = float(meta[1]) if len(meta) > 1 else DEFAULT_SECONDS
+    mode = MODES[1] if len(meta) > 2 and int(meta[2]) == 1 else MODES[0]
+    return seconds, mode
+
+
+class _Sampler(threading.Thread):
+    """Counts the stacks of thread ``target`` until stopped."""
+
+    def __init__(self, target: int, interval_s: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.target = target
+        self.interval_s = interval_s
+        self.stacks: dict[tuple, int] = {}
+        self.samples = 0
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval_s):
+            frame = sys._current_frames().get(self.target)
+            if frame is None:
+                break  # the channel thread is gone
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            key = tuple(reversed(stack))  # root first
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join(timeout=2.0)
+
+    def speedscope(self, name: str) -> dict:
+        frames: list[dict] = []
+        index: dict[tuple, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.items():
+            ids = []
+            for fr in stack:
+                i = index.get(fr)
+                if i is None:
+                    i = index[fr] = len(frames)
+                    frames.append({"name": fr[0], "file": fr[1], "line": fr[2]})
+                ids.append(i)
+            samples.append(ids)
+            weights.append(count * self.interval_s * 1000.0)
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "pyshared_hub",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+class ProfileSession:
+    """One profile of the calling thread; start() and finish() on that thread."""
+
+    def __init__(self, channel: str, seconds: float, mode: str = "cprofile"):
+        if mode not in MODES:
+            raise ValueError(f"unknown profile mode: {mode} (expected one of {', '.join(MODES)})")
+        self.channel = channel
+        self.seconds = min(max(float(seconds), 0.1), MAX_SECONDS)
+        self.mode = mode
+        self.deadline = 0.0
+        self._profile: cProfile.Profile | None = None
+        self._sampler: _Sampler | None = None
+
+    def start(self) -> None:
+        self.deadline = time.monotonic() + self.seconds
+        if self.mode == "sample":
+            self._sampler = _Sampler(threading.get_ident(), SAMPLE_INTERVAL_S)
+            self._sampler.start()
+        else:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+    def finish(self, out_dir: Path) -> Path:
+        """Stop profiling and write the result in ``out_dir``; returns the file."""
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        out_dir.mkdir(parents=True, exist_ok=True)
+        if self._sampler is not None:
+            self._sampler.stop()
+            path = out_dir / f"{self.channel}-{stamp}.speedscope.json"
+            doc = self._sampler.speedscope(f"{self.channel} {stamp} ({self._sampler.samples} samples)")
+            path.write_text(json.dumps(doc), encoding="utf-8")
+            return path
+        assert self._profile is not None
+        self._profile.disable()
+        path = out_dir / f"{self.channel}-{stamp}.pstats"
+        self._profile.dump_stats(str(path))
+        return path
@@ -0,0 +1,365 @@
+"""Performance results store and regression report: ``python -m pyshared_hub results``.
+
+The store is one versioned JSON file (default ``perf/results.json`` in the app
+tree, or PYSHARED_RESULTS) holding every recorded bench/sim run with its git
+revision, machine fingerprint and options:
+
+- ``results add run.json [--label ...]``: record a ``bench``/``sim`` JSON output
+  (``bench --store`` / ``sim --store`` record directly);
+- ``results list``: the recorded runs;
+- ``results compare [BASE] [NEW]``: per plugin and hub stage (bench: full / tick /
+  bar per size; sim: tick-to-output latency per chart count), flags slowdowns that
+  are both significant and larger than the threshold on the median. Exits 1 if any
+  is flagged.
+
+Latencies of one run share its warm-up, cache and clock state, so runs of the same
+code differ far more than the samples inside a run suggest: the test compares the
+per-run medians of each side (one-sided exact Mann-Whitney U, p < alpha) and needs
+at least ``--min-runs`` runs per side; with fewer a stage is reported as
+``few_runs`` and never flagged.
+
+BASE/NEW select runs: a git revision prefix selects every run of that revision, a
+run id (or unique prefix) or index (-1 = last run) a single run; join several with
+commas. By default NEW is every run of the last run's revision and BASE every run of
+the previous revision, both of the same kind on the same machine.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+STORE_VERSION = 1
+MIN_RUNS = 5  # smallest group where an exact test can reach p < 0.01 (5 vs 5: 1/252)
+_SRC_DIR = Path(__file__).resolve().parent
+
+
+def default_store() -> Path:
+    env = os.environ.get("PYSHARED_RESULTS")
+    if env:
+        return Path(env)
+    return _SRC_DIR.parents[1] / "perf" / "results.json"
+
+
+def git_revision() -> dict[str, Any] | None:
+    """{"rev", "dirty"} of the checkout holding this file, or None outside git."""
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=_SRC_DIR, capture_output=True, text=True, timeout=10, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=_SRC_DIR, capture_output=True, text=True, timeout=30, check=True,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return {"rev": rev, "dirty": bool(status.strip())}
+
+
+def _cpu_model() -> str:
+    if sys.platform.startswith("linux"):
+        try:
+            for line in Path("/proc/cpuinfo").read_text(encoding="utf-8", errors="replace").splitlines():
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+        except OSError:
+            pass
+    return platform.processor() or platform.machine()
+
+
+def machine_info() -> dict[str, Any]:
+    """Hardware/OS description; ``fingerprint`` identifies the machine across runs."""
+    info = {
+        "system": platform.system(),
+        "release": platform.release(),
+        "machine": platform.machine(),
+        "cpu": _cpu_model(),
+        "cpus": os.cpu_count() or 0,
+        "node": platform.node(),
+    }
+    blob = json.dumps([info["system"], info["machine"], info["cpu"], info["cpus"], info["node"]])
+    info["fingerprint"] = hashlib.blake2b(blob.encode("utf-8"), digest_size=6).hexdigest()
+    return info
+
+
+def load_store(path: Path) -> dict[str, Any]:
+    if not path.exists():
+        return {"store_version": STORE_VERSION, "runs": []}
+    store = json.loads(path.read_text(encoding="utf-8"))
+    if int(store.get("store_version", 0)) > STORE_VERSION:
+        raise SystemExit(f"{path}: store_version {store.get('store_version')} is newer than this hub ({STORE_VERSION})")
+    store.setdefault("runs", [])
+    return store
+
+
+def save_store(path: Path, store: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(store, indent=1) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def record(doc: dict[str, Any], path: Path | None = None, label: str | None = None) -> dict[str, Any]:
+    """Add a bench/sim output document to the store; returns the stored run."""
+    path = path or default_store()
+    kind = "sim" if "sim_version" in doc else "bench"
+    git = git_revision()
+    created = doc.get("created") or datetime.now(timezone.utc).isoformat(timespec="seconds")
+    stamp = created.replace("-", "").replace(":", "")[:15]
+    run = {
+        "id": f"{stamp}-{kind}-{(git or {}).get('rev', 'nogit')[:8]}",
+        "kind": kind,
+        "label": label,
+        "created": created,
+        "git": git,
+        "machine": machine_info(),
+        "python": doc.get("python"),
+        "numpy": doc.get("numpy"),
+        "options": doc.get("options"),
+        "results": doc.get("results", []),
+    }
+    store = load_store(path)
+    ids = {r["id"] for r in store["runs"]}
+    base_id, n = run["id"], 1
+    while run["id"] in ids:
+        n += 1
+        run["id"] = f"{base_id}.{n}"
+    store["runs"].append(run)
+    save_store(path, store)
+    return run
+
+
+def _rankdata(a: np.ndarray) -> np.ndarray:
+    """Ranks 1..n, ties get their average rank."""
+    order = np.argsort(a, kind="mergesort")
+    ranks = np.empty(a.size, dtype=np.float64)
+    ranks[order] = np.arange(1, a.size + 1)
+    _vals, inv, counts = np.unique(a, return_inverse=True, return_counts=True)
+    return (np.bincount(inv, weights=ranks) / counts)[inv]
+
+
+def mann_whitney_greater(new, base) -> float:
+    """One-sided p-value that ``new`` tends to be larger than ``base`` (Mann-Whitney U,
+    normal approximation with tie and continuity correction)."""
+    x = np.asarray(new, dtype=np.float64)
+    y = np.asarray(base, dtype=np.float64)
+    n1, n2 = x.size, y.size
+    if n1 == 0 or n2 == 0:
+        return 1.0
+    both = np.concatenate([x, y])
+    u = _rankdata(both)[:n1].sum() - n1 * (n1 + 1) / 2.0
+    n = n1 + n2
+    _vals, counts = np.unique(both, return_counts=True)
+    ties = float((counts**3 - counts).sum())
+    var = n1 * n2 / 12.0 * ((n + 1) - ties / (n * (n - 1)))
+    if var <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2.0 - 0.5) / math.sqrt(var)
+    return 0.5 * math.erfc(z / math.sqrt(2.0))
+
+
+def mann_whitney_exact_greater(new, base, max_splits: int = 200_000) -> float:
+    """mann_whitney_greater by enumerating every split of the pooled ranks (small
+    groups, where the normal approximation is off); falls back to it above
+    ``max_splits`` splits."""
+    x = np.asarray(new, dtype=np.float64)
+    y = np.asarray(base, dtype=np.float64)
+    n1, n = x.size, x.size + y.size
+    if n1 == 0 or y.size == 0:
+        return 1.0
+    if math.comb(n, n1) > max_splits:
+        return mann_whitney_greater(x, y)
+    ranks = _rankdata(np.concatenate([x, y]))
+    observed = ranks[:n1].sum()
+    hits = total = 0
+    for idx in itertools.combinations(range(n), n1):
+        total += 1
+        hits += ranks[list(idx)].sum() >= observed - 1e-9
+    return hits / total
+
+
+def _series(run: dict[str, Any]) -> dict[tuple, tuple[str, float]]:
+    """(stage key) -> (label, median latency in ms) of a run."""
+    out = {}
+    for row in run.get("results", []):
+        if row.get("error"):
+            continue
+        if run.get("kind") == "sim":
+            key = ("sim", int(row["charts"]))
+            label = f"sim {row['charts']} charts tick->output"
+            median = float(row.get("p50_ms", 0.0))
+        else:
+            key = (row.get("channel"), row.get("plugin"), row.get("params"), row.get("scenario"), row.get("size"))
+            label = f"{row.get('channel')} {row.get('scenario')} {row.get('size')}"
+            median = float(row.get("p50_ms", 0.0))
+        samples = [float(v) for v in row.get("samples_ms") or []]
+        out[key] = (label, float(np.median(samples)) if samples else median)
+    return out
+
+
+def _run_medians(runs: list[dict[str, Any]]) -> dict[tuple, tuple[str, list[float]]]:
+    """(stage key) -> (label, one median per run holding the stage)."""
+    out: dict[tuple, tuple[str, list[float]]] = {}
+    for run in runs:
+        for key, (label, median) in _series(run).items():
+            out.setdefault(key, (label, []))[1].append(median)
+    return out
+
+
+def compare(
+    base: list[dict[str, Any]],
+    new: list[dict[str, Any]],
+    alpha: float = 0.01,
+    threshold_pct: float = 5.0,
+    min_runs: int = MIN_RUNS,
+) -> list[dict]:
+    """One entry per stage present in both groups of runs, with ``status``
+    slower/faster/same, or few_runs when a side has fewer than ``min_runs`` runs."""
+    old, cur = _run_medians(base), _run_medians(new)
+    rows = []
+    for key in sorted(set(old) & set(cur), key=str):
+        label, xs = old[key]
+        _label, ys = cur[key]
+        m_old, m_new = float(np.median(xs)), float(np.median(ys))
+        change = (m_new / m_old - 1.0) * 100.0 if m_old > 0 else 0.0
+        p = mann_whitney_exact_greater(ys, xs) if change >= 0 else mann_whitney_exact_greater(xs, ys)
+        if min(len(xs), len(ys)) < min_runs:
+            status = "few_runs"
+        elif change > threshold_pct and p < alpha:
+            status = "slower"
+        elif change < -threshold_pct and p < alpha:
+            status = "faster"
+        else:
+            status = "same"
+        rows.append({
+            "stage": label,
+            "base_ms": round(m_old, 4),
+            "new_ms": round(m_new, 4),
+            "base_runs": len(xs),
+            "new_runs": len(ys),
+            "change_pct": round(change, 1),
+            "p_value": round(float(p), 5),
+            "status": status,
+        })
+    return rows
+
+
+def _revision(run: dict) -> tuple[str, bool]:
+    git = run.get("git") or {}
+    return git.get("rev") or "", bool(git.get("dirty"))
+
+
+def _select(runs: list[dict], refs: str) -> list[dict]:
+    """Runs selected by comma-separated refs (see the module docstring)."""
+    out: list[dict] = []
+    for ref in refs.split(","):
+        ref = ref.strip()
+        try:
+            hits = [runs[int(ref)]]
+        except (ValueError, IndexError):
+            hits = [r for r in runs if r["id"].startswith(ref)]
+            if len(hits) != 1:
+                hits = [r for r in runs if _revision(r)[0].startswith(ref)] or hits
+        if not hits:
+            raise SystemExit(f"no run matches {ref!r}")
+        out += [r for r in hits if r not in out]
+    return out
+
+
+def _like(runs: list[dict], ref: dict) -> list[dict]:
+    """Runs of the same kind as ``ref``, on its machine when there are any."""
+    kind = [r for r in runs if r.get("kind") == ref.get("kind")]
+    same = [r for r in kind if r["machine"]["fingerprint"] == ref["machine"]["fingerprint"]]
+    return same or kind
+
+
+def _default_new(runs: list[dict]) -> list[dict]:
+    last = runs[-1]
+    return [r for r in _like(runs, last) if _revision(r) == _revision(last)]
+
+
+def _default_base(runs: list[dict], new: list[dict]) -> list[dict]:
+    """Every run of the newest revision before ``new``'s first run."""
+    revisions = {_revision(r) for r in new}
+    earlier = [r for r in _like(runs[: runs.index(new[0])], new[-1]) if _revision(r) not in revisions]
+    if not earlier:
+        raise SystemExit("no earlier revision of the same kind to compare with")
+    return [r for r in earlier if _revision(r) == _revision(earlier[-1])]
+
+
+def _describe(run: dict) -> str:
+    git = run.get("git") or {}
+    rev = (git.get("rev") or "nogit")[:10] + ("+dirty" if git.get("dirty") else "")
+    return f"{run['id']} {run['kind']} rev={rev} machine={run['machine']['fingerprint']} {run.get('label') or ''}".rstrip()
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(prog="pyshared_hub results", description="Recorded bench/sim runs.")
+    ap.add_argument("--store", type=Path, help="results file (default perf/results.json or PYSHARED_RESULTS)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    add = sub.add_parser("add", help="record bench/sim JSON outputs")
+    add.add_argument("files", nargs="+", type=Path)
+    add.add_argument("--label")
+    sub.add_parser("list", help="list recorded runs")
+    cmp_ = sub.add_parser("compare", help="flag significant slowdowns between two runs")
+    cmp_.add_argument("base", nargs="?")
+    cmp_.add_argument("new", nargs="?")
+    cmp_.add_argument("--alpha", type=float, default=0.01, help="significance level (default 0.01)")
+    cmp_.add_argument("--threshold", type=float, default=5.0, help="minimum median change in %% (default 5)")
+    cmp_.add_argument(
+        "--min-runs", type=int, default=MIN_RUNS, help=f"runs per side needed to flag a stage (default {MIN_RUNS})"
+    )
+    cmp_.add_argument("--json", action="store_true", help="print the comparison as JSON")
+    return ap.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    path = args.store or default_store()
+    if args.cmd == "add":
+        for file in args.files:
+            run = record(json.loads(file.read_text(encoding="utf-8")), path, args.label)
+            print(f"recorded {_describe(run)} -> {path}")
+        return 0
+    runs = load_store(path)["runs"]
+    if args.cmd == "list":
+        for i, run in enumerate(runs):
+            print(f"{i - len(runs):>4} {_describe(run)}")
+        return 0
+    if not runs:
+        raise SystemExit(f"{path}: no runs recorded")
+    new = _select(runs, args.new) if args.new else _default_new(runs)
+    base = _select(runs, args.base) if args.base else _default_base(runs, new)
+    rows = compare(base, new, args.alpha, args.threshold, args.min_runs)
+    if args.json:
+        print(json.dumps({"base": [r["id"] for r in base], "new": [r["id"] for r in new], "stages": rows}, indent=2))
+    else:
+        for name, group in (("base", base), ("new ", new)):
+            for run in group:
+                print(f"{name} {_describe(run)}")
+        if len({r["machine"]["fingerprint"] for r in base + new}) > 1:
+            print("warning: runs are from different machines")
+        for row in rows:
+            print(
+                f"{row['status']:>8}  {row['change_pct']:+7.1f}%  p={row['p_value']:<7.4f} "
+                f"{row['base_ms']:>10.4f} -> {row['new_ms']:<10.4f} ms  "
+                f"({row['base_runs']} vs {row['new_runs']} runs)  {row['stage']}"
+            )
+        if any(row["status"] == "few_runs" for row in rows):
+            print(f"few_runs: record at least {args.min_runs} runs of each revision to test a stage")
+    return 1 if any(row["status"] == "slower" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+"""Load simulator: many emulated MT5 indicators against in-process hub channels.
+
+``python -m pyshared_hub sim --charts 1,4,16,64 --tick-hz 4 --seconds 10``
+
+Each chart is a channel of hub_config.CHANNELS (round robin over ``--channel``)
+run by a ChannelWorker over an in-memory transport (MemoryBus) instead of the DLL,
+talking to an emulated PyPlotMT_*.mq5 indicator that speaks the same protocol: a
+FULL (100) with the history, optional META (900) after it, UPDATE (101) ticks
+stamped with the bar time, bar rollovers and FULL re-send storms; it consumes the
+201/202/990 answers.
+
+For each chart count it reports tick-to-output latency (from the oldest tick not
+answered yet to the 202 that answers it), FULL latency, ticks coalesced by the hub
+and packets dropped by full queues, to show where one hub saturates.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import platform
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+SIM_VERSION = 1
+BAR_TS_STEP = 60  # ts increment per bar (M1)
+TS0 = 1_700_000_000
+COLUMNS = (
+    "charts", "seconds", "offered_per_s", "ticks", "ticks_per_s", "updates_out", "coalesced", "tick_drops",
+    "full_drops", "out_drops", "fulls", "p50_ms", "p99_ms", "max_ms", "full_p50_ms", "full_p99_ms", "saturated",
+)
+_EMPTY = np.empty(0, dtype=np.float64)
+MAX_SAMPLES = 2000  # tick latencies kept per row for hub_results compare
+
+
+class _Fifo:
+    """One stream of a channel: a FIFO bounded in bytes and packet size, like the DLL's.
+    A write that does not fit is refused (returns 0) and counted as dropped."""
+
+    def __init__(self, capacity_bytes: int, max_doubles: int):
+        self.capacity_bytes = int(capacity_bytes)
+        self.max_doubles = int(max_doubles)
+        self.dropped = 0
+        self._packets: deque[tuple[int, np.ndarray, int]] = deque()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def write(self, sid: int, data, ts: int) -> int:
+        arr = np.array(data, dtype=np.float64).ravel()  # copied, as the DLL does
+        if arr.size == 0:
+            return 0
+        with self._lock:
+            if arr.size > self.max_doubles or self._bytes + arr.nbytes > self.capacity_bytes:
+                self.dropped += 1
+                return 0
+            self._packets.append((int(sid), arr, int(ts)))
+            self._bytes += arr.nbytes
+        return int(arr.size)
+
+    def read(self) -> tuple[int, np.ndarray, int]:
+        with self._lock:
+            if not self._packets:
+                return 0, _EMPTY, 0
+            sid, arr, ts = self._packets.popleft()
+            self._bytes -= arr.nbytes
+        return sid, arr, ts
+
+
+class MemoryBus:
+    """In-memory stand-in for the DLL shared memory: channels by name, each with
+    stream 0 (indicator -> hub) and stream 1 (hub -> indicator)."""
+
+    def __init__(self, capacity_bytes: int = 8 * 1024 * 1024, max_doubles: int = 1 << 20):
+        self.capacity_bytes = int(capacity_bytes)
+        self.max_doubles = int(max_doubles)
+        self._channels: dict[str, tuple[_Fifo, _Fifo]] = {}
+        self._lock = threading.Lock()
+
+    def streams(self, channel: str) -> tuple[_Fifo, _Fifo]:
+        with self._lock:
+            pair = self._channels.get(channel)
+            if pair is None:
+                pair = self._channels[channel] = (
+                    _Fifo(self.capacity_bytes, self.max_doubles),
+                    _Fifo(self.capacity_bytes, self.max_doubles),
+                )
+            return pair
+
+    def bridge(self, dll_path: str = "") -> "MemoryBridge":
+        """Bridge factory for ChannelWorker(bridge_factory=bus.bridge)."""
+        return MemoryBridge(self)
+
+
+class MemoryBridge:
+    """Hub side of a MemoryBus channel, with PySharedBridge's interface."""
+
+    def __init__(self, bus: MemoryBus):
+        self.bus = bus
+        self.max_doubles = bus.max_doubles
+        self._streams: tuple[_Fifo, _Fifo] | None = None
+
+    def connect(self, channel: str, capacity_bytes: int) -> None:
+        self._streams = self.bus.streams(channel)
+
+    def close(self) -> None:
+        self._streams = None
+
+    def read_next_view(self, stream: int) -> tuple[int, np.ndarray, int]:
+        return self._streams[stream].read()
+
+    def read_next(self, stream: int) -> tuple[int, np.ndarray, int]:
+        sid, data, ts = self.read_next_view(stream)
+        return sid, data.copy(), ts
+
+    def write(self, stream: int, series_id: int, data: np.ndarray, ts: int = 0) -> int:
+        return self._streams[stream].write(series_id, data, ts)
+
+
+class ChartSim:
+    """One emulated indicator: sends history and ticks, records the hub's answers."""
+
+    def __init__(self, streams: tuple[_Fifo, _Fifo], bars: int, tick_hz: float, bar_seconds: float,
+                 meta: np.ndarray | None, rng: np.random.Generator, now: float):
+        self.tx, self.rx = streams
+        self.rng = rng
+        self.tick_hz = float(tick_hz)
+        self.bar_seconds = float(bar_seconds)
+        self.meta = meta
+        self.history = list(100.0 * np.exp(np.cumsum(rng.normal(0.0, 1e-3, int(bars)))))
+        self.bar_ts = TS0 + (len(self.history) - 1) * BAR_TS_STEP
+        self.next_bar = now + self.bar_seconds
+        self.next_tick = now + rng.exponential(1.0 / self.tick_hz)
+        self.ticks = 0
+        self.tick_drops = 0
+        self.fulls = 0
+        self.full_drops = 0
+        self.updates_out = 0
+        self.acks = 0
+        self.latencies: list[float] = []
+        self.full_latencies: list[float] = []
+        self._oldest_unanswered: float | None = None
+        self._full_sent_at: float | None = None
+
+    def send_full(self, now: float) -> None:
+        series = np.asarray(self.history[::-1], dtype=np.float64)  # newest first, as CopyClose
+        if self.tx.write(100, series, self.bar_ts) <= 0:
+            self.full_drops += 1
+            return
+        self.fulls += 1
+        if self._full_sent_at is None:
+            self._full_sent_at = now
+        self._oldest_unanswered = None  # a FULL supersedes the pending ticks
+        if self.meta is not None:
+            self.tx.write(900, self.meta, self.bar_ts)
+
+    def tick(self, now: float) -> None:
+        if now >= self.next_bar:
+            self.next_bar += self.bar_seconds
+            self.bar_ts += BAR_TS_STEP
+            self.history.append(self.history[-1])
+        self.history[-1] *= float(np.exp(self.rng.normal(0.0, 1e-4)))
+        if self.tx.write(101, (self.history[-1],), self.bar_ts) <= 0:
+            self.tick_drops += 1
+        else:
+            self.ticks += 1
+            if self._oldest_unanswered is None:
+                self._oldest_unanswered = now
+        self.next_tick = now + self.rng.exponential(1.0 / self.tick_hz)
+
+    def poll(self, now: float) -> None:
+        while True:
+            sid, _data, _ts = self.rx.read()
+            if sid == 0:
+                return
+            if sid == 201:
+                if self._full_sent_at is not None:
+                    self.full_latencies.append(now - self._full_sent_at)
+                    self._full_sent_at = None
+            elif sid == 202:
+                self.updates_out += 1
+                if self._oldest_unanswered is not None:
+                    self.latencies.append(now - self._oldest_unanswered)
+                    self._oldest_unanswered = None
+            elif sid == 990:
+                self.acks += 1
+
+
+def _ms(values: list[float], q: float) -> float:
+    return round(float(np.percentile(values, q)) * 1000.0, 3) if values else 0.0
+
+
+def simulate(items: list[dict], charts: int, opts: dict) -> dict:
+    """Run ``charts`` emulated indicators for opts["seconds"]; one result row."""
+    import hub_cache
+    import pyshared_hub as hub
+
+    raw = []
+    for i in range(charts):
+        item = dict(items[i % len(items)], checkpoint=False, hot_reload=False)
+        item["name"] = f"{item['name']}_{i}"
+        item.pop("disabled", None)
+        item.pop("inputs", None)
+        raw.append(item)
+    bus = MemoryBus(opts["capacity_bytes"])
+    context = {"send_bars": None, "derived": hub_cache.DERIVED}
+    workers = [
+        hub.ChannelWorker(cfg, "", bus.capacity_bytes, context, bridge_factory=bus.bridge)
+        for cfg in hub.build_channels(raw)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.ready.wait(timeout=120.0)
+
+    rng = np.random.default_rng(opts["seed"])
+    now = time.perf_counter()
+    sims = [
+        ChartSim(bus.streams(w.cfg.name), opts["bars"], opts["tick_hz"], opts["bar_seconds"], opts["meta"], rng, now)
+        for w in workers
+    ]
+    for sim in sims:
+        sim.send_full(now)
+    end = now + opts["seconds"]
+    next_storm = now + opts["storm_every"] if opts["storm_every"] > 0 else float("inf")
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            break
+        if now >= next_storm:
+            next_storm += opts["storm_every"]
+            for sim in sims:
+                sim.send_full(now)
+        for sim in sims:
+            if now >= sim.next_tick:
+                sim.tick(now)
+            sim.poll(now)
+        time.sleep(0.0002)
+    # answers to what was sent before the end
+    grace = time.perf_counter() + opts["grace"]
+    while time.perf_counter() < grace:
+        now = time.perf_counter()
+        for sim in sims:
+            sim.poll(now)
+        time.sleep(0.001)
+    for w in workers:
+        w.stop()
+    for w in workers:
+        w.join(timeout=5.0)
+
+    ticks = sum(s.ticks for s in sims)
+    updates_out = sum(s.updates_out for s in sims)
+    lat = [x for s in sims for x in s.latencies]
+    full_lat = [x for s in sims for x in s.full_latencies]
+    p99 = _ms(lat, 99)
+    drops = sum(s.tick_drops + s.full_drops for s in sims)
+    out_drops = sum(bus.streams(w.cfg.name)[1].dropped for w in workers)
+    return {
+        "charts": charts,
+        "seconds": opts["seconds"],
+        # the emulator shares the process (and the GIL) with the hub: below the
+        # offered rate when the hub starves it
+        "offered_per_s": round(charts * opts["tick_hz"], 1),
+        "ticks": ticks,
+        "ticks_per_s": round(ticks / opts["seconds"], 1),
+        "updates_out": updates_out,
+        "coalesced": max(0, ticks - updates_out),
+        "tick_drops": sum(s.tick_drops for s in sims),
+        "full_drops": sum(s.full_drops for s in sims),
+        "out_drops": out_drops,
+        "fulls": sum(s.fulls for s in sims),
+        "p50_ms": _ms(lat, 50),
+        "p99_ms": p99,
+        "max_ms": round(max(lat) * 1000.0, 3) if lat else 0.0,
+        "full_p50_ms": _ms(full_lat, 50),
+        "full_p99_ms": _ms(full_lat, 99),
+        "saturated": bool(p99 > opts["budget_ms"] or drops or out_drops),
+        "samples_ms": _samples(lat),
+    }
+
+
+def _samples(lat: list[float]) -> list[float]:
+    """Evenly spaced order statistics of the latencies (ms), at most MAX_SAMPLES."""
+    ms = np.sort(np.asarray(lat, dtype=np.float64)) * 1000.0
+    if ms.size > MAX_SAMPLES:
+        ms = ms[np.linspace(0, ms.size - 1, MAX_SAMPLES).round().astype(np.int64)]
+    return [round(float(v), 3) for v in ms]
+
+
+def _channel_items(names: list[str] | None) -> list[dict]:
+    import hub_config
+
+    items = [dict(item) for item in getattr(hub_config, "CHANNELS", []) if item.get("name") and item.get("plugin")]
+    if names:
+        wanted = {name.upper() for name in names}
+        items = [item for item in items if str(item["name"]).upper() in wanted]
+    else:
+        items = [item for item in items if not item.get("disabled")]
+    return items
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(prog="pyshared_hub sim", description="Emulate many MT5 indicators against the hub.")
+    ap.add_argument("--channel", action="append", help="hub_config channel to emulate (repeatable; default all enabled)")
+    ap.add_argument("--charts", default="1,4,16", help="chart counts to run, one after the other (comma separated)")
+    ap.add_argument("--seconds", type=float, default=10.0, help="duration of each run")
+    ap.add_argument("--tick-hz", type=float, default=4.0, help="mean ticks per second per chart (Poisson)")
+    ap.add_argument("--bar-seconds", type=float, default=5.0, help="wall seconds per bar (rollover period)")
+    ap.add_argument("--bars", type=int, default=5000, help="history bars in each FULL")
+    ap.add_argument("--storm-every", type=float, default=0.0, help="every chart re-sends its FULL every N s (0: off)")
+    ap.add_argument("--meta", help="META values sent after each FULL (comma separated)")
+    ap.add_argument("--budget-ms", type=float, default=100.0, help="p99 tick latency above which a run is saturated")
+    ap.add_argument("--capacity-mb", type=float, default=8.0, help="queue capacity per stream")
+    ap.add_argument("--grace", type=float, default=1.0, help="seconds to collect answers after each run")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--numpy-only", action="store_true", help="run without CuPy")
+    ap.add_argument("--format", choices=("json", "csv"), default="json")
+    ap.add_argument("--out", type=Path, help="output file (default stdout)")
+    ap.add_argument("--store", nargs="?", const="", metavar="PATH", help="also record the run in the results store")
+    ap.add_argument("--label", help="label of the recorded run")
+    return ap.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> dict:
+    if args.numpy_only:
+        sys.modules["cupy"] = None  # "import cupy" raises ImportError
+    opts = {
+        "seconds": max(0.1, float(args.seconds)),
+        "tick_hz": max(1e-3, float(args.tick_hz)),
+        "bar_seconds": max(0.01, float(args.bar_seconds)),
+        "bars": max(2, int(args.bars)),
+        "storm_every": max(0.0, float(args.storm_every)),
+        "meta": np.array([float(x) for x in args.meta.split(",")]) if args.meta else None,
+        "budget_ms": float(args.budget_ms),
+        "capacity_bytes": int(float(args.capacity_mb) * 1024 * 1024),
+        "grace": max(0.0, float(args.grace)),
+        "seed": int(args.seed),
+    }
+    items = _channel_items(args.channel)
+    if not items:
+        raise SystemExit("no channel to simulate")
+    rows = []
+    for charts in sorted({int(c) for c in str(args.charts).split(",") if c.strip()}):
+        print(f"sim {charts} chart(s) x {opts['seconds']:g} s", file=sys.stderr, flush=True)
+        row = simulate(items, charts, opts)
+        print(
+            f"  p50={row['p50_ms']} ms p99={row['p99_ms']} ms coalesced={row['coalesced']}/{row['ticks']} "
+            f"drops={row['tick_drops'] + row['full_drops'] + row['out_drops']} saturated={row['saturated']}",
+            file=sys.stderr,
+            flush=True,
+        )
+        rows.append(row)
+    options = dict(opts, meta=args.meta, channels=[item["name"] for item in items], numpy_only=bool(args.numpy_only))
+    return {
+        "sim_version": SIM_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "options": options,
+        "results": rows,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    doc = run(args)
+    if args.store is not None:
+        import hub_results
+
+        stored = hub_results.record(doc, Path(args.store) if args.store else None, args.label)
+        print(f"recorded {stored['id']}", file=sys.stderr)
+    if args.format == "csv":
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=COLUMNS, extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(doc["results"])
+        text = buf.getvalue()
+    else:
+        text = json.dumps(doc, indent=2) + "\n"
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+    else:
+        sys.stdout.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Plugin state checkpoints (.npz) for warm restarts.
+
+A checkpoint holds what ``plugin.export_state()`` returned plus hub metadata: the
+tail of the chronological input the state was built from. On restart the first
+FULL is checked against that tail to find how many recent bars the state does not
+cover yet; only those are handed to ``plugin.resume_full``.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+TAIL_BARS = 32  # input values stored to validate a checkpoint against a FULL
+_META_KEY = "__meta__"
+
+
+def state_path(state_dir: Path, channel: str, plugin: str, version: str, params: dict) -> Path:
+    """Checkpoint file for this channel, plugin version and params."""
+    blob = json.dumps([plugin, version, params], sort_keys=True, default=str).encode("utf-8")
+    digest = hashlib.blake2b(blob, digest_size=8).hexdigest()
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", channel)
+    return state_dir / f"{safe}-{digest}.npz"
+
+
+def source_version(path: Path | None) -> str:
+    """Digest of a plugin source file, used when the plugin declares no state_version."""
+    if path is None:
+        return ""
+    try:
+        return hashlib.blake2b(path.read_bytes(), digest_size=8).hexdigest()
+    except OSError:
+        return ""
+
+
+def save_state(path: Path, state: dict[str, Any], meta: dict[str, Any]) -> None:
+    """Write ``state`` (arrays/scalars/None) and ``meta`` atomically as a compressed .npz."""
+    arrays: dict[str, np.ndarray] = {}
+    nones = []
+    for key, value in state.items():
+        if value is None:
+            nones.append(key)
+        else:
+            arrays[key] = np.asarray(value)
+    meta = dict(meta, none_keys=nones)
+    arrays[_META_KEY] = np.frombuffer(json.dumps(meta, default=str).encode("utf-8"), dtype=np.uint8)
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **arrays)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(buf.getvalue())
+    os.replace(tmp, path)
+
+
+def load_state(path: Path) -> tuple[dict[str, Any], dict[str, Any]] | None:
+    """(state, meta) from a checkpoint, or None if missing or unreadable."""
+    try:
+        with np.load(path, allow_pickle=False) as npz:
+            meta = json.loads(bytes(npz[_META_KEY]).decode("utf-8"))
+            state: dict[str, Any] = {}
+            for key in npz.files:
+                if key == _META_KEY:
+                    continue
+                arr = npz[key]
+                state[key] = arr.item() if arr.ndim == 0 else arr
+    except (OSError, ValueError, KeyError):
+        return None
+    for key in meta.get("none_keys", []):
+        state[key] = None
+    return state, meta
+
+
+def match_tail(chrono: np.ndarray, tail: np.ndarray) -> int | None:
+    """Bars at the end of ``chrono`` not covered by a state saved with input ``tail``.
+
+    The last value of ``tail`` is the bar that was forming at save time, so it is
+    not compared and counts as not covered. Returns None if the closed bars of
+    the tail are not found in ``chrono``.
+    """
+    closed = np.asarray(tail, dtype=np.float64)[:-1]
+    k = closed.size
+    n = chrono.size
+    if k == 0 or n <= k:
+        return None
+    # newest match first: fewest bars to process
+    for p in np.flatnonzero(chrono[k - 1 : n - 1] == closed[-1])[::-1] + k - 1:
+        if np.array_equal(chrono[p - k + 1 : p + 1], closed):
+            return int(n - (p + 1))
+    return None
+
+
+def match_overlap(chrono: np.ndarray, prev: np.ndarray) -> int | None:
+    """Like match_tail against a whole previous input ``prev``, but every closed bar
+    the two inputs share must be equal, not only the tail."""
+    new_bars = match_tail(chrono, prev[-TAIL_BARS:])
+    if new_bars is None:
+        return None
+    end = chrono.size - new_bars  # index of prev's forming bar in chrono
+    k = min(prev.size - 1, end)
+    if not np.array_equal(chrono[end - k : end], prev[prev.size - 1 - k : prev.size - 1]):
+        return None
+    return new_bars
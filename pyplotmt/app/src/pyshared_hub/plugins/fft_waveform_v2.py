@@ -1,15 +1,16 @@
 """FFT WaveForm v2 plugin (12-cycle output or summed wave).
 
-Input:
-  - FULL: price series (newest first)
-  - UPDATE: one or more newest bars (newest first)
+Input (chronological, oldest -> newest; the hub reverses and sanitizes):
+  - FULL: price history
+  - UPDATE: one or more newest bars
 
-Output:
+Output (chronological per buffer; the hub writes it in series order):
   - FULL: concatenated buffers (buf1||buf2||...||bufN) or single buffer when sum_cycles=True
   - UPDATE: one value per buffer (or single value when sum_cycles=True)
 """
 from __future__ import annotations
 
+import functools
 import logging
 import math
 from dataclasses import dataclass
@@ -17,6 +18,8 @@ from typing import List, Optional
 
 import numpy as np
 
+from plugins.history import HistoryBuffer
+
 
 @dataclass
 class WaveFormConfig:
@@ -34,24 +37,31 @@ class WaveFormConfig:
     max_cycles: int = 12
 
 
+@functools.lru_cache(maxsize=16)
 def _window(kind: int, n: int) -> np.ndarray:
+    """Taper of length n, built once per (kind, n) and returned read-only."""
     if n <= 0:
-        return np.ones(0, dtype=np.float64)
-    if kind == 1:
-        return np.hanning(n).astype(np.float64)
-    if kind == 2:
-        return np.hamming(n).astype(np.float64)
-    if kind == 3:
-        return np.blackman(n).astype(np.float64)
-    if kind == 4:
-        return np.bartlett(n).astype(np.float64)
-    return np.ones(n, dtype=np.float64)
-
-
-def _detrend(x: np.ndarray, trend_period: int) -> np.ndarray:
+        win = np.ones(0, dtype=np.float64)
+    elif kind == 1:
+        win = np.hanning(n).astype(np.float64)
+    elif kind == 2:
+        win = np.hamming(n).astype(np.float64)
+    elif kind == 3:
+        win = np.blackman(n).astype(np.float64)
+    elif kind == 4:
+        win = np.bartlett(n).astype(np.float64)
+    else:
+        win = np.ones(n, dtype=np.float64)
+    win.setflags(write=False)
+    return win
+
+
+def _detrend(x: np.ndarray, trend_period: int, derived=None) -> np.ndarray:
     if x.size <= 1:
         return x
     if trend_period and 1 < trend_period < x.size:
+        if derived is not None:
+            return x - derived.get("rolling_mean", x, window=int(trend_period))
         kernel = np.ones(int(trend_period), dtype=np.float64) / float(trend_period)
         trend = np.convolve(x, kernel, mode="same")
         return x - trend
@@ -59,6 +69,8 @@ def _detrend(x: np.ndarray, trend_period: int) -> np.ndarray:
 
 
 class Plugin:
+    chronological = True
+
     def __init__(self, params: dict | None = None, context: dict | None = None):
         params = params or {}
         context = context or {}
@@ -85,8 +97,10 @@ class Plugin:
         self.max_keep = params.get("max_keep")
         if self.max_keep is None:
             self.max_keep = context.get("send_bars")
+        # hub derived-series cache (shared trend); None when run standalone
+        self._derived = context.get("derived")
 
-        self.series: Optional[np.ndarray] = None
+        self.series: Optional[HistoryBuffer] = None
         self._dirty = True
 
         self._k = np.zeros(self.buffers, dtype=np.int32)
@@ -96,6 +110,17 @@ class Plugin:
         self._last_periods: List[float] = []
         self._last_nfft = 0
         self._last_t0 = 0
+        self._bars_ahead = 0
+
+    def warmup(self) -> None:
+        """Window and rfft at the configured fft_window, before the first FULL."""
+        n = int(self.cfg.fft_window)
+        if n >= 8:
+            np.fft.rfft(np.zeros(n) * _window(int(self.cfg.window_type), n))
+
+    @property
+    def output_buffers(self) -> int:
+        return 1 if self.cfg.sum_cycles else self.buffers
 
     def process_meta(self, meta: np.ndarray, ts: int) -> None:
         if meta is None or len(meta) < 2:
@@ -137,8 +162,8 @@ class Plugin:
             self.logger.info(
                 "RX FULL count=%d v0=%.6f vN=%.6f ts=%d",
                 int(len(series)),
-                float(series[0]),
                 float(series[-1]),
+                float(series[0]),
                 int(ts),
             )
         if out is not None and len(out) > 0:
@@ -151,9 +176,27 @@ class Plugin:
         return out
 
     def process_update(self, series: np.ndarray, ts: int) -> np.ndarray:
+        return self.process_bar(series, ts)
+
+    def process_bar(self, series: np.ndarray, ts: int) -> np.ndarray:
+        return self._process_update(series, ts, replace_last=False)
+
+    def process_tick(self, series: np.ndarray, ts: int) -> np.ndarray:
+        return self._process_update(series, ts, replace_last=True)
+
+    def extrapolate(self, series: np.ndarray, ts: int, new_bar: bool) -> np.ndarray:
+        """Evaluate the cached cycles ahead of the history without ingesting or recomputing."""
+        if self.series is None or self._last_nfft <= 0:
+            return np.array([], dtype=np.float64)
+        if new_bar:
+            self._bars_ahead += 1
+        return self._render_update(self._bars_ahead)
+
+    def _process_update(self, series: np.ndarray, ts: int, replace_last: bool) -> np.ndarray:
         if self.series is None:
             return np.array([], dtype=np.float64)
-        self._ingest_update(series)
+        self._bars_ahead = 0
+        self._ingest_update(series, replace_last)
         if self._dirty or self._last_nfft <= 0:
             self._compute_cycles()
         out = self._render_update()
@@ -161,8 +204,8 @@ class Plugin:
             self.logger.info(
                 "RX UPDATE count=%d v0=%.6f vN=%.6f ts=%d",
                 int(len(series)),
-                float(series[0]),
                 float(series[-1]),
+                float(series[0]),
                 int(ts),
             )
         if out is not None and len(out) > 0:
@@ -178,34 +221,51 @@ class Plugin:
     # ---------------------------
 
     def _ingest_full(self, series: np.ndarray) -> None:
+        self._bars_ahead = 0
         s = np.asarray(series, dtype=np.float64)
-        s = np.nan_to_num(s, nan=0.0, posinf=0.0, neginf=0.0)
-        s = s[::-1]  # chronological (oldest -> newest)
 
         max_bars = self.cfg.max_bars if self.cfg.max_bars > 0 else None
         if max_bars and s.size > max_bars:
             s = s[-max_bars:]
 
-        self.series = s.copy()
+        self.series = HistoryBuffer.from_array(s)
         self._dirty = True
 
-    def _ingest_update(self, series: np.ndarray) -> None:
+    def _ingest_update(self, series: np.ndarray, replace_last: bool = False) -> None:
         upd = np.asarray(series, dtype=np.float64)
-        upd = np.nan_to_num(upd, nan=0.0, posinf=0.0, neginf=0.0)
-        upd = upd[::-1]  # chronological
 
         if upd.size == 0:
             return
 
-        self.series = np.concatenate([self.series, upd])  # type: ignore[arg-type]
+        if replace_last and self.series is not None and len(self.series) > 0:
+            # same bar: overwrite the forming bar(s), history length is unchanged
+            k = min(int(upd.size), len(self.series))
+            self.series.set_last(upd[-k:])
+            return
 
         max_bars = self.cfg.max_bars if self.cfg.max_bars > 0 else None
-        max_keep = max_bars or (self.max_keep if self.max_keep else None)
-        if max_keep and self.series.size > max_keep:
-            overflow = int(self.series.size - max_keep)
-            self.series = self.series[overflow:]
+        max_keep = int(max_bars or (self.max_keep if self.max_keep else 0)) or None
+        overflow = max_keep is not None and len(self.series) + upd.size > max_keep
+        if self.series.maxlen != max_keep:
+            # first update after a FULL, or max_bars changed by META
+            self.series = HistoryBuffer.from_array(self.series.last(), max_keep)
+        self.series.extend(upd)
+        if overflow:
             self._dirty = True
 
+    def memory_usage(self) -> int:
+        """Bytes held by the series and the cycle arrays (hub memory accounting)."""
+        arrays = (self.series, self._k, self._amp, self._phase, self._active)
+        return sum(int(a.nbytes) for a in arrays if a is not None)
+
+    def trim(self, max_bars: int) -> None:
+        """Keep the newest ``max_bars`` bars (at least one FFT window): hub history budget."""
+        keep = max(int(max_bars), int(self.cfg.fft_window), 8)
+        if self.series is None or len(self.series) <= keep:
+            return
+        self.series.keep_last(keep)
+        self._dirty = True
+
     def _effective_cycles(self) -> int:
         max_cycles = int(self.cfg.max_cycles)
         if max_cycles <= 0:
@@ -268,8 +328,8 @@ class Plugin:
 
         n_fft = int(self.cfg.fft_window) if self.cfg.fft_window > 0 else n_total
         n_fft = max(8, min(n_fft, n_total))
-        x = self.series[-n_fft:]
-        x = _detrend(x, self.cfg.trend_period)
+        x = self.series.last(n_fft)
+        x = _detrend(x, self.cfg.trend_period, self._derived)
 
         win = _window(int(self.cfg.window_type), n_fft)
         if win.size == n_fft:
@@ -326,25 +386,22 @@ class Plugin:
                 if not self._active[i]:
                     continue
                 acc += self._amp[i] * np.cos(freq_base * self._k[i] * (t - t0) + self._phase[i])
-            return acc[::-1].astype(np.float64)
+            return acc
 
-        buffers: List[np.ndarray] = []
+        out = np.zeros((self.buffers, n_total), dtype=np.float64)
         for i in range(self.buffers):
             if self._active[i]:
-                wave = self._amp[i] * np.cos(freq_base * self._k[i] * (t - t0) + self._phase[i])
-            else:
-                wave = np.zeros(n_total, dtype=np.float64)
-            buffers.append(wave[::-1])
-        return np.concatenate(buffers).astype(np.float64)
+                out[i] = self._amp[i] * np.cos(freq_base * self._k[i] * (t - t0) + self._phase[i])
+        return out.ravel()
 
-    def _render_update(self) -> np.ndarray:
+    def _render_update(self, bars_ahead: int = 0) -> np.ndarray:
         if self.series is None or self.series.size <= 0:
             return np.array([], dtype=np.float64)
         n_total = int(self.series.size)
         if self._last_nfft <= 0:
             return np.array([], dtype=np.float64)
 
-        t = float(n_total - 1)
+        t = float(n_total - 1 + bars_ahead)
         t0 = float(self._last_t0)
         freq_base = 2.0 * math.pi / float(self._last_nfft)
 
@@ -361,4 +418,4 @@ class Plugin:
             if not self._active[i]:
                 continue
             out[i] = self._amp[i] * np.cos(freq_base * self._k[i] * (t - t0) + self._phase[i])
-        return out.astype(np.float64)
+        return out
@@ -7,6 +7,8 @@ from typing import Optional
 
 import numpy as np
 
+from plugins.history import HistoryBuffer
+
 
 @dataclass
 class FisherConfig:
@@ -59,6 +61,40 @@ def compute_fisher_full(price: np.ndarray, period: int) -> tuple[np.ndarray, np.
     return fisher, value1
 
 
+def _fisher_step(price, max_p, min_p, prev_val):
+    """One recursion step for a column of symbols (arrays of equal shape)."""
+    rng = max_p - min_p
+    scaled = np.divide(price - min_p, rng, out=np.full_like(rng, 0.5), where=rng != 0)
+    v = np.where(rng != 0, 0.33 * 2.0 * (scaled - 0.5) + 0.67 * prev_val, 0.67 * prev_val)
+    v = np.clip(v, -0.999, 0.999)
+    return v, 0.5 * np.log((1.0 + v) / (1.0 - v))
+
+
+def compute_fisher_full_batch(price: np.ndarray, period: int) -> tuple[np.ndarray, np.ndarray]:
+    """compute_fisher_full for a (symbols, bars) array, vectorized across symbols."""
+    k, n = price.shape
+    fisher = np.zeros((k, n), dtype=np.float64)
+    value1 = np.zeros((k, n), dtype=np.float64)
+    if n == 0:
+        return fisher, value1
+    # rolling max/min over [i - period + 1, i], shorter at the start
+    w = max(1, int(period))
+    pad = ((0, 0), (w - 1, 0))
+    windows_hi = np.lib.stride_tricks.sliding_window_view(np.pad(price, pad, constant_values=-np.inf), w, axis=1)
+    windows_lo = np.lib.stride_tricks.sliding_window_view(np.pad(price, pad, constant_values=np.inf), w, axis=1)
+    max_p = windows_hi.max(axis=2)
+    min_p = windows_lo.min(axis=2)
+
+    prev_val = np.zeros(k, dtype=np.float64)
+    prev_f = np.zeros(k, dtype=np.float64)
+    for i in range(n):
+        v, f = _fisher_step(price[:, i], max_p[:, i], min_p[:, i], prev_val)
+        value1[:, i] = v
+        fisher[:, i] = f + 0.5 * prev_f if i > 0 else f
+        prev_val, prev_f = v, fisher[:, i]
+    return fisher, value1
+
+
 def compute_fisher_increment(
     price: np.ndarray,
     period: int,
@@ -86,6 +122,11 @@ def compute_fisher_increment(
 
 
 class Plugin:
+    # inputs/outputs are chronological (oldest -> newest); the hub handles orientation
+    chronological = True
+    # causal: a re-sent FULL sharing history is extended with resume_full
+    incremental = True
+
     def __init__(self, params: dict, context: dict):
         period = int(params.get("period", 260))
         applied = params.get("applied_price", "median")
@@ -93,47 +134,175 @@ class Plugin:
         if max_keep is None:
             max_keep = context.get("send_bars")
         self.cfg = FisherConfig(period=period, applied_price=applied, max_keep=max_keep)
-        self.price_hist: Optional[np.ndarray] = None
-        self.fisher_hist: Optional[np.ndarray] = None
-        self.value1_hist: Optional[np.ndarray] = None
+        self.price_hist: Optional[HistoryBuffer] = None
+        self.fisher_hist: Optional[HistoryBuffer] = None
+        self.value1_hist: Optional[HistoryBuffer] = None
+
+    def _reset(self, price: np.ndarray, fisher: np.ndarray, value1: np.ndarray) -> None:
+        self.price_hist = HistoryBuffer.from_array(price, self.cfg.max_keep)
+        self.fisher_hist = HistoryBuffer.from_array(fisher, self.cfg.max_keep)
+        self.value1_hist = HistoryBuffer.from_array(value1, self.cfg.max_keep)
 
     def process_full(self, series: np.ndarray, ts: int) -> np.ndarray:
-        prices = series[::-1].astype(np.float64)
-        self.price_hist = prices.copy()
-        self.fisher_hist, self.value1_hist = compute_fisher_full(prices, self.cfg.period)
-        out_series = self.fisher_hist[::-1]
-        return out_series.astype(np.float64)
+        price = np.asarray(series, dtype=np.float64)
+        fisher, value1 = compute_fisher_full(price, self.cfg.period)
+        self._reset(price, fisher, value1)
+        return fisher
 
     def process_update(self, series: np.ndarray, ts: int) -> np.ndarray:
+        return self.process_bar(series, ts)
+
+    def process_bar(self, series: np.ndarray, ts: int) -> np.ndarray:
+        """New bar(s): append to the history and extend the recursion."""
+        return self._apply_update(series, replace_last=False)
+
+    def process_tick(self, series: np.ndarray, ts: int) -> np.ndarray:
+        """Same-bar tick: overwrite the forming bar(s) and redo only their steps."""
+        return self._apply_update(series, replace_last=True)
+
+    def _apply_update(self, series: np.ndarray, replace_last: bool) -> np.ndarray:
         if self.price_hist is None:
             return np.array([], dtype=np.float64)
-        upd_prices = series[::-1].astype(np.float64)
+        upd_prices = np.asarray(series, dtype=np.float64)
+        k = len(upd_prices)
+        if k == 0:
+            return np.array([], dtype=np.float64)
 
-        start_idx = len(self.price_hist)
-        self.price_hist = np.concatenate([self.price_hist, upd_prices])
+        if replace_last:
+            k = min(k, len(self.price_hist))
+            self.price_hist.set_last(upd_prices[-k:])
+        else:
+            k = self._append(upd_prices)
+        return self._recompute(k)
 
-        if self.cfg.max_keep and self.price_hist.size > self.cfg.max_keep:
-            overflow = self.price_hist.size - self.cfg.max_keep
-            self.price_hist = self.price_hist[overflow:]
-            if self.fisher_hist is not None and self.value1_hist is not None:
-                self.fisher_hist = self.fisher_hist[overflow:]
-                self.value1_hist = self.value1_hist[overflow:]
-            start_idx = max(0, start_idx - overflow)
+    def _append(self, upd_prices: np.ndarray) -> int:
+        """Append new bars (the buffers drop what exceeds max_keep); bars to compute."""
+        self.price_hist.extend(upd_prices)
+        k = min(len(upd_prices), len(self.price_hist))
+        self.fisher_hist.extend(np.zeros(k))
+        self.value1_hist.extend(np.zeros(k))
+        return k
 
-        if self.fisher_hist is None or self.value1_hist is None:
-            self.fisher_hist, self.value1_hist = compute_fisher_full(self.price_hist, self.cfg.period)
-        else:
-            if len(self.fisher_hist) != len(self.price_hist):
-                self.fisher_hist = np.pad(self.fisher_hist, (0, len(self.price_hist) - len(self.fisher_hist)))
-                self.value1_hist = np.pad(self.value1_hist, (0, len(self.price_hist) - len(self.value1_hist)))
-            compute_fisher_increment(
-                self.price_hist,
-                self.cfg.period,
-                self.fisher_hist,
-                self.value1_hist,
-                start_idx,
-            )
+    def _recompute(self, k: int) -> np.ndarray:
+        """Redo the recursion of the newest ``k`` bars on a copy of the tail (their
+        windows and the step before them)."""
+        m = min(len(self.price_hist), k + self.cfg.period)
+        fisher = self.fisher_hist.last(m).copy()
+        value1 = self.value1_hist.last(m).copy()
+        compute_fisher_increment(self.price_hist.last(m), self.cfg.period, fisher, value1, m - k)
+        self.fisher_hist.set_last(fisher[m - k :])
+        self.value1_hist.set_last(value1[m - k :])
+        return self.fisher_hist.last(k)
 
-        k = len(upd_prices)
-        out_update = self.fisher_hist[-k:][::-1]
-        return out_update.astype(np.float64)
+    def memory_usage(self) -> int:
+        """Bytes held by the histories (hub memory accounting)."""
+        return sum(b.nbytes for b in (self.price_hist, self.fisher_hist, self.value1_hist) if b is not None)
+
+    def trim(self, max_bars: int) -> None:
+        """Keep the newest ``max_bars`` bars (at least one period): hub history budget."""
+        keep = max(int(max_bars), self.cfg.period + 1)
+        if self.price_hist is None or len(self.price_hist) <= keep:
+            return
+        for buf in (self.price_hist, self.fisher_hist, self.value1_hist):
+            buf.keep_last(keep)
+
+    @classmethod
+    def process_full_batch(cls, plugins: list["Plugin"], batch: np.ndarray, ts: np.ndarray) -> list[np.ndarray]:
+        """process_full for several channels (same params), one row of ``batch`` each."""
+        prices = np.array(batch, dtype=np.float64)
+        fisher, value1 = compute_fisher_full_batch(prices, plugins[0].cfg.period)
+        for i, plugin in enumerate(plugins):
+            plugin._reset(prices[i], fisher[i], value1[i])
+        return list(fisher)
+
+    @classmethod
+    def process_update_batch(
+        cls, plugins: list["Plugin"], batch: np.ndarray, ts: np.ndarray, new_bar: np.ndarray
+    ) -> list[np.ndarray]:
+        """One-value UPDATEs of several channels: the recursion step of every forming
+        bar in one vectorized step, then the per-channel history bookkeeping (no
+        history changes until the step succeeded: on error the hub falls back to
+        process_bar/process_tick per channel). None (declined) when some channel has
+        no history or the packets hold more than one value."""
+        period = plugins[0].cfg.period
+        if batch.shape[1] != 1 or any(p.price_hist is None or len(p.price_hist) == 0 for p in plugins):
+            return None
+        prices = np.asarray(batch[:, 0], dtype=np.float64)
+        new_bar = np.asarray(new_bar, dtype=bool)
+
+        # channels whose window is complete once this packet is in
+        full = []
+        for i, (plugin, nb) in enumerate(zip(plugins, new_bar)):
+            n = len(plugin.price_hist) + int(nb)
+            if plugin.price_hist.maxlen is not None:
+                n = min(n, plugin.price_hist.maxlen)
+            if n >= max(2, period):
+                full.append(i)
+        if full:
+            # the window ends with the new price: the period - 1 values before it
+            windows = np.stack([
+                np.append(
+                    plugins[i].price_hist.last(period - 1) if new_bar[i] else plugins[i].price_hist.last(period)[:-1],
+                    prices[i],
+                )
+                for i in full
+            ])
+            back = [-1 if new_bar[i] else -2 for i in full]
+            prev_val = np.array([plugins[i].value1_hist[b] for i, b in zip(full, back)])
+            prev_f = np.array([plugins[i].fisher_hist[b] for i, b in zip(full, back)])
+            v, f = _fisher_step(prices[full], windows.max(axis=1), windows.min(axis=1), prev_val)
+            f = f + 0.5 * prev_f
+
+        for plugin, price, nb in zip(plugins, prices, new_bar):
+            if nb:
+                plugin._append(price[None])
+            else:
+                plugin.price_hist.replace_last(price)
+        full_set = set(full)
+        for i, plugin in enumerate(plugins):
+            if i not in full_set:
+                # short history: the window is partial, use the scalar path
+                plugin._recompute(1)
+        for j, i in enumerate(full):
+            plugins[i].value1_hist.replace_last(v[j])
+            plugins[i].fisher_hist.replace_last(f[j])
+        return [p.fisher_hist.last(1) for p in plugins]
+
+    def export_state(self) -> dict:
+        """History handed to a hot-reloaded instance (see import_state)."""
+        return {
+            "period": self.cfg.period,
+            "price_hist": None if self.price_hist is None else self.price_hist.to_array(),
+            "fisher_hist": None if self.fisher_hist is None else self.fisher_hist.to_array(),
+            "value1_hist": None if self.value1_hist is None else self.value1_hist.to_array(),
+        }
+
+    def import_state(self, state: dict) -> None:
+        if int(state["period"]) != self.cfg.period:
+            raise ValueError("period changed")
+        if any(state[key] is None for key in ("price_hist", "fisher_hist", "value1_hist")):
+            self.price_hist = self.fisher_hist = self.value1_hist = None
+            return
+        self._reset(state["price_hist"], state["fisher_hist"], state["value1_hist"])
+
+    def resume_full(self, series: np.ndarray, ts: int, new_bars: int) -> np.ndarray:
+        """The current (or imported) state covers ``series`` except its last
+        ``new_bars`` bars (the first of them is the state's forming bar, redone as a
+        tick): extend only those and return the spliced output. Falls back to
+        process_full when the state is too short."""
+        prices = np.asarray(series, dtype=np.float64)
+        covered = prices.size - int(new_bars) + 1
+        if (
+            self.price_hist is None
+            or self.fisher_hist is None
+            or self.value1_hist is None
+            or covered < 1
+            or len(self.price_hist) < covered
+        ):
+            return self.process_full(series, ts)
+        for buf in (self.price_hist, self.fisher_hist, self.value1_hist):
+            buf.keep_last(covered)
+        self._apply_update(prices[covered - 1 : covered], replace_last=True)
+        if covered < prices.size:
+            self._apply_update(prices[covered:], replace_last=False)
+        return self.fisher_hist.last()
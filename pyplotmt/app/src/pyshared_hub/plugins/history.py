@@ -0,0 +1,214 @@
+"""Plugin history buffer: O(1) append and replace-last, zero-copy tail views.
+
+A plugin keeps its history (prices, outputs) oldest -> newest: a new bar appends a
+value, a same-bar tick replaces the last one. In a plain array every new bar copies
+the whole history (np.append, np.concatenate). HistoryBuffer keeps the values in a
+ring of ``capacity`` slots stored twice in a row (doubled buffer), so the newest k
+values are always one contiguous slice: ``last(k)`` is a view, usable by any
+NumPy/CuPy function without a copy.
+
+- ``maxlen`` bounds the history: past it an append drops the oldest value;
+- below ``maxlen`` (or without it) a full ring doubles its capacity.
+
+Views are valid until the next write: write through append, extend, replace_last
+and set_last, and copy a view that must outlive the next update. NumPy views are
+read-only (an in-place write raises). ``xp=cupy`` keeps the history on the GPU;
+CuPy has no read-only arrays, so callers must never write to those views.
+
+``python -m plugins.history`` checks the buffer against plain NumPy arrays on
+random operations.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import numpy as np
+
+MIN_CAPACITY = 64
+
+
+def _headroom(n: int) -> int:
+    return max(MIN_CAPACITY, n + n // 4)
+
+
+class HistoryBuffer:
+    """Oldest -> newest values with O(1) append/replace-last and contiguous tails."""
+
+    __slots__ = ("xp", "dtype", "maxlen", "_cap", "_data", "_end", "_size")
+
+    def __init__(
+        self, capacity: int = MIN_CAPACITY, maxlen: Optional[int] = None, dtype: Any = np.float64, xp: Any = np
+    ):
+        self.xp = xp
+        self.dtype = dtype
+        self.maxlen = int(maxlen) if maxlen else None
+        cap = max(1, int(capacity))
+        self._cap = min(cap, self.maxlen) if self.maxlen else cap
+        self._data = xp.zeros(2 * self._cap, dtype=dtype)
+        self._end = 0  # slot of the next append, in [0, capacity)
+        self._size = 0
+
+    @classmethod
+    def from_array(
+        cls, values: Any, maxlen: Optional[int] = None, dtype: Any = np.float64, xp: Any = np
+    ) -> "HistoryBuffer":
+        """Buffer holding ``values`` (oldest first); only the newest ``maxlen`` when bounded."""
+        values = xp.asarray(values, dtype=dtype).reshape(-1)
+        buf = cls(_headroom(int(values.shape[0])), maxlen, dtype, xp)
+        buf.extend(values)
+        return buf
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return self._cap
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._data.nbytes)
+
+    def last(self, k: Optional[int] = None):
+        """The newest ``k`` values (all when None, fewer when the history is shorter):
+        a contiguous view, oldest first (read-only with NumPy)."""
+        n = self._size if k is None else max(0, min(int(k), self._size))
+        stop = self._end + self._cap
+        view = self._data[stop - n : stop]
+        if self.xp is np:
+            view.flags.writeable = False
+        return view
+
+    def __getitem__(self, index):
+        return self.last()[index]
+
+    def to_array(self):
+        """A copy of the whole history."""
+        return self.last().copy()
+
+    def append(self, value) -> None:
+        if self._size == self._cap and self._can_grow():
+            self._grow(self._size + 1)
+        end = self._end
+        self._data[end] = value
+        self._data[end + self._cap] = value
+        self._end = end + 1 if end + 1 < self._cap else 0
+        if self._size < self._cap:
+            self._size += 1
+
+    def extend(self, values) -> None:
+        values = self.xp.asarray(values, dtype=self.dtype).reshape(-1)
+        n = int(values.shape[0])
+        if n == 0:
+            return
+        if self.maxlen is not None and n > self.maxlen:
+            values, n = values[-self.maxlen :], self.maxlen
+        need = self._size + n
+        if need > self._cap and self._can_grow():
+            self._grow(need)
+        self._put(self._end, values)
+        self._end = (self._end + n) % self._cap
+        self._size = min(need, self._cap)
+
+    def replace_last(self, value) -> None:
+        """Overwrite the newest value (same-bar tick)."""
+        if self._size == 0:
+            raise IndexError("replace_last on an empty history")
+        pos = self._end - 1 if self._end else self._cap - 1
+        self._data[pos] = value
+        self._data[pos + self._cap] = value
+
+    def set_last(self, values) -> None:
+        """Overwrite the newest ``len(values)`` values."""
+        values = self.xp.asarray(values, dtype=self.dtype).reshape(-1)
+        n = int(values.shape[0])
+        if n > self._size:
+            raise IndexError(f"set_last of {n} values on a history of {self._size}")
+        if n:
+            self._put((self._end - n) % self._cap, values)
+
+    def keep_last(self, n: int) -> None:
+        """Drop all but the newest ``n`` values and release the spare slots."""
+        n = max(0, min(int(n), self._size))
+        tail = self.last(n)
+        cap = _headroom(n)
+        self._cap = min(cap, self.maxlen) if self.maxlen else cap
+        data = self.xp.zeros(2 * self._cap, dtype=self.dtype)
+        data[:n] = tail
+        data[self._cap : self._cap + n] = tail
+        self._data, self._size, self._end = data, n, n % self._cap
+
+    def _can_grow(self) -> bool:
+        return self.maxlen is None or self._cap < self.maxlen
+
+    def _grow(self, need: int) -> None:
+        cap = max(need, 2 * self._cap)
+        if self.maxlen is not None:
+            cap = min(cap, self.maxlen)
+        tail = self.last()
+        data = self.xp.zeros(2 * cap, dtype=self.dtype)
+        data[: self._size] = tail
+        data[cap : cap + self._size] = tail
+        self._data, self._cap, self._end = data, cap, self._size % cap
+
+    def _put(self, start: int, values) -> None:
+        """Write ``values`` at ring slots start, start + 1, ... (both copies)."""
+        cap, data = self._cap, self._data
+        n = int(values.shape[0])
+        first = min(n, cap - start)
+        data[start : start + first] = values[:first]
+        data[start + cap : start + cap + first] = values[:first]
+        if n > first:
+            rest = n - first
+            data[:rest] = values[first:]
+            data[cap : cap + rest] = values[first:]
+
+
+def check(steps: int = 20_000, seed: int = 0) -> None:
+    """Random appends, extends, replace/set-last, keep_last, maxlen drops and growth
+    against a plain array (np.append and slices); raises AssertionError on the first
+    mismatch."""
+    rng = np.random.default_rng(seed)
+    for maxlen in (None, 1, 7, 64, 300):
+        buf = HistoryBuffer(int(rng.integers(1, 80)), maxlen)
+        ref = np.zeros(0)
+        for step in range(steps // 5):
+            op = int(rng.integers(6))
+            if op == 0:
+                value = rng.standard_normal()
+                buf.append(value)
+                ref = np.append(ref, value)
+            elif op == 1:
+                values = rng.standard_normal(int(rng.integers(0, 200)))
+                buf.extend(values)
+                ref = np.append(ref, values)
+            elif op == 2 and ref.size:
+                value = rng.standard_normal()
+                buf.replace_last(value)
+                ref[-1] = value
+            elif op == 3 and ref.size:
+                values = rng.standard_normal(int(rng.integers(1, ref.size + 1)))
+                buf.set_last(values)
+                ref[ref.size - values.size :] = values
+            elif op == 4 and rng.random() < 0.2:
+                n = int(rng.integers(0, ref.size + 2))
+                buf.keep_last(n)
+                ref = ref[ref.size - min(n, ref.size) :]
+            if maxlen is not None:
+                ref = ref[-maxlen:]
+            k = int(rng.integers(0, ref.size + 2))
+            where = f"maxlen={maxlen} step={step} op={op}"
+            assert len(buf) == ref.size, where
+            assert maxlen is None or buf.capacity <= maxlen, where
+            assert np.array_equal(buf.last(), ref), where
+            assert np.array_equal(buf.last(k), ref[ref.size - min(k, ref.size) :]), where
+            assert not buf.last().flags.writeable, where
+
+
+if __name__ == "__main__":
+    check()
+    print("HistoryBuffer: ok")
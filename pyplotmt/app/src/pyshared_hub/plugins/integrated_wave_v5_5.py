@@ -32,6 +32,7 @@ from __future__ import annotations
 
 import argparse
 import ctypes as ct
+import functools
 import json
 import logging
 import math
@@ -42,7 +43,11 @@ from pathlib import Path
 from typing import Any, Literal, Optional, Sequence, Tuple, Union
 
 import numpy as np
-import scipy.signal as spsig  # used for get_window even when GPU backend is enabled
+
+try:
+    from plugins.history import HistoryBuffer
+except ImportError:  # run as a script from the plugins directory
+    from history import HistoryBuffer
 
 
 # ============================================================
@@ -66,6 +71,25 @@ def _get_backend(prefer: Literal["cupy", "numpy"] = "cupy"):
     return np, spsig, "numpy"
 
 
+def _spsig():
+    """scipy.signal, imported on first use (get_window/check_NOLA even on the GPU backend)."""
+    import scipy.signal as spsig  # type: ignore
+
+    return spsig
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_window(window: Any, n: int) -> np.ndarray:
+    win = _spsig().get_window(window, n, fftbins=True)
+    win.setflags(write=False)
+    return win
+
+
+def _get_window(window: Any, n: int) -> np.ndarray:
+    """scipy get_window, built once per (window, n) and returned read-only."""
+    return _cached_window(tuple(window) if isinstance(window, list) else window, int(n))
+
+
 def _to_cpu(x: Any) -> np.ndarray:
     try:
         import cupy as cp  # type: ignore
@@ -277,10 +301,17 @@ class EngineState:
     phi_end_cont: float = 0.0
     z_end_prev: complex = 0.0 + 0.0j
     last_bar_ts: int = 0
-    # price buffer in chronological order (oldest -> newest)
-    price_chrono: Optional[np.ndarray] = None
+    # price window in chronological order (oldest -> newest), as long as the last FULL
+    price_chrono: Optional[HistoryBuffer] = None
     # cached full output (series orientation) for no-repaint updates
     last_full_out_series: Optional[np.ndarray] = None
+    # last computed end point, used to phase-project skipped updates
+    last_out: Optional[float] = None
+    last_f0: float = 0.0
+    last_amp: float = 0.0
+    last_phi: float = 0.0
+    trend_slope: float = 0.0
+    bars_ahead: int = 0
 
 
 # ============================================================
@@ -306,7 +337,7 @@ def _coeff_to_amplitude(absC: float, cfg: EngineConfig) -> float:
     if cfg.scaling == "spectrum":
         return 2.0 * absC
     # psd -> approximate conversion
-    win_np = spsig.get_window(cfg.window, int(cfg.nperseg), fftbins=True)
+    win_np = _get_window(cfg.window, cfg.nperseg)
     sumw = float(win_np.sum())
     sumw2 = float((win_np**2).sum())
     return 2.0 * absC * math.sqrt(float(cfg.fs) * sumw2) / sumw
@@ -564,8 +595,12 @@ def compute_wave_pipeline(
     *,
     backend: Literal["cupy", "numpy"],
     state: EngineState,
+    log_price: Optional[np.ndarray] = None,
 ) -> Tuple[np.ndarray, float, float, float, float, float]:
-    """Returns (out_chrono, f0_end, period_end, phi_end, amp_end, conf_end)."""
+    """Returns (out_chrono, f0_end, period_end, phi_end, amp_end, conf_end).
+
+    ``log_price`` is log(price_chrono) when the caller already has it.
+    """
     xp, signal, _name = _get_backend(backend)
 
     price = xp.asarray(price_chrono, dtype=xp.float64)
@@ -574,7 +609,7 @@ def compute_wave_pipeline(
     if cfg.use_log_price:
         if bool(xp.any(price <= 0)):
             raise ValueError("Price must be > 0 for log")
-        x_raw = xp.log(price)
+        x_raw = xp.log(price) if log_price is None else xp.asarray(log_price, dtype=xp.float64)
     else:
         x_raw = price
 
@@ -585,6 +620,7 @@ def compute_wave_pipeline(
         x_proc = x_raw - xp.mean(x_raw)
         a = 0.0
         b = float(_to_cpu(xp.mean(x_raw)))
+    state.trend_slope = float(a)
 
     nperseg = int(cfg.nperseg)
     noverlap = int(cfg.noverlap)
@@ -598,7 +634,7 @@ def compute_wave_pipeline(
     # cupyx.scipy.signal may not expose check_NOLA in every build; fall back to scipy.
     check_nola = getattr(signal, "check_NOLA", None)
     if check_nola is None:
-        check_nola = spsig.check_NOLA
+        check_nola = _spsig().check_NOLA
     if not bool(check_nola(cfg.window, nperseg, noverlap)):
         raise ValueError("NOLA violated: adjust window/noverlap")
 
@@ -827,7 +863,7 @@ def compute_wave_pipeline(
         conf_end = float(_to_cpu(ridge_conf[m_last2]))
     else:
         seg = x_proc_ext[start:end]
-        win_np = spsig.get_window(cfg.window, nperseg, fftbins=True)
+        win_np = _get_window(cfg.window, nperseg)
         win = xp.asarray(win_np, dtype=xp.float64)
         X_end = xp.fft.rfft(seg * win, n=nfft)
         # scale like stft
@@ -927,50 +963,78 @@ class DominantWaveEngine:
 
     def on_full(self, price_series: np.ndarray, ts: int) -> np.ndarray:
         # series -> chrono
-        price_chrono = np.asarray(price_series[::-1], dtype=np.float64)
-        self.state.price_chrono = price_chrono
+        out_chrono = self.on_full_chrono(np.asarray(price_series[::-1], dtype=np.float64), ts)
+        out_series = out_chrono[::-1].copy()
+        self.state.last_full_out_series = out_series
+        return out_series
+
+    def on_full_chrono(
+        self, price_chrono: np.ndarray, ts: int, log_price: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        price_chrono = np.asarray(price_chrono, dtype=np.float64)
+        # own copy: the caller's buffer may be reused for the next FULL
+        self.state.price_chrono = HistoryBuffer.from_array(price_chrono, maxlen=max(1, price_chrono.size))
         self.state.last_bar_ts = int(ts)
 
         out_chrono, f0, per, phi, amp, conf = compute_wave_pipeline(
-            price_chrono, self.cfg, backend=self.backend, state=self.state
+            price_chrono, self.cfg, backend=self.backend, state=self.state, log_price=log_price
         )
-        out_series = out_chrono[::-1].copy()
-        self.state.last_full_out_series = out_series
+        self._remember_end(out_chrono, f0, phi, amp)
 
         self.logger.info(
             "FULL: f0=%.6f period=%.2f amp=%.6f conf=%.3f", f0, per, amp, conf
         )
-        return out_series
-
-    def on_update(self, price_series: np.ndarray, ts: int) -> np.ndarray:
-        if self.state.price_chrono is None or self.state.price_chrono.size == 0:
+        return out_chrono
+
+    def on_update(
+        self,
+        price_series: np.ndarray,
+        ts: int,
+        new_bar: Optional[bool] = None,
+        *,
+        chrono: bool = False,
+    ) -> np.ndarray:
+        """Apply one UPDATE: shift on a new bar, replace the last value on a same-bar tick.
+
+        ``new_bar`` is the hub's classification; when omitted it is inferred from ``ts``.
+        With ``chrono`` the input is oldest -> newest and the output is chronological too.
+        """
+        if self.state.price_chrono is None or len(self.state.price_chrono) == 0:
             # no buffer yet -> treat as full
+            if chrono:
+                return self.on_full_chrono(price_series, ts)
             return self.on_full(price_series, ts)
 
         x = np.asarray(price_series, dtype=np.float64)
         if x.size <= 0:
             return np.zeros((0,), dtype=np.float64)
 
-        new_price = float(x[0])  # series: most recent
+        new_price = float(x[-1] if chrono else x[0])  # most recent
         ts = int(ts)
         last_ts = int(self.state.last_bar_ts)
 
-        if ts != 0 and last_ts != 0 and ts != last_ts:
-            # new bar -> shift
-            buf = self.state.price_chrono
-            buf = np.concatenate([buf[1:], np.asarray([new_price], dtype=np.float64)])
-            self.state.price_chrono = buf
-            self.state.last_bar_ts = ts
+        if new_bar is None:
+            new_bar = ts != 0 and last_ts != 0 and ts != last_ts
+
+        if new_bar:
+            # new bar -> shift (the window is bounded: the oldest bar drops out)
+            self.state.price_chrono.append(new_price)
+            if ts != 0:
+                self.state.last_bar_ts = ts
         else:
             # same bar update -> replace last
-            self.state.price_chrono[-1] = new_price
+            self.state.price_chrono.replace_last(new_price)
 
         # Strategy: compute full wave but return only the last value (no repaint)
         out_chrono, f0, per, phi, amp, conf = compute_wave_pipeline(
-            self.state.price_chrono, self.cfg, backend=self.backend, state=self.state
+            self.state.price_chrono.last(), self.cfg, backend=self.backend, state=self.state
         )
+        self._remember_end(out_chrono, f0, phi, amp)
 
         if self.cfg.update_returns_full:
+            if chrono:
+                self.logger.info("UPDATE(full): f0=%.6f period=%.2f conf=%.3f", f0, per, conf)
+                return out_chrono
             out_series = out_chrono[::-1].copy()
             self.state.last_full_out_series = out_series
             self.logger.info("UPDATE(full): f0=%.6f period=%.2f conf=%.3f", f0, per, conf)
@@ -981,6 +1045,39 @@ class DominantWaveEngine:
         self.logger.info("UPDATE(1): f0=%.6f period=%.2f conf=%.3f", f0, per, conf)
         return np.asarray([last_val], dtype=np.float64)
 
+    def _remember_end(self, out_chrono: np.ndarray, f0: float, phi: float, amp: float) -> None:
+        st = self.state
+        st.last_out = float(out_chrono[-1]) if out_chrono.size else None
+        st.last_f0 = float(f0)
+        st.last_phi = float(phi)
+        st.last_amp = float(amp)
+        st.bars_ahead = 0
+
+    def extrapolate(self, new_bar: bool) -> Optional[np.ndarray]:
+        """Phase-project the last computed value instead of running the pipeline.
+
+        Used by the hub for updates its compute policy skips. The dominant cycle keeps
+        its last frequency/amplitude and the linear trend keeps its slope.
+        """
+        st = self.state
+        if st.last_out is None or self.cfg.update_returns_full:
+            return None
+        if new_bar:
+            st.bars_ahead += 1
+        k = st.bars_ahead
+        if k == 0:
+            return np.asarray([st.last_out], dtype=np.float64)
+
+        omega = 2.0 * math.pi * st.last_f0 / float(self.cfg.fs)
+        d = st.last_amp * (math.cos(st.last_phi + omega * k) - math.cos(st.last_phi))
+        if self.cfg.output_mode == "cycle":
+            val = st.last_out + d
+        elif self.cfg.use_log_price and st.last_out > 0:
+            val = math.exp(math.log(st.last_out) + d + st.trend_slope * k)
+        else:
+            val = st.last_out + d + st.trend_slope * k
+        return np.asarray([val], dtype=np.float64)
+
 
 # ============================================================
 # Main loop
@@ -1349,6 +1446,9 @@ def _apply_params_to_config(cfg: EngineConfig, params: dict) -> None:
 
 
 class Plugin:
+    # inputs/outputs are chronological (oldest -> newest); the hub handles orientation
+    chronological = True
+
     def __init__(self, params=None, context=None):
         self.params = params or {}
         self.context = context or {}
@@ -1362,6 +1462,40 @@ class Plugin:
         backend = self.params.get("backend", "cupy")
         self.engine = DominantWaveEngine(self.cfg, backend=backend, logger=self.logger)
 
+    def warmup(self):
+        """Dummy STFT/FFT at the configured nperseg/nfft: loads the backend's STFT,
+        builds the window and the FFT plans (CuPy: compiles the kernels)."""
+        cfg = self.cfg
+        xp, signal, _name = _get_backend(self.engine.backend)
+        nperseg = int(cfg.nperseg)
+        _get_window(cfg.window, nperseg)
+        x = xp.zeros(nperseg, dtype=xp.float64)
+        _f, _t, Z = signal.stft(
+            x,
+            fs=float(cfg.fs),
+            window=cfg.window,
+            nperseg=nperseg,
+            noverlap=int(cfg.noverlap),
+            nfft=int(cfg.nfft),
+            detrend=False,
+            return_onesided=cfg.return_onesided,
+            boundary=cfg.boundary,
+            padded=cfg.padded,
+            scaling=cfg.scaling,
+        )
+        signal.istft(
+            Z,
+            fs=float(cfg.fs),
+            window=cfg.window,
+            nperseg=nperseg,
+            noverlap=int(cfg.noverlap),
+            nfft=int(cfg.nfft),
+            input_onesided=cfg.return_onesided,
+            boundary=cfg.boundary is not None,
+            scaling=cfg.scaling,
+        )
+        xp.fft.rfft(x, n=int(cfg.nfft))
+
     def process_meta(self, meta, ts):
         meta_arr = np.asarray(meta, dtype=np.float64)
         self.logger.info("META count=%d ts=%d", int(meta_arr.size), int(ts))
@@ -1373,36 +1507,53 @@ class Plugin:
             self.logger.info(
                 "RX FULL count=%d v0=%.6f vN=%.6f ts=%d",
                 int(series_arr.size),
-                float(series_arr[0]),
                 float(series_arr[-1]),
+                float(series_arr[0]),
                 int(ts),
             )
-        out = self.engine.on_full(series_arr, int(ts))
+        log_price = None
+        derived = self.context.get("derived")
+        if derived is not None and self.cfg.use_log_price and series_arr.size > 0 and bool(np.all(series_arr > 0)):
+            # shared with other channels on the same series
+            log_price = derived.get("log", series_arr)
+        out = self.engine.on_full_chrono(series_arr, int(ts), log_price)
         if out is not None and len(out) > 0:
             self.logger.info(
                 "TX FULL count=%d v0=%.6f vN=%.6f",
                 int(len(out)),
-                float(out[0]),
                 float(out[-1]),
+                float(out[0]),
             )
         return out
 
     def process_update(self, series, ts):
+        return self._process_update(series, ts, None)
+
+    def process_bar(self, series, ts):
+        return self._process_update(series, ts, True)
+
+    def process_tick(self, series, ts):
+        return self._process_update(series, ts, False)
+
+    def extrapolate(self, series, ts, new_bar):
+        return self.engine.extrapolate(bool(new_bar))
+
+    def _process_update(self, series, ts, new_bar):
         series_arr = np.asarray(series, dtype=np.float64)
         if series_arr.size > 0:
             self.logger.info(
                 "RX UPDATE count=%d v0=%.6f vN=%.6f ts=%d",
                 int(series_arr.size),
-                float(series_arr[0]),
                 float(series_arr[-1]),
+                float(series_arr[0]),
                 int(ts),
             )
-        out = self.engine.on_update(series_arr, int(ts))
+        out = self.engine.on_update(series_arr, int(ts), new_bar, chrono=True)
         if out is not None and len(out) > 0:
             self.logger.info(
                 "TX UPDATE count=%d v0=%.6f",
                 int(len(out)),
-                float(out[0]),
+                float(out[-1]),
             )
         return out
 
@@ -6,17 +6,31 @@ from typing import Optional
 
 import numpy as np
 
-try:
-    import cupy as cp
-    xp = cp
-    GPU_ENABLED = True
-    def _to_cpu(arr):
-        return cp.asnumpy(arr)
-except Exception:
-    xp = np
-    GPU_ENABLED = False
-    def _to_cpu(arr):
-        return arr
+from plugins.history import HistoryBuffer
+
+# array backend: CuPy when installed, else NumPy. Resolved by the first Plugin
+# (_init_backend), not at import: importing CuPy takes seconds.
+xp = np
+GPU_ENABLED = False
+_BACKEND_READY = False
+
+
+def _init_backend() -> None:
+    global xp, GPU_ENABLED, _BACKEND_READY
+    if _BACKEND_READY:
+        return
+    try:
+        import cupy as cp
+    except Exception:
+        cp = None
+    if cp is not None:
+        xp = cp
+        GPU_ENABLED = True
+    _BACKEND_READY = True
+
+
+def _to_cpu(arr):
+    return xp.asnumpy(arr) if GPU_ENABLED else arr
 
 
 @dataclass
@@ -48,6 +62,12 @@ class OnlineRLS:
         self.w = self.w + k * e
         self.P = (self.P - k @ x_v.T @ self.P) / self.lam
 
+    def snapshot(self) -> tuple:
+        return self.w.copy(), self.P.copy()
+
+    def restore(self, snap: tuple) -> None:
+        self.w, self.P = snap[0].copy(), snap[1].copy()
+
     def predict(self, x: np.ndarray) -> float:
         x_v = xp.asarray(x, dtype=xp.float32).reshape((-1, 1))
         y = float((self.w.T @ x_v).item())
@@ -55,7 +75,15 @@ class OnlineRLS:
 
 
 class Plugin:
+    # inputs/outputs are chronological (oldest -> newest); the hub handles orientation
+    chronological = True
+    # causal: a re-sent FULL sharing history is extended with resume_full
+    incremental = True
+    # v2 UPDATE output (process_update_into): one value, the newest prediction
+    update_output_count = 1
+
     def __init__(self, params: dict, context: dict):
+        _init_backend()
         lookback = int(params.get("lookback", 64))
         forget = float(params.get("forget", 0.99))
         delta = float(params.get("delta", 100.0))
@@ -64,9 +92,15 @@ class Plugin:
             max_keep = context.get("send_bars")
 
         self.cfg = RlsConfig(lookback=lookback, forget=forget, delta=delta, max_keep=max_keep)
-        self.model = OnlineRLS(self.cfg.lookback + 1, self.cfg.forget, self.cfg.delta)
-        self.price_hist: Optional[np.ndarray] = None
-        self.ret_hist: Optional[np.ndarray] = None
+        # hub derived-series cache (shared log returns); None when run standalone
+        self._derived = context.get("derived")
+        self.model = OnlineRLS(self.cfg.lookback, self.cfg.forget, self.cfg.delta)
+        self.price_hist: Optional[HistoryBuffer] = None
+        self.ret_hist: Optional[HistoryBuffer] = None
+        # output per bar, as last sent to the indicator (for resume_full)
+        self.out_hist: Optional[HistoryBuffer] = None
+        # model before the last learning step, so a same-bar tick can redo it
+        self._prev_model: Optional[tuple] = None
 
     def _compute_returns(self, prices: np.ndarray) -> np.ndarray:
         if prices.size < 2:
@@ -87,59 +121,257 @@ class Plugin:
         return y_pred * sigma + mu
 
     def process_full(self, series: np.ndarray, ts: int) -> np.ndarray:
-        prices = series[::-1].astype(np.float64)
+        prices = np.asarray(series, dtype=np.float64)
         if self.cfg.max_keep and prices.size > self.cfg.max_keep:
             prices = prices[-self.cfg.max_keep :]
 
-        self.price_hist = prices.copy()
-        self.ret_hist = self._compute_returns(prices)
+        if self._derived is not None:
+            # shared read-only entry, copied into ret_hist below
+            rets = self._derived.get("log_return", prices)
+        else:
+            rets = self._compute_returns(prices)
         self.model.reset(self.cfg.delta)
 
         n = prices.size
         out = np.zeros(n, dtype=np.float64)
         L = self.cfg.lookback
 
-        if self.ret_hist.size >= L + 1:
-            for i in range(L, self.ret_hist.size):
-                x = self.ret_hist[i - L : i]
+        self._prev_model = None
+        if rets.size >= L + 1:
+            for i in range(L, rets.size):
+                if i == rets.size - 1:
+                    self._prev_model = self.model.snapshot()
+                x = rets[i - L : i]
                 mu = float(x.mean())
                 sigma = float(x.std()) + 1e-12
                 x_norm = (x - mu) / sigma
-                y = float(self.ret_hist[i])
+                y = float(rets[i])
                 y_norm = (y - mu) / sigma
 
                 out[i] = self.model.predict(x_norm) * sigma + mu
                 self.model.update(x_norm, y_norm)
 
-            out[-1] = self._predict_from_returns(self.ret_hist)
+            out[-1] = self._predict_from_returns(rets)
 
-        return out[::-1].astype(np.float64)
+        self._reset(prices, rets, out)
+        return out
+
+    def _reset(self, prices: np.ndarray, rets: np.ndarray, out: Optional[np.ndarray]) -> None:
+        self.price_hist = HistoryBuffer.from_array(prices, self.cfg.max_keep)
+        self.ret_hist = HistoryBuffer.from_array(rets, self.cfg.max_keep)
+        self.out_hist = None if out is None else HistoryBuffer.from_array(out, self.cfg.max_keep)
 
     def process_update(self, series: np.ndarray, ts: int) -> np.ndarray:
+        return self.process_bar(series, ts)
+
+    def process_bar(self, series: np.ndarray, ts: int) -> np.ndarray:
+        """New bar(s): append each price and learn from its return."""
         if self.price_hist is None:
             return np.array([], dtype=np.float64)
 
-        upd_prices = series[::-1].astype(np.float64)
+        upd_prices = np.asarray(series, dtype=np.float64)
         outputs = []
 
         for p in upd_prices:
             last_price = float(self.price_hist[-1])
-            self.price_hist = np.append(self.price_hist, p)
+            self.price_hist.append(p)
             r_new = float(np.log(p / last_price)) if p > 0 and last_price > 0 else 0.0
-            if self.ret_hist is None:
-                self.ret_hist = np.array([r_new], dtype=np.float64)
-            else:
-                self.ret_hist = np.append(self.ret_hist, r_new)
-
-            L = self.cfg.lookback
-            if self.ret_hist.size >= L + 1:
-                x_train = self.ret_hist[-L - 1 : -1]
-                mu = float(x_train.mean())
-                sigma = float(x_train.std()) + 1e-12
-                x_norm = (x_train - mu) / sigma
-                y_norm = (r_new - mu) / sigma
-                self.model.update(x_norm, y_norm)
+            self.ret_hist.append(r_new)
+            self._prev_model = self.model.snapshot()
+            self._learn_last()
+            outputs.append(self._predict_from_returns(self.ret_hist.last(self.cfg.lookback)))
+
+        outputs = np.asarray(outputs, dtype=np.float64)
+        if self.out_hist is not None:
+            self.out_hist.extend(outputs)
+        return outputs
+
+    def process_tick(self, series: np.ndarray, ts: int) -> np.ndarray:
+        """Same-bar tick: roll back the last learning step and redo it with the new price."""
+        if self.price_hist is None or len(self.ret_hist) == 0 or len(self.price_hist) < 2:
+            return self.process_bar(series, ts)
+        if series.size == 0:
+            return np.array([], dtype=np.float64)
+
+        return np.asarray([self._tick(float(series[-1]))], dtype=np.float64)
+
+    def process_update_into(self, series: np.ndarray, ts: int, out: np.ndarray, new_bar: bool) -> bool:
+        """v2 UPDATE: the newest prediction written into ``out`` (1, 1) in place; a
+        same-bar tick allocates no output array."""
+        if series.size == 0:
+            return False
+        if new_bar or self.price_hist is None or len(self.ret_hist) == 0 or len(self.price_hist) < 2:
+            res = self.process_bar(series, ts)
+            if res.size == 0:
+                return False
+            out[0, -1] = res[-1]
+            return True
+        out[0, -1] = self._tick(float(series[-1]))
+        return True
+
+    def _tick(self, p: float) -> float:
+        """Replace the forming bar's price with ``p`` and redo its learning step."""
+        prev_price = float(self.price_hist[-2])
+        self.price_hist.replace_last(p)
+        self.ret_hist.replace_last(float(np.log(p / prev_price)) if p > 0 and prev_price > 0 else 0.0)
+        if self._prev_model is not None:
+            self.model.restore(self._prev_model)
+            self._learn_last()
+
+        y = self._predict_from_returns(self.ret_hist.last(self.cfg.lookback))
+        if self.out_hist is not None and len(self.out_hist):
+            self.out_hist.replace_last(y)
+        return y
+
+    def process_updates(self, batch: np.ndarray, ts: np.ndarray, new_bar: np.ndarray) -> np.ndarray:
+        """Every UPDATE drained in one hub cycle, stacked as (packets, count), each row
+        chronological.
+
+        Packets are grouped into bar runs. Within a run the regressor window, gain and
+        covariance update do not depend on the tick price, so the covariance is
+        updated once per bar and the weights/predictions of all ticks are computed
+        as one vectorized step. Returns one prediction row per packet.
+        """
+        n = int(batch.shape[0])
+        out = np.zeros((n, 1), dtype=np.float64)
+        if self.price_hist is None or n == 0:
+            return out[:0]
+
+        prices = np.asarray(batch[:, -1], dtype=np.float64)  # newest value of each packet
+        starts = np.flatnonzero(new_bar)
+        bounds = np.concatenate([[0], starts[starts > 0], [n]])
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            appended = bool(new_bar[a] or len(self.price_hist) < 2 or len(self.ret_hist) == 0)
+            if appended:
+                self.price_hist.append(prices[a])
+                self.ret_hist.append(0.0)
+                self._prev_model = self.model.snapshot()
+            elif self._prev_model is not None:
+                self.model.restore(self._prev_model)
+            out[a:b, 0] = self._bar_run(prices[a:b])
+            if self.out_hist is not None:
+                if appended or not len(self.out_hist):
+                    self.out_hist.append(out[b - 1, 0])
+                else:
+                    self.out_hist.replace_last(out[b - 1, 0])
+        return out
+
+    def _bar_run(self, p: np.ndarray) -> np.ndarray:
+        """Apply successive prices of the forming bar; returns one prediction per price."""
+        L = self.cfg.lookback
+        prev_price = float(self.price_hist[-2])
+        r = np.zeros(p.size, dtype=np.float64)
+        ok = (p > 0) & (prev_price > 0)
+        r[ok] = np.log(p[ok] / prev_price)
+        self.price_hist.replace_last(float(p[-1]))
+        self.ret_hist.replace_last(float(r[-1]))
+        rets = self.ret_hist.last(L + 1)
+
+        w = self.model.w
+        if rets.size >= L + 1:
+            x_train = rets[:-1]
+            mu = float(x_train.mean())
+            sigma = float(x_train.std()) + 1e-12
+            x_v = xp.asarray((x_train - mu) / sigma, dtype=xp.float32).reshape((-1, 1))
+            y_v = xp.asarray((r - mu) / sigma, dtype=xp.float32).reshape((1, -1))
+            P = self.model.P
+            Px = P @ x_v
+            k = Px / (self.model.lam + (x_v.T @ Px))
+            w = w + k * (y_v - (w.T @ x_v))  # (dim, ticks): weights after each tick
+            self.model.w = w[:, -1:].copy()
+            self.model.P = (P - k @ x_v.T @ P) / self.model.lam
+
+        if rets.size < L:
+            return np.zeros(p.size, dtype=np.float64)
+        X = np.empty((p.size, L), dtype=np.float64)
+        X[:, :-1] = rets[-L:-1]
+        X[:, -1] = r
+        mu = X.mean(axis=1, keepdims=True)
+        sigma = X.std(axis=1, keepdims=True) + 1e-12
+        X_norm = xp.asarray((X - mu) / sigma, dtype=xp.float32)
+        if w.shape[1] == 1:
+            y = X_norm @ w[:, 0]
+        else:
+            y = xp.sum(X_norm * w.T, axis=1)
+        return _to_cpu(y).astype(np.float64) * sigma[:, 0] + mu[:, 0]
+
+    def _learn_last(self) -> None:
+        L = self.cfg.lookback
+        rets = self.ret_hist.last(L + 1)
+        if rets.size < L + 1:
+            return
+        x_train = rets[:-1]
+        mu = float(x_train.mean())
+        sigma = float(x_train.std()) + 1e-12
+        x_norm = (x_train - mu) / sigma
+        y_norm = (float(rets[-1]) - mu) / sigma
+        self.model.update(x_norm, y_norm)
+
+    def memory_usage(self) -> int:
+        """Bytes held by the histories and the model (hub memory accounting)."""
+        held = (self.price_hist, self.ret_hist, self.out_hist, self.model.w, self.model.P)
+        return sum(int(a.nbytes) for a in held if a is not None)
+
+    def trim(self, max_bars: int) -> None:
+        """Keep the newest ``max_bars`` bars (at least lookback + 2): hub history budget."""
+        keep = max(int(max_bars), self.cfg.lookback + 2)
+        if self.price_hist is None or len(self.price_hist) <= keep:
+            return
+        self.price_hist.keep_last(keep)
+        self.ret_hist.keep_last(keep - 1)
+        if self.out_hist is not None:
+            self.out_hist.keep_last(keep)
+
+    def export_state(self) -> dict:
+        """History and model handed to a hot-reloaded instance (see import_state)."""
+        prev = self._prev_model
+        return {
+            "lookback": self.cfg.lookback,
+            "price_hist": None if self.price_hist is None else self.price_hist.to_array(),
+            "ret_hist": None if self.ret_hist is None else self.ret_hist.to_array(),
+            "out_hist": None if self.out_hist is None else self.out_hist.to_array(),
+            "w": _to_cpu(self.model.w),
+            "P": _to_cpu(self.model.P),
+            "prev_w": None if prev is None else _to_cpu(prev[0]),
+            "prev_P": None if prev is None else _to_cpu(prev[1]),
+        }
 
-            outputs.append(self._predict_from_returns(self.ret_hist))
+    def import_state(self, state: dict) -> None:
+        if int(state["lookback"]) != self.cfg.lookback:
+            raise ValueError("lookback changed")
+        if state.get("price_hist") is None or state.get("ret_hist") is None:
+            self.price_hist = self.ret_hist = self.out_hist = None
+        else:
+            self._reset(state["price_hist"], state["ret_hist"], state.get("out_hist"))
+        self.model.w = xp.asarray(state["w"], dtype=xp.float32).copy()
+        self.model.P = xp.asarray(state["P"], dtype=xp.float32).copy()
+        self._prev_model = None
+        if state.get("prev_w") is not None:
+            self._prev_model = (
+                xp.asarray(state["prev_w"], dtype=xp.float32).copy(),
+                xp.asarray(state["prev_P"], dtype=xp.float32).copy(),
+            )
 
-        return np.asarray(outputs[::-1], dtype=np.float64)
+    def resume_full(self, series: np.ndarray, ts: int, new_bars: int) -> np.ndarray:
+        """The current (or imported) state covers ``series`` except its last
+        ``new_bars`` bars (the first of them is the state's forming bar, redone as a
+        tick): extend only those and return the spliced output. Falls back to
+        process_full when the state is too short."""
+        prices = np.asarray(series, dtype=np.float64)
+        covered = prices.size - int(new_bars) + 1
+        if (
+            self.price_hist is None
+            or self.ret_hist is None
+            or self.out_hist is None
+            or covered < 2
+            or len(self.price_hist) < covered
+            or len(self.out_hist) != len(self.price_hist)
+        ):
+            return self.process_full(series, ts)
+        self.price_hist.keep_last(covered)
+        self.ret_hist.keep_last(covered - 1)
+        self.out_hist.keep_last(covered)
+        self.process_tick(prices[covered - 1 : covered], ts)
+        if covered < prices.size:
+            self.process_bar(prices[covered:], ts)
+        return self.out_hist.to_array()
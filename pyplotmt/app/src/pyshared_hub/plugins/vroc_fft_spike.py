@@ -6,11 +6,26 @@ from typing import Optional
 
 import numpy as np
 
-try:
-    import cupy as cp
-    from cupyx.scipy.signal import find_peaks, convolve
-except Exception as exc:  # pragma: no cover
-    raise SystemExit(f"CuPy not available: {exc}")
+from plugins.history import HistoryBuffer
+
+# CuPy and its signal functions, imported by the first Plugin (_load_cupy), not at
+# import: importing CuPy takes seconds
+cp = None
+find_peaks = convolve = None
+
+
+def _load_cupy() -> None:
+    global cp, find_peaks, convolve
+    if cp is not None:
+        return
+    try:
+        import cupy
+        from cupyx.scipy.signal import find_peaks as _find_peaks, convolve as _convolve
+    except Exception as exc:  # pragma: no cover
+        raise RuntimeError(f"CuPy not available: {exc}") from exc
+    find_peaks, convolve = _find_peaks, _convolve
+    cp = cupy  # last: other threads take a non-None cp as "loaded"
+
 
 EMPTY_VALUE = np.finfo(np.float64).max
 
@@ -25,6 +40,7 @@ class VrocFftConfig:
     peak_prominence: float = 0.0
     use_convolution: bool = False
     kernel: Optional[np.ndarray] = None
+    max_keep: Optional[int] = None
 
 
 def compute_vroc(vol: cp.ndarray, period: int) -> cp.ndarray:
@@ -74,7 +90,16 @@ def fft_peak_spike(window: cp.ndarray, cfg: VrocFftConfig) -> float:
 
 
 class Plugin:
+    # inputs/outputs are chronological (oldest -> newest); the hub handles orientation
+    chronological = True
+    # causal: a re-sent FULL sharing history is extended with resume_full
+    incremental = True
+
     def __init__(self, params: dict, context: dict):
+        _load_cupy()
+        max_keep = params.get("max_keep")
+        if max_keep is None:
+            max_keep = context.get("send_bars")
         self.cfg = VrocFftConfig(
             vroc_period=int(params.get("vroc_period", 25)),
             fft_window=int(params.get("fft_window", 256)),
@@ -84,52 +109,140 @@ class Plugin:
             peak_prominence=float(params.get("peak_prominence", 0.0)),
             use_convolution=bool(params.get("use_convolution", False)),
             kernel=params.get("kernel"),
+            max_keep=max_keep,
         )
-        self.vol_hist: Optional[cp.ndarray] = None
-        self.vroc_hist: Optional[cp.ndarray] = None
+        # device histories (HistoryBuffer on CuPy)
+        self.vol_hist: Optional[HistoryBuffer] = None
+        self.vroc_hist: Optional[HistoryBuffer] = None
+        self.out_hist: Optional[HistoryBuffer] = None  # spike per bar, as sent
+
+    def warmup(self) -> None:
+        """Compile the CuPy kernels (VROC, FFT plan, find_peaks, convolve) on dummy data."""
+        n = self.cfg.vroc_period + self.cfg.fft_window + 1
+        vroc = compute_vroc(cp.arange(1, n + 1, dtype=cp.float32), self.cfg.vroc_period)
+        fft_peak_spike(vroc[-self.cfg.fft_window :], self.cfg)
+        cp.cuda.Stream.null.synchronize()
+
+    def _history(self, values, dtype) -> HistoryBuffer:
+        return HistoryBuffer.from_array(values, self.cfg.max_keep, dtype=dtype, xp=cp)
 
     def process_full(self, series: np.ndarray, ts: int) -> np.ndarray:
-        vol = cp.asarray(series[::-1], dtype=cp.float32)
-        self.vol_hist = vol.copy()
-        spikes = self._compute_spikes_full(self.vol_hist)
-        out_series = cp.asnumpy(spikes[::-1]).astype(np.float64)
-        return out_series
+        vol = cp.asarray(series, dtype=cp.float32)
+        vroc = compute_vroc(vol, self.cfg.vroc_period)
+        spikes = self._compute_spikes_full(vroc)
+        self.vol_hist = self._history(vol, cp.float32)
+        self.vroc_hist = self._history(vroc, cp.float32)
+        self.out_hist = self._history(spikes, cp.float64)
+        return cp.asnumpy(spikes)
 
     def process_update(self, series: np.ndarray, ts: int) -> np.ndarray:
+        return self.process_bar(series, ts)
+
+    def process_bar(self, series: np.ndarray, ts: int) -> np.ndarray:
+        return self._process_update(series, replace_last=False)
+
+    def process_tick(self, series: np.ndarray, ts: int) -> np.ndarray:
+        return self._process_update(series, replace_last=True)
+
+    def _process_update(self, series: np.ndarray, replace_last: bool) -> np.ndarray:
         if self.vol_hist is None:
             return np.array([], dtype=np.float64)
-        upd_series = series[::-1].astype(np.float32)
+        upd_series = np.asarray(series, dtype=np.float32)
+        replace_last = replace_last and len(self.vol_hist) > 0
+        if replace_last:
+            # same bar: only the newest value replaces the forming bar
+            upd_series = upd_series[-1:]
         spike_vals = []
 
         for v in upd_series:
-            self.vol_hist = cp.concatenate([self.vol_hist, cp.asarray([v], dtype=cp.float32)])
-            n = int(self.vol_hist.size)
+            if replace_last:
+                self.vol_hist.replace_last(v)
+            else:
+                self.vol_hist.append(v)
+            n = len(self.vol_hist)
             if n - 1 >= self.cfg.vroc_period:
-                prev = self.vol_hist[n - 1 - self.cfg.vroc_period]
-                curr = self.vol_hist[n - 1]
+                prev = self.vol_hist[-1 - self.cfg.vroc_period]
+                curr = self.vol_hist[-1]
                 vroc_val = float(0.0) if prev == 0 else float(100.0 * (curr - prev) / prev)
             else:
                 vroc_val = 0.0
 
             if self.vroc_hist is None:
-                self.vroc_hist = compute_vroc(self.vol_hist, self.cfg.vroc_period)
+                self.vroc_hist = self._history(compute_vroc(self.vol_hist.last(), self.cfg.vroc_period), cp.float32)
+            elif replace_last and len(self.vroc_hist) == n:
+                self.vroc_hist.replace_last(vroc_val)
             else:
-                self.vroc_hist = cp.concatenate([self.vroc_hist, cp.asarray([vroc_val], dtype=cp.float32)])
+                self.vroc_hist.append(vroc_val)
 
             if n - 1 >= self.cfg.vroc_period + self.cfg.fft_window - 1:
-                window = self.vroc_hist[n - self.cfg.fft_window : n]
+                window = self.vroc_hist.last(self.cfg.fft_window)
                 spike = fft_peak_spike(window, self.cfg)
                 if spike <= 0:
                     spike = EMPTY_VALUE
             else:
                 spike = EMPTY_VALUE
             spike_vals.append(spike)
+            if self.out_hist is not None:
+                if replace_last and len(self.out_hist) == n:
+                    self.out_hist.replace_last(spike)
+                else:
+                    self.out_hist.append(spike)
 
-        out_update = np.array(spike_vals[::-1], dtype=np.float64)
-        return out_update
+        return np.array(spike_vals, dtype=np.float64)
 
-    def _compute_spikes_full(self, vol: cp.ndarray) -> cp.ndarray:
-        vroc = compute_vroc(vol, self.cfg.vroc_period)
+    def resume_full(self, series: np.ndarray, ts: int, new_bars: int) -> np.ndarray:
+        """The current state covers ``series`` except its last ``new_bars`` bars (the
+        first of them is the state's forming bar, redone as a tick): extend only those
+        and return the spliced output. Falls back to process_full when the state is
+        too short."""
+        covered = int(series.size) - int(new_bars) + 1
+        if (
+            self.vol_hist is None
+            or self.vroc_hist is None
+            or self.out_hist is None
+            or covered < 1
+            or len(self.vol_hist) < covered
+            or len(self.out_hist) != len(self.vol_hist)
+        ):
+            return self.process_full(series, ts)
+        for buf in (self.vol_hist, self.vroc_hist, self.out_hist):
+            buf.keep_last(covered)
+        self._process_update(series[covered - 1 : covered], replace_last=True)
+        if covered < series.size:
+            self._process_update(series[covered:], replace_last=False)
+        return cp.asnumpy(self.out_hist.last())
+
+    def memory_usage(self) -> int:
+        """Bytes held by the (device) histories (hub memory accounting)."""
+        return sum(b.nbytes for b in (self.vol_hist, self.vroc_hist, self.out_hist) if b is not None)
+
+    def trim(self, max_bars: int) -> None:
+        """Keep the newest ``max_bars`` bars (at least one VROC + FFT window): hub
+        history budget."""
+        keep = max(int(max_bars), self.cfg.vroc_period + self.cfg.fft_window + 1)
+        if self.vol_hist is None or len(self.vol_hist) <= keep:
+            return
+        for buf in (self.vol_hist, self.vroc_hist, self.out_hist):
+            if buf is not None:
+                buf.keep_last(keep)
+
+    def export_state(self) -> dict:
+        return {
+            "vroc_period": self.cfg.vroc_period,
+            "fft_window": self.cfg.fft_window,
+            "vol_hist": None if self.vol_hist is None else cp.asnumpy(self.vol_hist.last()),
+            "vroc_hist": None if self.vroc_hist is None else cp.asnumpy(self.vroc_hist.last()),
+            "out_hist": None if self.out_hist is None else cp.asnumpy(self.out_hist.last()),
+        }
+
+    def import_state(self, state: dict) -> None:
+        if int(state["vroc_period"]) != self.cfg.vroc_period or int(state["fft_window"]) != self.cfg.fft_window:
+            raise ValueError("vroc_period/fft_window changed")
+        for key, dtype in (("vol_hist", cp.float32), ("vroc_hist", cp.float32), ("out_hist", cp.float64)):
+            arr = state.get(key)
+            setattr(self, key, None if arr is None else self._history(arr, dtype))
+
+    def _compute_spikes_full(self, vroc: cp.ndarray) -> cp.ndarray:
         n = vroc.size
         out = cp.full(n, EMPTY_VALUE, dtype=cp.float64)
 
@@ -6,9 +6,13 @@ and only implement their own compute + stream mapping.
 from __future__ import annotations
 
 import ctypes as ct
+import itertools
 import json
 import logging
+import logging.handlers
 import os
+import queue
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional, Tuple
@@ -16,16 +20,57 @@ from typing import Optional, Tuple
 import numpy as np
 
 LOG = logging.getLogger("PySharedBase")
-_LOG_SEQ = 0
-LOG_IO = True  # log every read/write (verbose)
-
-
-def log_event(msg: str, level: str = "info") -> None:
-    """Emit non-repeating log line with a monotonically increasing id."""
-    global _LOG_SEQ
-    _LOG_SEQ += 1
-    line = f"[{_LOG_SEQ:06d}] {msg}"
-    getattr(LOG, level, LOG.info)(line)
+_LOG_SEQ = itertools.count(1)  # next() is atomic under the GIL
+LOG_IO = False  # log every read/write (verbose); the hub enables it with --log-io
+LOG_FORMAT = "[%(asctime)s] %(levelname)s: %(message)s"
+LOG_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+
+
+def log_event(msg: str, *args, level: str = "info") -> None:
+    """Emit non-repeating log line with a monotonically increasing id.
+
+    ``msg`` may hold %-style placeholders for ``args``; formatting happens only if
+    the line is emitted (in the writer thread when async logging is on), so pass
+    immutable values (numbers, strings), never arrays that may be reused.
+    """
+    lvl = LOG_LEVELS.get(level, logging.INFO)
+    if not LOG.isEnabledFor(lvl):
+        return
+    if not args:
+        msg = msg.replace("%", "%%")
+    LOG.log(lvl, "[%06d] " + msg, next(_LOG_SEQ), *args)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def start_async_logging(level: int = logging.DEBUG) -> logging.handlers.QueueListener:
+    """Route all logging through a queue drained by one writer thread.
+
+    Callers only enqueue records; stderr IO and formatting never run on compute
+    threads. Stop the returned listener on exit to flush pending lines.
+    """
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(_DeferredQueueHandler(q))
+    root.setLevel(level)
+    listener = logging.handlers.QueueListener(q, stream)
+    listener.start()
+    return listener
 
 
 @dataclass
@@ -38,7 +83,7 @@ class BridgeConfig:
 class PySharedBridge:
     def __init__(self, dll_path: str):
         if os.name != "nt":
-            log_event("PySharedBridge requires Windows (ct.WinDLL)", "error")
+            log_event("PySharedBridge requires Windows (ct.WinDLL)", level="error")
             raise RuntimeError("PySharedBridge requires Windows (ct.WinDLL)")
         self.dll_path = dll_path
         self.dll = ct.WinDLL(dll_path)
@@ -89,11 +134,11 @@ class PySharedBridge:
     def connect(self, channel: str, capacity_bytes: int) -> None:
         log_event(f"PB_Init attempt channel={channel} capacity_bytes={capacity_bytes}")
         if self.dll.PB_Init(channel, int(capacity_bytes)) != 1:
-            log_event("PB_Init failed", "error")
+            log_event("PB_Init failed", level="error")
             raise RuntimeError("PB_Init failed")
         self.max_doubles = int(self.dll.PB_MaxDoubles())
         if self.max_doubles <= 0:
-            log_event("PB_MaxDoubles returned 0", "error")
+            log_event("PB_MaxDoubles returned 0", level="error")
             raise RuntimeError("PB_MaxDoubles returned 0")
         self._buf = (ct.c_double * self.max_doubles)()
         log_event(f"PB_Init OK max_doubles={self.max_doubles} (waiting for indicator data)")
@@ -106,6 +151,14 @@ class PySharedBridge:
             pass
 
     def read_next(self, stream: int) -> Tuple[int, np.ndarray, int]:
+        sid, view, ts = self.read_next_view(stream)
+        return sid, view.copy(), ts
+
+    def read_next_view(self, stream: int) -> Tuple[int, np.ndarray, int]:
+        """Like read_next, but the data is a view of the read buffer (no copy).
+
+        The view is only valid until the next read on this bridge.
+        """
         sid = ct.c_int()
         out_count = ct.c_int()
         ts = ct.c_longlong()
@@ -132,24 +185,25 @@ class PySharedBridge:
         if got <= 0 or out_count.value <= 0:
             return 0, np.empty(0, dtype=np.float64), 0
 
-        data = np.frombuffer(self._buf, dtype=np.float64, count=out_count.value).copy()
+        data = np.frombuffer(self._buf, dtype=np.float64, count=out_count.value)
         if LOG_IO:
             log_event(
-                f"read_next stream={stream} sid={int(sid.value)} count={int(out_count.value)} ts={int(ts.value)}"
+                "read_next stream=%d sid=%d count=%d ts=%d", stream, sid.value, out_count.value, ts.value
             )
         return int(sid.value), data, int(ts.value)
 
     def write(self, stream: int, series_id: int, data: np.ndarray, ts: int = 0) -> int:
         if data is None:
             return 0
-        arr = np.asarray(data, dtype=np.float64)
+        # contiguous float64 is passed by pointer, without a copy
+        arr = np.ascontiguousarray(data, dtype=np.float64)
         count = int(arr.size)
         if count <= 0:
             return 0
-        buf = (ct.c_double * count)(*arr.tolist())
+        buf = arr.ctypes.data_as(ct.POINTER(ct.c_double))
         wrote = int(self.dll.PB_WriteDoubles(stream, series_id, buf, count, int(ts)))
         if LOG_IO:
-            log_event(f"write stream={stream} sid={series_id} count={count} ts={int(ts)} wrote={wrote}")
+            log_event("write stream=%d sid=%d count=%d ts=%d wrote=%d", stream, series_id, count, ts, wrote)
         return wrote
 
 
@@ -184,7 +238,7 @@ def _auto_config_path() -> Optional[Path]:
 def _load_config(path: Path, log: logging.Logger) -> Optional[dict]:
     try:
         if not path.exists():
-            log_event(f"config missing: {str(path)}", "warning")
+            log_event(f"config missing: {str(path)}", level="warning")
             return None
         data = path.read_bytes()
         if data.startswith(b"\xff\xfe") or data.startswith(b"\xfe\xff"):
@@ -229,7 +283,7 @@ def _resolve_dll_path(cfg: Optional[dict], log: logging.Logger, cfg_path: Option
                 return str(legacy)
 
     log.error("DLL path not provided and default not found.")
-    log_event("dll_path resolve failed", "error")
+    log_event("dll_path resolve failed", level="error")
     raise SystemExit(2)
 
 
@@ -254,9 +308,30 @@ def _extract_capacity_bytes(cfg: Optional[dict]) -> int:
     return 8 * 1024 * 1024
 
 
+# (path, mtime, data) of the config last read: the path is discovered once per
+# process (MQL5 root, else the APPDATA glob over every terminal) and the file is
+# parsed again only when its mtime changes
+_CONFIG_CACHE: Optional[Tuple[Optional[Path], float, Optional[dict]]] = None
+
+
+def _cached_config(logger: logging.Logger) -> Tuple[Optional[dict], Optional[Path]]:
+    global _CONFIG_CACHE
+    cached = _CONFIG_CACHE
+    cfg_path = cached[0] if cached is not None else _auto_config_path()
+    try:
+        mtime = cfg_path.stat().st_mtime if cfg_path else -1.0
+    except OSError:
+        mtime = -1.0
+    if cached is not None and cached[1] == mtime:
+        cfg_data = cached[2]
+    else:
+        cfg_data = _load_config(cfg_path, logger) if cfg_path else None
+        _CONFIG_CACHE = (cfg_path, mtime, cfg_data)
+    return (dict(cfg_data) if cfg_data is not None else None), cfg_path
+
+
 def load_bridge_config(logger: logging.Logger) -> BridgeConfig:
-    cfg_path = _auto_config_path()
-    cfg_data = _load_config(cfg_path, logger) if cfg_path else None
+    cfg_data, cfg_path = _cached_config(logger)
 
     channel = (cfg_data.get("channel") if cfg_data else None) or "MAIN"
     capacity = _extract_capacity_bytes(cfg_data)
@@ -267,7 +342,6 @@ def load_bridge_config(logger: logging.Logger) -> BridgeConfig:
 
 
 def load_raw_config(logger: logging.Logger) -> tuple[Optional[dict], Optional[Path]]:
-    cfg_path = _auto_config_path()
-    cfg_data = _load_config(cfg_path, logger) if cfg_path else None
+    cfg_data, cfg_path = _cached_config(logger)
     log_event(f"raw_config path={str(cfg_path) if cfg_path else 'None'} loaded={cfg_data is not None}")
     return cfg_data, cfg_path
@@ -6,6 +6,7 @@
 """
 from __future__ import annotations
 
+import argparse
 import importlib
 import importlib.machinery
 import importlib.util
@@ -15,14 +16,76 @@ import sys
 import signal
 import threading
 import time
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from typing import Any
 
 import numpy as np
 
 import pyshared_client_base as psb
+import hub_batch
+import hub_cache
 import hub_config
+import hub_gc
+import hub_memory
+import hub_profile
+import hub_state
+from hub_metrics import ChannelMetrics
+
+
+COMPUTE_MODES = ("every_tick", "bar_close", "min_interval_ms", "every_n_ticks")
+RELOAD_CHECK_SECONDS = 1.0  # how often a channel stats its plugin file (hot_reload)
+CONFIG_CHECK_SECONDS = 1.0  # how often the hub stats its channel config file
+CHECKPOINT_SECONDS = 300.0  # periodic plugin state checkpoint (plus one at shutdown)
+HUB_T0 = time.perf_counter()  # origin of the startup timings (--profile-startup)
+
+
+@dataclass
+class ComputePolicy:
+    """When a channel runs its plugin on UPDATE packets.
+
+    - every_tick: every UPDATE is computed (default).
+    - bar_close: one compute per bar, with the final value of the bar that closed.
+    - min_interval_ms: at most one compute per ``interval_ms``.
+    - every_n_ticks: one compute every ``n`` UPDATE packets.
+
+    A bar boundary always flushes the pending tick of the closed bar, so plugins see
+    every bar with its final value whatever the policy.
+    """
+
+    mode: str = "every_tick"
+    n: int = 1
+    interval_ms: float = 0.0
+
+    @classmethod
+    def parse(cls, raw: Any) -> "ComputePolicy":
+        if raw is None:
+            return cls()
+        if isinstance(raw, str):
+            raw = {"mode": raw}
+        if not isinstance(raw, dict):
+            raise ValueError(f"invalid compute_policy: {raw!r}")
+        mode = str(raw.get("mode", "every_tick"))
+        if mode not in COMPUTE_MODES:
+            raise ValueError(f"unknown compute_policy mode: {mode}")
+        return cls(
+            mode=mode,
+            n=max(1, int(raw.get("n", 1))),
+            interval_ms=max(0.0, float(raw.get("ms", raw.get("interval_ms", 0.0)))),
+        )
+
+    def due(self, ticks_since: int, elapsed_ms: float) -> bool:
+        if self.mode == "every_tick":
+            return True
+        if self.mode == "every_n_ticks":
+            return ticks_since >= self.n
+        if self.mode == "min_interval_ms":
+            return elapsed_ms >= self.interval_ms
+        return False
+
+    def due_idle(self, elapsed_ms: float) -> bool:
+        return self.mode == "min_interval_ms" and elapsed_ms >= self.interval_ms
 
 
 @dataclass
@@ -30,160 +93,1225 @@ class ChannelConfig:
     name: str
     plugin: str
     params: dict
+    compute_policy: ComputePolicy = field(default_factory=ComputePolicy)
+    # deliver every drained UPDATE packet as one stacked batch (process_updates)
+    update_batch: bool = False
+    # channel log level (logging.* int, NOTSET = hub level) and 1-of-N RX/TX sampling
+    log_level: int = logging.NOTSET
+    log_sample: int = 1
+    # watch the plugin file and swap in the edited Plugin between packets
+    hot_reload: bool = True
+    # checkpoint plugin state (export_state) for warm restarts, see hub_state
+    checkpoint: bool = True
+    # reuse process_full results for an identical FULL (hub_cache.FULL_CACHE)
+    full_cache: bool = True
+    # upstream channel whose output is this channel's input (in-process, no MT5 round trip)
+    inputs: tuple[str, ...] = ()
+    # another channel takes this channel's output as input (set by _order_channels)
+    consumed: bool = False
+    # batch computes with other channels running the same plugin and params for up
+    # to this many ms (process_full_batch/process_update_batch), 0 = off
+    batch_window_ms: float = 0.0
+    # plugin memory above which the plugin is asked to trim its history (hub_memory), 0 = none
+    history_budget_mb: float = 0.0
+
+    @property
+    def uses_bridge(self) -> bool:
+        """Sources read the indicator; channels fed by other channels only connect
+        to write, and only when nothing downstream takes their output (sinks)."""
+        return not self.inputs or not self.consumed
+
+
+class InputArena:
+    """Reusable, geometrically grown buffer that FULL chunks are read into.
+
+    Chunks arrive in series order (newest first); each one is copied reversed just
+    in front of the previous one, so after the last chunk ``view()`` is the whole
+    FULL in chronological order without a concatenate or a second copy.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self._buf = np.empty(max(1, int(capacity)), dtype=np.float64)
+        self._start = self._buf.size
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._buf.nbytes)
+
+    def reset(self) -> None:
+        self._start = self._buf.size
+
+    def push_reversed(self, chunk: np.ndarray) -> None:
+        n = int(chunk.size)
+        if n > self._start:
+            self._grow(self._buf.size - self._start + n)
+        self._buf[self._start - n : self._start] = chunk[::-1]
+        self._start -= n
+
+    def view(self) -> np.ndarray:
+        return self._buf[self._start :]
+
+    def _grow(self, needed: int) -> None:
+        cap = self._buf.size
+        while cap < needed:
+            cap *= 2
+        used = self._buf.size - self._start
+        buf = np.empty(cap, dtype=np.float64)
+        buf[cap - used :] = self._buf[self._start :]
+        self._buf = buf
+        self._start = cap - used
+
+
+class OutputBuffers:
+    """A channel's reusable output buffers, one per kind of packet (full, update, ...).
+
+    ``get`` returns a (buffers, count) view in series order, grown geometrically;
+    its contents are valid until the next ``get`` of the same kind.
+    """
+
+    def __init__(self):
+        self._bufs: dict[str, np.ndarray] = {}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(int(b.nbytes) for b in self._bufs.values())
+
+    def get(self, kind: str, buffers: int, count: int) -> np.ndarray:
+        size = int(buffers) * int(count)
+        buf = self._bufs.get(kind)
+        if buf is None or buf.size < size:
+            cap = 64 if buf is None else buf.size
+            while cap < size:
+                cap *= 2
+            buf = self._bufs[kind] = np.empty(cap, dtype=np.float64)
+        return buf[:size].reshape(int(buffers), int(count))
+
+
+class LocalInput:
+    """In-process stream 0 of a channel fed by an upstream channel.
+
+    The upstream thread pushes its outputs as FULL (100) / UPDATE (101) packets in
+    series order; the arrays are shared, not copied, and must not be written.
+    """
+
+    _EMPTY = np.empty(0, dtype=np.float64)
+
+    def __init__(self):
+        self._packets: deque[tuple[int, np.ndarray, int]] = deque()
+
+    def push(self, sid: int, data: np.ndarray, ts: int) -> None:
+        self._packets.append((sid, data, ts))
+
+    def read_next_view(self, stream: int) -> tuple[int, np.ndarray, int]:
+        try:
+            return self._packets.popleft()
+        except IndexError:
+            return 0, self._EMPTY, 0
 
 
 class ChannelWorker(threading.Thread):
-    def __init__(self, cfg: ChannelConfig, dll_path: str, capacity_bytes: int, context: dict[str, Any]):
+    def __init__(
+        self,
+        cfg: ChannelConfig,
+        dll_path: str,
+        capacity_bytes: int,
+        context: dict[str, Any],
+        bridge_factory=None,
+    ):
         super().__init__(daemon=True)
         self.cfg = cfg
         self.dll_path = dll_path
         self.capacity_bytes = capacity_bytes
         self.context = context
+        # transport: bridge_factory(dll_path) -> object with PySharedBridge's connect,
+        # read_next_view, write and close (default the DLL; hub_sim has an in-memory one)
+        self.bridge_factory = bridge_factory
         self.stop_event = threading.Event()
+        # set once the plugin is loaded and the bridge connected (or either failed)
+        self.ready = threading.Event()
         self.log = logging.getLogger(f"Hub[{cfg.name}]")
         self.bridge = None
         self.plugin = None
+        # plugin takes/returns chronological arrays (oldest -> newest), see _to_series
+        self._chrono = False
         self._last_rx_time: float | None = None
         self._indicator_online = False
         self._idle_seconds = 5.0
+        self._bar_ts: int | None = None
+        # newest UPDATE not yet computed (series, ts, new_bar), see ComputePolicy
+        self._pending: tuple[np.ndarray, int, bool] | None = None
+        self._ticks_since_compute = 0
+        self._last_compute_time = 0.0
+        self._last_upd_out: np.ndarray | None = None
+        # arrival of the first FULL: first_output_ms is measured from it to its output
+        self._first_full_t0: float | None = None
+        # update_batch mode: every packet not yet delivered (series, ts, new_bar)
+        self._batch: list[tuple[np.ndarray, int, bool]] = []
+        self._arena = InputArena()
+        self._outbuf = OutputBuffers()
+        # input of the FULL before the current one, for prefix reuse (incremental plugins)
+        self._prev_arena = InputArena()
+        self.metrics = ChannelMetrics(cfg.name)
+        self._io_lines = 0
+        # hot reload: plugin source, its mtime, and a Plugin built by the reload thread
+        self._plugin_file: Path | None = None
+        self._plugin_mtime = 0.0
+        self._module_name: str | None = None
+        self._plugin_module = None
+        self._reload_gen = 0
+        self._reload_thread: threading.Thread | None = None
+        # rebuild waiting for the reload thread: "file" (recompile) or "params"
+        self._rebuild_pending: str | None = None
+        # (plugin, module, module name) built by the reload thread
+        self._staged_plugin: tuple[Any, Any, str | None] | None = None
+        # config handed over by the hub main thread (reconfigure)
+        self._next_cfg: ChannelConfig | None = None
+        self._next_reload_check = 0.0
+        # chronological UPDATE inputs since the last FULL (one entry per bar), so the
+        # current input can be rebuilt for a reloaded plugin without a new FULL
+        self._full_seen = False
+        self._since_full: list[tuple[np.ndarray, int, bool]] = []
+        # checkpoint loaded at start, applied to the first FULL; save bookkeeping
+        self._state_dir = _state_dir()
+        self._resume: tuple[dict, dict] | None = None
+        self._state_dirty = False
+        self._last_checkpoint = time.monotonic()
+        self._ckpt_thread: threading.Thread | None = None
+        self._plugin_version = ""
+        self._meta_digest = ""  # last META applied, part of the FULL cache key
+        # plugin DAG: packets from the upstream channel (cfg.inputs), downstream
+        # inboxes by channel name, and the outputs since the last FULL, replayed to
+        # a downstream channel attached later
+        self.inbox = LocalInput() if cfg.inputs else None
+        self._outputs: dict[str, LocalInput] = {}
+        self._next_outputs: dict[str, LocalInput] | None = None
+        self._out_log: list[tuple[int, np.ndarray, int]] = []
+        # cross-channel batching group (hub_batch), with the window it was joined with
+        self._batch_group: hub_batch.BatchGroup | None = None
+        self._batch_window = 0.0
+        # on-demand profile (hub_profile): (seconds, mode) requested from any thread,
+        # and the session the channel thread is running
+        self._profile_request: tuple[float, str] | None = None
+        self._profile_session: hub_profile.ProfileSession | None = None
+        # share of the hub history budget (bytes) set by the hub main thread, None
+        # while the hub is under budget; channels running the same plugin spec
+        self.history_cap: int | None = None
+        self.plugin_sharers = 1
+        self._next_memory_check = time.monotonic() + hub_memory.MEMORY_CHECK_SECONDS
 
     def run(self) -> None:
+        # collections run on this thread count as this channel's GC pauses
+        hub_gc.attach(self.metrics)
+        try:
+            try:
+                self.load()
+                if self.cfg.uses_bridge:
+                    t0 = time.perf_counter()
+                    self._init_bridge()
+                    self.metrics.set("startup_bridge_ms", (time.perf_counter() - t0) * 1000.0)
+                self.metrics.set("startup_live_ms", (time.perf_counter() - HUB_T0) * 1000.0)
+            finally:
+                # live or failed: the hub's startup report waits for every channel
+                self.ready.set()
+            self._loop()
+        finally:
+            hub_gc.detach()
+
+    def load(self) -> None:
+        """Load the plugin (and its checkpoint) and warm it up. run() starts with this;
+        call it directly to drive the channel with feed() instead of the thread."""
         self._init_plugin()
-        self._init_bridge()
-        self._loop()
+        self.metrics.set("startup_warmup_ms", self._warmup(self.plugin))
 
     def _init_plugin(self) -> None:
         psb.log_event(f"[{self.cfg.name}] loading plugin: {self.cfg.plugin}")
+        t0 = time.perf_counter()
         mod = self._load_plugin_module(self.cfg.plugin)
         if not hasattr(mod, "Plugin"):
             raise RuntimeError(f"Plugin {self.cfg.plugin} missing Plugin class")
+        t1 = time.perf_counter()
         self.plugin = mod.Plugin(self.cfg.params, self.context)
-        psb.log_event(f"[{self.cfg.name}] plugin loaded: {self.cfg.plugin} params={self.cfg.params}")
+        t2 = time.perf_counter()
+        self._plugin_module = mod
+        self._plugin_version = self._version_of(self.plugin)
+        path = self._checkpoint_path()
+        if path is not None and path.exists():
+            self._resume = hub_state.load_state(path)
+            psb.log_event(f"[{self.cfg.name}] checkpoint found: {path.name}")
+        self.metrics.set("startup_import_ms", (t1 - t0) * 1000.0)
+        self.metrics.set("startup_init_ms", (t2 - t1) * 1000.0)
+        self.metrics.set("startup_checkpoint_ms", (time.perf_counter() - t2) * 1000.0)
+        self._chrono = bool(getattr(self.plugin, "chronological", False))
+        self._join_batch_group()
+        psb.log_event(
+            f"[{self.cfg.name}] plugin loaded: {self.cfg.plugin} params={self.cfg.params} "
+            f"chronological={self._chrono}"
+        )
+
+    def _warmup(self, plugin) -> float:
+        """Run ``plugin.warmup()`` if it has one: dummy transforms at its declared sizes
+        (FFT plans, windows, GPU kernels), so the first FULL does not pay for them.
+        Returns the time taken (ms); a failing warm-up is logged and ignored."""
+        fn = getattr(plugin, "warmup", None)
+        if fn is None:
+            return 0.0
+        t0 = time.perf_counter()
+        try:
+            fn()
+        except Exception as exc:
+            self._log("plugin warmup failed: %s", exc, level="warning")
+        return (time.perf_counter() - t0) * 1000.0
 
     def _load_plugin_module(self, spec: str):
         p = Path(spec)
         if p.exists() and p.suffix.lower() == ".py":
             psb.log_event(f"[{self.cfg.name}] plugin path resolved: {spec}")
-            mod_name = f"ext_{self.cfg.name.lower()}"
-            loader = importlib.machinery.SourceFileLoader(mod_name, str(p))
-            spec_obj = importlib.util.spec_from_loader(mod_name, loader)
-            if spec_obj is None or spec_obj.loader is None:
-                raise RuntimeError(f"Failed to load plugin file: {spec}")
-            mod = importlib.util.module_from_spec(spec_obj)
+            self._module_name = f"ext_{self.cfg.name.lower()}"
+            mod = self._exec_plugin_file(p, self._module_name)
+        else:
+            psb.log_event(f"[{self.cfg.name}] importing plugin module: {spec}")
+            mod = importlib.import_module(spec)
+        src = getattr(mod, "__file__", None)
+        if src and str(src).lower().endswith(".py"):
+            self._plugin_file = Path(src)
+            try:
+                self._plugin_mtime = self._plugin_file.stat().st_mtime
+            except OSError:
+                self._plugin_file = None
+        return mod
+
+    @staticmethod
+    def _exec_plugin_file(path: Path, mod_name: str):
+        loader = importlib.machinery.SourceFileLoader(mod_name, str(path))
+        spec_obj = importlib.util.spec_from_loader(mod_name, loader)
+        if spec_obj is None or spec_obj.loader is None:
+            raise RuntimeError(f"Failed to load plugin file: {path}")
+        mod = importlib.util.module_from_spec(spec_obj)
+        # registered before exec: dataclasses look their module up in sys.modules
+        sys.modules[mod_name] = mod
+        try:
             spec_obj.loader.exec_module(mod)
-            return mod
-        psb.log_event(f"[{self.cfg.name}] importing plugin module: {spec}")
-        return importlib.import_module(spec)
+        except BaseException:
+            sys.modules.pop(mod_name, None)
+            raise
+        return mod
 
     def _init_bridge(self) -> None:
-        self.bridge = psb.PySharedBridge(self.dll_path)
+        factory = self.bridge_factory or psb.PySharedBridge
+        self.bridge = factory(self.dll_path)
         self.bridge.connect(self.cfg.name, self.capacity_bytes)
         psb.log_event(f"[{self.cfg.name}] [Connected] PB_Init OK")
 
     def _loop(self) -> None:
-        assert self.bridge is not None
+        assert self.bridge is not None or self.inbox is not None
         assert self.plugin is not None
 
-        last_bar_ts = -1
+        metrics = self.metrics
         while not self.stop_event.is_set():
-            full_chunks = []
-            last_full_ts = None
-            last_upd = None
-            last_upd_ts = None
-            last_meta = None
-            last_meta_ts = None
-
-            while True:
-                sid, data, ts = self.bridge.read_next(0)
-                if sid == 0 or data.size == 0:
-                    break
-                if sid == 100:
-                    full_chunks.append(data)
-                    last_full_ts = ts
-                elif sid == 101:
-                    last_upd = data
-                    last_upd_ts = ts
-                elif sid == 900:
-                    last_meta = data
-                    last_meta_ts = ts
-
-            if not full_chunks and last_upd is None and last_meta is None:
+            if self._staged_plugin is not None:
+                self._swap_plugin()
+            if self._next_cfg is not None:
+                self._apply_cfg()
+            if self._rebuild_pending is not None:
+                self._start_rebuild()
+            if self.cfg.hot_reload and time.monotonic() >= self._next_reload_check:
+                self._poll_plugin_file()
+            if self._next_outputs is not None:
+                self._apply_outputs()
+            if self._profile_request is not None or self._profile_session is not None:
+                self._profile_step()
+            if time.monotonic() >= self._next_memory_check:
+                self._check_memory()
+
+            full_chunks, full_ts, updates, meta, meta_ts = self._drain(self._read_next)
+            if not full_chunks and not updates and meta is None:
+                if (self._pending is not None or self._batch) and self.cfg.compute_policy.due_idle(
+                    (time.time() - self._last_compute_time) * 1000.0
+                ):
+                    self._compute_pending()
+                    self._compute_batch()
+                if self._state_dirty and time.monotonic() - self._last_checkpoint >= CHECKPOINT_SECONDS:
+                    self._checkpoint(wait=False)
                 if self._indicator_online and self._last_rx_time is not None:
                     if (time.time() - self._last_rx_time) > self._idle_seconds:
                         self._indicator_online = False
+                        metrics.set("indicator_online", 0)
                         psb.log_event(f"[{self.cfg.name}] [Disconnected] indicator idle")
                 time.sleep(0.001)
                 continue
+            self._process(full_chunks, full_ts, updates, meta, meta_ts)
 
-            now = time.time()
-            self._last_rx_time = now
-            if not self._indicator_online:
-                self._indicator_online = True
-                psb.log_event(f"[{self.cfg.name}] [Connected] indicator stream active")
-
-            if last_meta is not None:
-                self._handle_meta(last_meta, int(last_meta_ts or 0))
-
-            if full_chunks:
-                series = np.concatenate(full_chunks).astype(np.float64)
-                psb.log_event(
-                    f"[{self.cfg.name}] RX FULL chunks={len(full_chunks)} count={int(series.size)} "
-                    f"v0={float(series[0]) if series.size else 0.0:.6f} "
-                    f"vN={float(series[-1]) if series.size else 0.0:.6f} "
-                    f"ts={int(last_full_ts or 0)}"
-                )
-                out = self.plugin.process_full(series, int(last_full_ts or 0))
-                if out is not None and len(out) > 0:
-                    self.bridge.write(1, 201, np.asarray(out, dtype=np.float64), int(last_full_ts or 0))
-                    psb.log_event(
-                        f"[{self.cfg.name}] TX FULL count={int(len(out))} "
-                        f"v0={float(out[0]) if len(out) else 0.0:.6f} "
-                        f"vN={float(out[-1]) if len(out) else 0.0:.6f}"
-                    )
-
-            if last_upd is not None:
-                out = self.plugin.process_update(last_upd.astype(np.float64), int(last_upd_ts or 0))
-                if last_upd_ts is not None and int(last_upd_ts) != last_bar_ts:
-                    last_bar_ts = int(last_upd_ts)
-                    psb.log_event(
-                        f"[{self.cfg.name}] RX UPDATE count={int(last_upd.size)} "
-                        f"v0={float(last_upd[0]) if last_upd.size else 0.0:.6f} "
-                        f"vN={float(last_upd[-1]) if last_upd.size else 0.0:.6f} "
-                        f"ts={int(last_upd_ts or 0)}"
-                    )
-                if out is not None and len(out) > 0:
-                    self.bridge.write(1, 202, np.asarray(out, dtype=np.float64), int(last_upd_ts or 0))
-                    psb.log_event(
-                        f"[{self.cfg.name}] TX UPDATE count={int(len(out))} "
-                        f"v0={float(out[0]) if len(out) else 0.0:.6f}"
-                    )
-
+        self._leave_batch_group()
+        if self._profile_session is not None:
+            self._finish_profile()
         try:
+            if self._state_dirty:
+                self._checkpoint(wait=True)
             if self.bridge is not None:
                 self.bridge.close()
         finally:
+            self._log("metrics %s", metrics.summary())
             psb.log_event(f"[{self.cfg.name}] [Disconnected] PB_Close")
 
+    def feed(self, packets: list[tuple[int, np.ndarray, int]]) -> None:
+        """Handle ``packets`` [(sid, data in series order, ts), ...] on the calling thread,
+        as one drain of the channel loop. For benchmarks and simulations: call load()
+        first and do not start the thread."""
+        queue = LocalInput()
+        for sid, data, ts in packets:
+            queue.push(sid, np.asarray(data, dtype=np.float64), ts)
+        drained = self._drain(lambda: queue.read_next_view(0))
+        if drained[0] or drained[2] or drained[3] is not None:
+            self._process(*drained)
+
+    def _drain(self, read) -> tuple[int, int, list[tuple[np.ndarray, int]], np.ndarray | None, int]:
+        """Read packets with ``read()`` until there are none, coalesced the way they are
+        handled: (FULL chunks, FULL ts, UPDATEs, newest META, META ts)."""
+        metrics = self.metrics
+        full_chunks = 0
+        last_full_ts = None
+        updates: list[tuple[np.ndarray, int]] = []
+        last_meta = None
+        last_meta_ts = None
+        packets = 0
+
+        while True:
+            # view of the bridge read buffer: copy before the next read
+            sid, data, ts = read()
+            if sid == 0 or data.size == 0:
+                break
+            packets += 1
+            metrics.inc("rx_doubles", data.size)
+            if sid == 100:
+                if self._first_full_t0 is None:
+                    self._first_full_t0 = time.perf_counter()
+                if full_chunks == 0:
+                    self._arena, self._prev_arena = self._prev_arena, self._arena
+                    self._arena.reset()
+                self._arena.push_reversed(data)
+                full_chunks += 1
+                last_full_ts = ts
+                # A FULL supersedes any UPDATE drained before it.
+                updates.clear()
+            elif sid == 101:
+                # Keep only the newest packet of each bar: same-bar ticks replace
+                # each other, but the final value of a closed bar is never dropped.
+                metrics.inc("rx_update")
+                if updates and updates[-1][1] == ts and not self.cfg.update_batch:
+                    updates[-1] = (data.copy(), ts)
+                else:
+                    updates.append((data.copy(), ts))
+            elif sid == 900:
+                metrics.inc("rx_meta")
+                request = hub_profile.parse_meta(data)
+                if request is not None:
+                    self.request_profile(*request)
+                    continue
+                last_meta = data.copy()
+                last_meta_ts = ts
+        if packets:
+            # packets waiting when the channel got to them
+            metrics.set("rx_queue_depth", packets)
+            metrics.set_max("rx_queue_depth_high_water", packets)
+        return full_chunks, int(last_full_ts or 0), updates, last_meta, int(last_meta_ts or 0)
+
+    def _process(
+        self,
+        full_chunks: int,
+        full_ts: int,
+        updates: list[tuple[np.ndarray, int]],
+        meta: np.ndarray | None,
+        meta_ts: int,
+    ) -> None:
+        """Handle one drain: META first, then the FULL (in the arena), then the UPDATEs."""
+        metrics = self.metrics
+        now = time.time()
+        self._last_rx_time = now
+        metrics.set("last_rx_time", now)
+        self._state_dirty = True
+        if not self._indicator_online:
+            self._indicator_online = True
+            metrics.set("indicator_online", 1)
+            psb.log_event(f"[{self.cfg.name}] [Connected] indicator stream active")
+
+        if meta is not None:
+            self._handle_meta(meta, meta_ts)
+
+        if full_chunks:
+            chrono = self._arena.view()
+            np.nan_to_num(chrono, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+            metrics.inc("rx_full")
+            metrics.set("history_bars", chrono.size)
+            metrics.set("arena_bytes", self._arena.nbytes)
+            metrics.set_max("arena_high_water_bytes", self._arena.nbytes)
+            prev_input = None
+            if self._full_seen and getattr(self.plugin, "incremental", False) and full_ts >= int(self._bar_ts or 0):
+                self._sync_plugin_state()
+                prev_input = self._current_input(self._prev_arena.view())
+            self._bar_ts = full_ts
+            self._pending = None
+            self._batch.clear()
+            self._ticks_since_compute = 0
+            self._last_upd_out = None
+            self._full_seen = True
+            self._since_full.clear()
+            if self._io_due():
+                self._log(
+                    "RX FULL chunks=%d count=%d v0=%.6f vN=%.6f ts=%d",
+                    full_chunks, chrono.size, chrono[-1], chrono[0], full_ts,
+                )
+            ref = hub_cache.DERIVED.bind(chrono)
+            t0 = time.perf_counter()
+            try:
+                out = self._run_full(chrono, full_ts, prev_input, ref)
+            finally:
+                hub_cache.DERIVED.bind(None)
+            metrics.observe("full_compute_ms", (time.perf_counter() - t0) * 1000.0)
+            metrics.set("derived_cache_bytes", hub_cache.DERIVED.nbytes)
+            if out is not None and len(out) > 0:
+                self._emit(201, out, full_ts)
+                metrics.inc("tx_full")
+                if "first_output_ms" not in metrics.gauges:
+                    metrics.set("first_output_ms", (time.perf_counter() - self._first_full_t0) * 1000.0)
+                if self._io_due():
+                    self._log("TX FULL count=%d v0=%.6f vN=%.6f", out.size, out[0], out[-1])
+
+        if self.cfg.update_batch:
+            if updates:
+                self._on_update_batch(updates)
+        else:
+            for upd, upd_ts in updates:
+                self._on_update(upd, int(upd_ts))
+        metrics.set("held_updates", len(self._batch) + (self._pending is not None))
+
+    def _read_next(self) -> tuple[int, np.ndarray, int]:
+        """Next input packet: the bridge for sources; for channels fed by another
+        channel the inbox, plus META from their own indicator (its FULL/UPDATE are
+        ignored, the input comes from upstream)."""
+        if self.inbox is None:
+            return self.bridge.read_next_view(0)
+        packet = self.inbox.read_next_view(0)
+        if packet[0] != 0 or self.bridge is None:
+            return packet
+        while True:
+            sid, data, ts = self.bridge.read_next_view(0)
+            if sid in (0, 900) or data.size == 0:
+                return sid, data, ts
+            self.metrics.inc("rx_ignored")
+
+    def _emit(self, sid: int, out: np.ndarray, ts: int) -> None:
+        """Send a FULL (201) / UPDATE (202) output (series order) to the indicator, unless
+        another channel consumes it (only sinks write to the bridge), and to the
+        downstream channels, which share one read-only copy of it."""
+        if self.bridge is not None and not self.cfg.consumed:
+            self.metrics.inc("tx_doubles", out.size)
+            if self.bridge.write(1, sid, out, int(ts)) <= 0:
+                self.metrics.inc("tx_dropped")  # output queue full (PB_Dropped)
+        if not self._outputs and not self.cfg.consumed:
+            return
+        # ``out`` is a reused output buffer: one copy per emission, shared by every
+        # downstream channel
+        out = np.array(out, dtype=np.float64)
+        out.setflags(write=False)
+        packet = (100 if sid == 201 else 101, out, int(ts))
+        if sid == 201:
+            self._out_log = [packet]
+        elif self._out_log and self._out_log[-1][0] == 101 and self._out_log[-1][2] == packet[2]:
+            self._out_log[-1] = packet
+        elif self._out_log:
+            self._out_log.append(packet)
+        for inbox in self._outputs.values():
+            inbox.push(*packet)
+
+    def set_outputs(self, outputs: dict[str, LocalInput]) -> None:
+        """Hand the downstream inboxes (by channel name) to the channel thread."""
+        self._next_outputs = dict(outputs)
+
+    def _apply_outputs(self) -> None:
+        """Channel thread: attach/detach downstream channels; a new one first gets
+        the last FULL output and the UPDATE outputs since."""
+        outputs, self._next_outputs = self._next_outputs or {}, None
+        added = [name for name, inbox in outputs.items() if self._outputs.get(name) is not inbox]
+        for name in added:
+            for packet in self._out_log:
+                outputs[name].push(*packet)
+            self._log("output wired to %s (%d packets replayed)", name, len(self._out_log))
+        self._outputs = outputs
+        if added and not self._out_log and self._full_seen:
+            # nothing kept to replay (channel was not consumed yet): send a fresh FULL
+            self._replay_input()
+
+    def _run_full(self, chrono: np.ndarray, ts: int, prev_input: np.ndarray | None = None, ref=None):
+        """process_full, a warm start from the startup checkpoint, or a cached result.
+
+        The checkpoint is used once, on the first FULL, if its input tail is found
+        in the FULL: the plugin imports the state and resume_full only processes the
+        bars after it. A FULL identical to a recent one (same plugin, params, META,
+        ts and input) returns the cached output and restores the state it left.
+
+        For ``incremental`` plugins, a FULL that shares its history with the previous
+        input ``prev_input`` (same bars, possibly shifted by new ones) is handed to
+        resume_full so only the bars after the overlap are processed; the plugin
+        splices them onto its previous output.
+
+        ``ref`` is the input bound to hub_cache.DERIVED; its digest is shared with
+        the derived-series cache instead of hashing the input twice.
+
+        Returns the output in series order (see _to_series), or None.
+        """
+        assert self.plugin is not None
+        series = chrono if self._chrono else chrono[::-1]
+        resume, self._resume = self._resume, None
+        if resume is not None and self._can_checkpoint():
+            state, meta = resume
+            new_bars = None
+            if int(meta.get("bar_ts", 0)) <= ts:
+                new_bars = hub_state.match_tail(chrono, np.asarray(meta.get("tail", []), dtype=np.float64))
+            if new_bars is None:
+                self._log("checkpoint does not match the FULL, full compute")
+            else:
+                try:
+                    t0 = time.perf_counter()
+                    self.plugin.import_state(state)
+                    out = self._to_series(self.plugin.resume_full(series, ts, new_bars))
+                    self.metrics.inc("warm_starts")
+                    self._log(
+                        "warm start from checkpoint: %d new bars in %.1f ms",
+                        new_bars, (time.perf_counter() - t0) * 1000.0,
+                    )
+                    return out
+                except Exception as exc:
+                    self._log("checkpoint resume failed, full compute: %s", exc, level="warning")
+
+        if prev_input is not None and hasattr(self.plugin, "resume_full"):
+            new_bars = hub_state.match_overlap(chrono, prev_input)
+            if new_bars is not None:
+                self.metrics.inc("full_prefix_hits")
+                if self._io_due():
+                    self._log("FULL prefix reuse: %d new bars", new_bars)
+                return self._to_series(self.plugin.resume_full(series, ts, new_bars))
+            self.metrics.inc("full_prefix_misses")
+
+        key = None
+        if self.cfg.full_cache and hasattr(self.plugin, "export_state") and hasattr(self.plugin, "import_state"):
+            key = hub_cache.digest(
+                self.cfg.plugin, self._plugin_version, self.cfg.params, self._meta_digest, ts,
+                ref.key if ref is not None else chrono,
+            )
+            hit = hub_cache.FULL_CACHE.get(key)
+            if hit is not None:
+                out, state = hit
+                try:
+                    self.plugin.import_state(state)
+                    self.metrics.inc("full_cache_hits")
+                    return out
+                except Exception as exc:
+                    self._log("cached state rejected, full compute: %s", exc, level="warning")
+            self.metrics.inc("full_cache_misses")
+        out = self._batched("full", series, ts, True)
+        if key is not None and out is not None:
+            # cached in series order, ready to send on a hit
+            hub_cache.FULL_CACHE.put(key, out, self.plugin.export_state())
+            self.metrics.set("full_cache_bytes", hub_cache.FULL_CACHE.nbytes)
+        return out
+
+    def _can_checkpoint(self) -> bool:
+        return all(
+            hasattr(self.plugin, name) for name in ("export_state", "import_state", "resume_full")
+        )
+
+    def _checkpoint_path(self) -> Path | None:
+        if not self.cfg.checkpoint or self._state_dir is None or not self._can_checkpoint():
+            return None
+        return hub_state.state_path(
+            self._state_dir, self.cfg.name, self.cfg.plugin, self._plugin_version, self.cfg.params
+        )
+
+    def _version_of(self, plugin) -> str:
+        return str(getattr(plugin, "state_version", "") or hub_state.source_version(self._plugin_file))
+
+    def _checkpoint(self, wait: bool) -> None:
+        """Snapshot plugin state on this thread; write the .npz in the background
+        (or inline when ``wait``, at shutdown)."""
+        self._last_checkpoint = time.monotonic()
+        path = self._checkpoint_path()
+        if path is None or not self._full_seen:
+            return
+        if self._ckpt_thread is not None and self._ckpt_thread.is_alive():
+            if not wait:
+                return
+            self._ckpt_thread.join()
+        try:
+            self._sync_plugin_state()
+            state = {
+                k: (np.array(v) if isinstance(v, np.ndarray) else v)
+                for k, v in self.plugin.export_state().items()
+            }
+        except Exception as exc:
+            self._log("export_state failed: %s", exc, level="warning")
+            return
+        meta = {
+            "channel": self.cfg.name,
+            "plugin": self.cfg.plugin,
+            "bar_ts": int(self._bar_ts or 0),
+            "tail": self._current_input()[-hub_state.TAIL_BARS :].tolist(),
+            "saved_at": time.time(),
+        }
+        self._state_dirty = False
+        if wait:
+            self._write_checkpoint(path, state, meta)
+            return
+        self._ckpt_thread = threading.Thread(
+            target=self._write_checkpoint, args=(path, state, meta), name=f"ckpt-{self.cfg.name}", daemon=True
+        )
+        self._ckpt_thread.start()
+
+    def _write_checkpoint(self, path: Path, state: dict, meta: dict) -> None:
+        try:
+            t0 = time.perf_counter()
+            hub_state.save_state(path, state, meta)
+            self.metrics.inc("checkpoints")
+            self._log("checkpoint saved %s in %.1f ms", path.name, (time.perf_counter() - t0) * 1000.0)
+        except Exception as exc:
+            self._log("checkpoint save failed: %s", exc, level="warning")
+
+    def _plugin_update(self, series: np.ndarray) -> np.ndarray:
+        """Sanitized float64 UPDATE in the plugin's orientation."""
+        arr = series[::-1] if self._chrono else series
+        return np.nan_to_num(np.asarray(arr, dtype=np.float64), nan=0.0, posinf=0.0, neginf=0.0)
+
+    def _to_series(self, out, kind: str = "full") -> np.ndarray | None:
+        """v1 plugin output -> series orientation for the bridge, copied into the
+        channel's ``kind`` output buffer (valid until the next output of that kind).
+
+        Chronological plugins return ``output_buffers`` concatenated buffers, each
+        oldest -> newest; every buffer is reversed in place of the whole array.
+        None or an empty output gives None.
+        """
+        if out is None or len(out) == 0:
+            return None
+        out = np.asarray(out, dtype=np.float64).reshape(-1)
+        nb = int(getattr(self.plugin, "output_buffers", 1) or 1) if self._chrono else 1
+        if nb > 1 and out.size % nb:
+            nb = 1
+        buf = self._outbuf.get(kind, nb, out.size // nb)
+        src = out.reshape(nb, -1)
+        buf[...] = src[:, ::-1] if self._chrono else src
+        return buf.reshape(-1)
+
+    def _out_view(self, kind: str, count: int) -> tuple[np.ndarray, np.ndarray]:
+        """(series-order buffer, view handed to a v2 plugin) for ``count`` values per
+        output buffer; the view is chronological for chronological plugins."""
+        nb = int(getattr(self.plugin, "output_buffers", 1) or 1)
+        buf = self._outbuf.get(kind, nb, count)
+        return buf, (buf[:, ::-1] if self._chrono else buf)
+
+    def _full_out(self, series: np.ndarray, ts: int) -> np.ndarray | None:
+        """process_full_into (v2) into the reused FULL buffer; v1 plugins are adapted
+        by copying their process_full result into it."""
+        into = getattr(self.plugin, "process_full_into", None)
+        if into is None:
+            return self._to_series(self.plugin.process_full(series, ts), "full")
+        buf, view = self._out_view("full", series.size)
+        if into(series, int(ts), view) is False:
+            return None
+        return buf.reshape(-1)
+
+    def _update_out(self, series: np.ndarray, ts: int, new_bar: bool, kind: str = "update") -> np.ndarray | None:
+        """process_update_into (v2) into the reused ``kind`` buffer, or the v1 hooks
+        (process_bar/process_tick/process_update) adapted into it."""
+        into = getattr(self.plugin, "process_update_into", None)
+        if into is None:
+            return self._to_series(self._dispatch_update(series, ts, new_bar), kind)
+        count = getattr(self.plugin, "update_output_count", None)
+        buf, view = self._out_view(kind, int(count) if count else series.size)
+        if into(series, int(ts), view, bool(new_bar)) is False:
+            return None
+        return buf.reshape(-1)
+
+    def _is_new_bar(self, ts: int) -> bool:
+        """Classify an UPDATE by its bar timestamp (bar open time of the newest bar).
+
+        A timestamp equal to the current bar is a same-bar tick; anything else opens a
+        new bar. Without a known bar (no FULL yet) or without a timestamp the update is
+        treated as a new bar, which matches the historical append behaviour.
+        """
+        ts = int(ts)
+        if ts != 0 and self._bar_ts is not None and ts == self._bar_ts:
+            return False
+        if ts != 0:
+            self._bar_ts = ts
+        return True
+
+    def _on_update(self, series: np.ndarray, ts: int) -> None:
+        """Queue an UPDATE as pending and compute it when the channel policy says so."""
+        new_bar = self._is_new_bar(ts)
+        if new_bar:
+            if self._io_due():
+                self._log(
+                    "RX UPDATE count=%d v0=%.6f vN=%.6f ts=%d",
+                    series.size, series[0], series[-1], ts,
+                )
+            if self._pending is not None:
+                # finalize the bar that just closed with its last value
+                self._compute_pending()
+
+        series = self._plugin_update(series)
+        self._remember_input(series, ts, new_bar)
+
+        if self._pending is not None:
+            self._pending = (series, ts, self._pending[2])
+        else:
+            self._pending = (series, ts, new_bar)
+        self._ticks_since_compute += 1
+
+        elapsed_ms = (time.time() - self._last_compute_time) * 1000.0
+        if self.cfg.compute_policy.due(self._ticks_since_compute, elapsed_ms):
+            self._compute_pending()
+        else:
+            self._answer_skipped(series, ts, new_bar)
+
+    def _remember_input(self, series: np.ndarray, ts: int, new_bar: bool) -> None:
+        """Record an UPDATE (plugin orientation) for _current_input, one entry per bar."""
+        if not self._full_seen:
+            return
+        chrono = (series if self._chrono else series[::-1]).copy()
+        last = self._since_full[-1] if self._since_full else None
+        if not new_bar and last is not None and last[0].size <= chrono.size:
+            self._since_full[-1] = (chrono, ts, last[2])
+        else:
+            self._since_full.append((chrono, ts, new_bar))
+        if new_bar:
+            self.metrics.set("history_bars", self.metrics.gauges.get("history_bars", 0.0) + 1)
+
+    def _current_input(self, base: np.ndarray | None = None) -> np.ndarray:
+        """Chronological input as of now: the last FULL (``base``, default the
+        arena) plus the UPDATEs since."""
+        if base is None:
+            base = self._arena.view()
+        n_new = sum(1 for _, _, nb in self._since_full if nb)
+        hist = np.empty(base.size + n_new, dtype=np.float64)
+        hist[: base.size] = base
+        end = base.size
+        for upd, _, nb in self._since_full:
+            if nb:
+                end += 1
+            k = min(upd.size, end)
+            hist[end - k : end] = upd[upd.size - k :]
+        return hist
+
+    def _sync_plugin_state(self) -> None:
+        """Deliver UPDATEs the compute policy is holding back, without answering them,
+        so the plugin state covers everything in _current_input."""
+        queued = ([self._pending] if self._pending is not None else []) + self._batch
+        self._pending = None
+        self._batch = []
+        self._ticks_since_compute = 0
+        for series, ts, new_bar in queued:
+            self._dispatch_update(series, ts, new_bar)
+
+    def _compute_pending(self) -> None:
+        if self._pending is None:
+            return
+        series, ts, new_bar = self._pending
+        self._pending = None
+        self._ticks_since_compute = 0
+        self._last_compute_time = time.time()
+        t0 = time.perf_counter()
+        out = self._batched("update", series, ts, new_bar)
+        self.metrics.observe("update_compute_ms", (time.perf_counter() - t0) * 1000.0)
+        if out is not None:
+            self._last_upd_out = out
+            self._emit(202, out, ts)
+            self.metrics.inc("tx_update")
+            if self._io_due():
+                self._log("TX UPDATE count=%d v0=%.6f", out.size, out[0])
+
+    def _on_update_batch(self, updates: list[tuple[np.ndarray, int]]) -> None:
+        """update_batch mode: keep every packet and deliver them together when due.
+        Before the first FULL there is no history to batch against: packets take the
+        per-packet path (_on_update)."""
+        for upd, upd_ts in updates:
+            if not self._full_seen:
+                self._on_update(upd, int(upd_ts))
+                continue
+            new_bar = self._is_new_bar(upd_ts)
+            series = self._plugin_update(upd)
+            self._remember_input(series, int(upd_ts), new_bar)
+            self._batch.append((series, int(upd_ts), new_bar))
+            self._ticks_since_compute += 1
+        if not self._batch:
+            return
+
+        policy = self.cfg.compute_policy
+        elapsed_ms = (time.time() - self._last_compute_time) * 1000.0
+        due = policy.due(self._ticks_since_compute, elapsed_ms)
+        if policy.mode == "bar_close":
+            due = any(new_bar for _, _, new_bar in self._batch[1:])
+        if due:
+            self._compute_batch()
+        else:
+            series, ts, new_bar = self._batch[-1]
+            self._answer_skipped(series, ts, new_bar)
+
+    def _compute_batch(self) -> None:
+        """Deliver the batch with process_updates(batch, ts, new_bar), one stacked call.
+
+        ``batch`` is (packets, count) in arrival order, ``ts`` int64 and ``new_bar``
+        bool per packet. The plugin returns one output row per packet; the hub writes
+        the last row of each bar. Plugins without process_updates, packets of
+        different sizes, a None return (batch declined, state untouched) or a row
+        count other than the packet count fall back to one dispatch per packet.
+        """
+        if not self._batch:
+            return
+        packets = self._batch
+        self._batch = []
+        self._ticks_since_compute = 0
+        self._last_compute_time = time.time()
+        t0 = time.perf_counter()
+
+        ts_arr = np.fromiter((ts for _, ts, _ in packets), dtype=np.int64, count=len(packets))
+        new_bar = np.fromiter((nb for _, _, nb in packets), dtype=bool, count=len(packets))
+        hook = getattr(self.plugin, "process_updates", None)
+        rows = None
+        if hook is not None and len({data.size for data, _, _ in packets}) == 1:
+            rows = hook(np.stack([data for data, _, _ in packets]), ts_arr, new_bar)
+            if rows is not None and len(rows) != len(packets):
+                self._log(
+                    "process_updates returned %d rows for %d packets, dispatching per packet",
+                    len(rows), len(packets), level="warning",
+                )
+                rows = None
+
+        for i, (data, ts, nb) in enumerate(packets):
+            last_of_bar = i + 1 == len(packets) or ts_arr[i + 1] != ts_arr[i]
+            if rows is not None:
+                if not last_of_bar:
+                    continue
+                out = self._to_series(rows[i], "update")
+            else:
+                # one dispatch per packet; the output buffer is reused, send it now
+                out = self._update_out(data, ts, nb)
+                if not last_of_bar:
+                    continue
+            if out is None:
+                continue
+            self._last_upd_out = out
+            self._emit(202, out, int(ts))
+            self.metrics.inc("tx_update")
+        self.metrics.observe("update_compute_ms", (time.perf_counter() - t0) * 1000.0)
+        if self._io_due():
+            self._log("TX UPDATE batch packets=%d", len(packets))
+
+    def _answer_skipped(self, series: np.ndarray, ts: int, new_bar: bool) -> None:
+        """Answer an UPDATE the policy skipped: plugin extrapolation or the cached value."""
+        extrapolate = getattr(self.plugin, "extrapolate", None)
+        if extrapolate is not None:
+            out = self._to_series(extrapolate(series, int(ts), new_bar), "extrapolate")
+            if out is not None:
+                self._emit(202, out, ts)
+            return
+        # The indicator already holds the cached value for the current bar; only a
+        # new bar needs it carried forward.
+        if new_bar and self._last_upd_out is not None:
+            self._emit(202, self._last_upd_out, ts)
+
+    def _batched(self, kind: str, series: np.ndarray, ts: int, new_bar: bool):
+        """FULL/UPDATE compute through the channel's batch group when the plugin
+        class has the batch hook, else (or if the group leaves it) a direct call.
+        Returns the output in series order."""
+        group = self._batch_group
+        if group is not None and hasattr(type(self.plugin), hub_batch.HOOKS[kind]):
+            out = group.run(kind, self.plugin, series, ts, new_bar)
+            if out is not hub_batch.FALLBACK:
+                self.metrics.inc(f"batched_{kind}")
+                return self._to_series(out, kind)
+        if kind == "full":
+            return self._full_out(series, ts)
+        return self._update_out(series, ts, new_bar)
+
+    def _join_batch_group(self) -> None:
+        """(Re)join the batch group matching the current plugin class and params."""
+        self._leave_batch_group()
+        if self.cfg.batch_window_ms > 0 and hub_batch.batchable(self.plugin):
+            self._batch_window = self.cfg.batch_window_ms
+            self._batch_group = hub_batch.join(self.plugin, self.cfg.params, self._batch_window)
+
+    def _leave_batch_group(self) -> None:
+        if self._batch_group is not None:
+            self._batch_group.leave(self._batch_window)
+            self._batch_group = None
+
+    def _dispatch_update(self, series: np.ndarray, ts: int, new_bar: bool):
+        """Route an UPDATE to process_bar/process_tick, falling back to process_update
+        (v1 hooks, plugin orientation). A v2-only plugin gets process_update_into
+        with a scratch buffer."""
+        assert self.plugin is not None
+        hook = getattr(self.plugin, "process_bar" if new_bar else "process_tick", None)
+        if hook is None:
+            hook = getattr(self.plugin, "process_update", None)
+        if hook is None:
+            self._update_out(series, ts, new_bar, "sync")
+            return None
+        return hook(series, int(ts))
+
     def stop(self) -> None:
         self.stop_event.set()
 
+    def request_profile(self, seconds: float = hub_profile.DEFAULT_SECONDS, mode: str = "cprofile") -> None:
+        """Profile this channel's thread for ``seconds`` (any thread may ask); the
+        result goes to the profile directory (PYSHARED_PROFILE_DIR)."""
+        if mode not in hub_profile.MODES:
+            raise ValueError(f"unknown profile mode: {mode}")
+        self._profile_request = (float(seconds), mode)
+
+    def _profile_step(self) -> None:
+        """Channel thread: start a requested profile, finish an expired one."""
+        if self._profile_session is not None:
+            if self._profile_session.expired():
+                self._finish_profile()
+            return
+        (seconds, mode), self._profile_request = self._profile_request, None
+        session = hub_profile.ProfileSession(self.cfg.name, seconds, mode)
+        try:
+            session.start()
+        except (ValueError, RuntimeError) as exc:  # e.g. another cProfile active (Python 3.12+)
+            self._log("profile not started: %s", exc, level="warning")
+            return
+        self._profile_session = session
+        self._log("profiling (%s) for %.1f s", mode, session.seconds)
+
+    def _check_memory(self) -> None:
+        """Measure the plugin (hub_memory) and ask it to trim its history when it is
+        over the channel budget or its share of the hub budget."""
+        self._next_memory_check = time.monotonic() + hub_memory.MEMORY_CHECK_SECONDS
+        metrics = self.metrics
+        since_full = sum(upd.nbytes for upd, _, _ in self._since_full)
+        metrics.set("input_bytes", self._arena.nbytes + self._prev_arena.nbytes + since_full)
+        try:
+            used, _source = hub_memory.plugin_memory(self.plugin, self._plugin_file, self.plugin_sharers, self.context)
+        except Exception as exc:
+            self._log("memory_usage failed: %s", exc, level="warning")
+            return
+        metrics.set("plugin_memory_bytes", used)
+        budgets = [b for b in (int(self.cfg.history_budget_mb * 1024 * 1024), self.history_cap) if b]
+        if not budgets:
+            return
+        budget = min(budgets)
+        metrics.set("history_budget_bytes", budget)
+        trim = getattr(self.plugin, "trim", None)
+        if used <= budget or trim is None:
+            return
+        bars = int(metrics.gauges.get("history_bars", 0))
+        before = used
+        # the hub's bar count may exceed what the plugin keeps: re-measure and shrink again
+        for _attempt in range(3):
+            bars = hub_memory.trim_bars(used, bars, budget)
+            try:
+                trim(bars)
+                used, _source = hub_memory.plugin_memory(
+                    self.plugin, self._plugin_file, self.plugin_sharers, self.context
+                )
+            except Exception as exc:
+                self._log("plugin trim failed: %s", exc, level="warning")
+                return
+            if used <= budget or bars <= hub_memory.MIN_TRIM_BARS:
+                break
+        metrics.inc("history_trims")
+        metrics.set("plugin_memory_bytes", used)
+        self._log("history trimmed to %d bars: %d -> %d bytes (budget %d)", bars, before, used, budget)
+
+    def _finish_profile(self) -> None:
+        session, self._profile_session = self._profile_session, None
+        out_dir = _profile_dir()
+        if out_dir is None:
+            self._log("profile dropped: no profile directory", level="warning")
+            return
+        try:
+            path = session.finish(out_dir)
+        except OSError as exc:
+            self._log("profile write failed: %s", exc, level="error")
+            return
+        self.metrics.inc("profiles")
+        self._log("profile written: %s", str(path))
+
+    def reconfigure(self, cfg: ChannelConfig) -> bool:
+        """Hand a new config for this channel (same plugin) to the channel thread.
+
+        Returns False when ``cfg`` is what the channel already runs (or will run).
+        """
+        if cfg == (self._next_cfg or self.cfg):
+            return False
+        self._next_cfg = cfg
+        return True
+
+    def _apply_cfg(self) -> None:
+        """Channel thread: switch to the config given to reconfigure, between packets."""
+        assert self._next_cfg is not None
+        cfg = self._next_cfg
+        self._next_cfg = None
+        # flush work queued under the old policy before it changes
+        self._compute_pending()
+        self._compute_batch()
+        params_changed = cfg.params != self.cfg.params
+        self.cfg = cfg
+        if not params_changed and cfg.batch_window_ms != self._batch_window:
+            self._join_batch_group()
+        if params_changed and self._rebuild_pending is None:
+            self._rebuild_pending = "params"
+            self._start_rebuild()
+        self._log(
+            "config applied compute_policy=%s update_batch=%s params=%s",
+            cfg.compute_policy.mode, cfg.update_batch, "rebuilding" if params_changed else "unchanged",
+        )
+
+    def _poll_plugin_file(self) -> None:
+        """Schedule a background rebuild when the plugin source file changed."""
+        self._next_reload_check = time.monotonic() + RELOAD_CHECK_SECONDS
+        if self._plugin_file is None:
+            return
+        try:
+            mtime = self._plugin_file.stat().st_mtime
+        except OSError:
+            return
+        if mtime == self._plugin_mtime:
+            return
+        self._plugin_mtime = mtime
+        self._rebuild_pending = "file"
+        self._start_rebuild()
+
+    def _start_rebuild(self) -> None:
+        if self._reload_thread is not None and self._reload_thread.is_alive():
+            return  # stays pending until the running build is done
+        from_file = self._rebuild_pending == "file"
+        self._rebuild_pending = None
+        self._reload_gen += 1
+        self._reload_thread = threading.Thread(
+            target=self._build_plugin,
+            args=(self._reload_gen, from_file),
+            name=f"reload-{self.cfg.name}",
+            daemon=True,
+        )
+        self._reload_thread.start()
+
+    def _build_plugin(self, gen: int, from_file: bool) -> None:
+        """Reload thread: build a new Plugin, recompiling the edited module if from_file.
+
+        Only the finished instance is handed to the channel thread, which swaps it in
+        between packets; a broken edit keeps the current plugin running.
+        """
+        mod, mod_name = self._plugin_module, None
+        try:
+            if from_file:
+                assert self._plugin_file is not None
+                mod_name = f"ext_{self.cfg.name.lower()}_reload{gen}"
+                mod = self._exec_plugin_file(self._plugin_file, mod_name)
+                if not hasattr(mod, "Plugin"):
+                    raise RuntimeError("missing Plugin class")
+            plugin = mod.Plugin(self.cfg.params, self.context)
+        except Exception as exc:
+            if mod_name is not None:
+                sys.modules.pop(mod_name, None)
+            self._log("plugin rebuild failed (keeping current plugin): %s", exc, level="error")
+            return
+        self._warmup(plugin)
+        self._staged_plugin = (plugin, mod, mod_name)
+
+    def _swap_plugin(self) -> None:
+        """Replace the plugin with the staged one, carrying its state over.
+
+        With export_state/import_state on both sides the state is handed over as is;
+        otherwise the new plugin recomputes the current input (last FULL plus the
+        UPDATEs since) and its FULL output is sent to the indicator.
+        """
+        assert self._staged_plugin is not None
+        new, mod, mod_name = self._staged_plugin
+        self._staged_plugin = None
+        self._resume = None  # the checkpoint belongs to the previous plugin/params
+        old, old_chrono = self.plugin, self._chrono
+        t0 = time.perf_counter()
+        how = "fresh"
+        try:
+            export = getattr(old, "export_state", None)
+            restore = getattr(new, "import_state", None)
+            if export is not None and restore is not None:
+                try:
+                    restore(export())
+                    how = "state"
+                except Exception as exc:
+                    self._log("import_state failed, replaying input: %s", exc, level="warning")
+            self.plugin = new
+            self._chrono = bool(getattr(new, "chronological", False))
+            if how != "state" and self._full_seen:
+                self._replay_input()
+                how = "replay"
+        except Exception as exc:
+            self.plugin, self._chrono = old, old_chrono
+            if mod_name is not None:
+                sys.modules.pop(mod_name, None)
+            self._log("plugin swap failed (keeping current plugin): %s", exc, level="error")
+            return
+        if mod_name is not None:
+            if self._module_name is not None:
+                sys.modules.pop(self._module_name, None)
+            self._module_name = mod_name
+        self._plugin_module = mod
+        self._plugin_version = self._version_of(new)
+        self._join_batch_group()
+        self.metrics.inc("plugin_reloads")
+        self._log("plugin reloaded (%s) in %.1f ms", how, (time.perf_counter() - t0) * 1000.0)
+
+    def _replay_input(self) -> None:
+        """Run the current plugin's process_full on the current input and send it."""
+        assert self.plugin is not None
+        chrono = self._current_input()
+        ts = int(self._bar_ts or 0)
+        self._pending = None
+        self._batch.clear()
+        self._ticks_since_compute = 0
+        self._last_upd_out = None
+        out = self._full_out(chrono if self._chrono else chrono[::-1], ts)
+        if out is not None:
+            self._emit(201, out, ts)
+            self.metrics.inc("tx_full")
+
+    def _log(self, msg: str, *args, level: str = "info") -> None:
+        """Channel log line, lazily formatted and filtered by the channel log_level."""
+        if psb.LOG_LEVELS.get(level, logging.INFO) < self.cfg.log_level:
+            return
+        psb.log_event("[%s] " + msg, self.cfg.name, *args, level=level)
+
+    def _io_due(self) -> bool:
+        """True when this RX/TX line should be logged (channel level and 1-of-N sampling)."""
+        if self.cfg.log_level > logging.INFO or not psb.LOG.isEnabledFor(logging.INFO):
+            return False
+        self._io_lines += 1
+        return (self._io_lines - 1) % self.cfg.log_sample == 0
+
     def _handle_meta(self, meta: np.ndarray, ts: int) -> None:
         if self.plugin is None:
             return
         if hasattr(self.plugin, "process_meta"):
             try:
                 self.plugin.process_meta(meta.astype(np.float64), ts)
-                psb.log_event(f"[{self.cfg.name}] RX META count={int(meta.size)} ts={int(ts)}")
+                self._meta_digest = hub_cache.digest(meta)
+                self._log("RX META count=%d ts=%d", meta.size, ts)
                 # ACK back to indicator
                 if self.bridge is not None:
                     ack = np.array([float(meta.size)], dtype=np.float64)
                     self.bridge.write(1, 990, ack, int(ts))
-                    psb.log_event(f"[{self.cfg.name}] TX ACK sid=990 count=1")
+                    self._log("TX ACK sid=990 count=1")
             except Exception as exc:
-                psb.log_event(f"[{self.cfg.name}] META error: {exc}", "error")
+                self._log("META error: %s", exc, level="error")
 
 
 def _load_channels_from_file(path: Path) -> list[dict]:
+    return _read_channels_file(path) or []
+
+
+def _read_channels_file(path: Path) -> list[dict] | None:
+    """CHANNELS of a config file, or None if it cannot be read (e.g. mid-write)."""
     try:
         text = path.read_text(encoding="utf-8")
         ns: dict = {}
@@ -193,7 +1321,14 @@ def _load_channels_from_file(path: Path) -> list[dict]:
             return channels
     except Exception:
         pass
-    return []
+    return None
+
+
+def _config_mtime(path: Path | None) -> float | None:
+    try:
+        return path.stat().st_mtime if path is not None else None
+    except OSError:
+        return None
 
 
 def _external_config_path() -> Path | None:
@@ -204,14 +1339,34 @@ def _external_config_path() -> Path | None:
     return argv0.with_name("hub_config.py")
 
 
-def _build_channels() -> list[ChannelConfig]:
-    channels = []
+def _state_dir() -> Path | None:
+    """Where plugin checkpoints live: PYSHARED_STATE_DIR, else next to the config."""
+    env = os.environ.get("PYSHARED_STATE_DIR")
+    if env:
+        return Path(env)
     cfg_path = _external_config_path()
-    raw = None
-    if cfg_path and cfg_path.exists():
-        raw = _load_channels_from_file(cfg_path)
-        if raw:
-            psb.log_event(f"config loaded from file: {str(cfg_path)}")
+    return cfg_path.parent / "state" if cfg_path is not None else None
+
+
+def _profile_dir() -> Path | None:
+    """Where on-demand profiles go: PYSHARED_PROFILE_DIR, else next to the config."""
+    env = os.environ.get("PYSHARED_PROFILE_DIR")
+    if env:
+        return Path(env)
+    cfg_path = _external_config_path()
+    return cfg_path.parent / "profiles" if cfg_path is not None else None
+
+
+def build_channels(raw: list[dict] | None = None) -> list[ChannelConfig]:
+    """Enabled channels of ``raw`` (default: the external hub_config.py, else
+    hub_config.CHANNELS), upstream channels first."""
+    channels = []
+    if raw is None:
+        cfg_path = _external_config_path()
+        if cfg_path and cfg_path.exists():
+            raw = _load_channels_from_file(cfg_path)
+            if raw:
+                psb.log_event(f"config loaded from file: {str(cfg_path)}")
 
     if raw is None:
         raw = getattr(hub_config, "CHANNELS", [])
@@ -225,50 +1380,367 @@ def _build_channels() -> list[ChannelConfig]:
         if item.get("disabled"):
             psb.log_event(f"channel disabled: {name} ({plugin})")
             continue
-        psb.log_event(f"channel enabled: {name} ({plugin}) params={params}")
-        channels.append(ChannelConfig(name=name, plugin=plugin, params=params))
-    return channels
+        try:
+            policy = ComputePolicy.parse(item.get("compute_policy"))
+        except (TypeError, ValueError) as exc:
+            psb.log_event(f"channel {name}: {exc} (using every_tick)", level="warning")
+            policy = ComputePolicy()
+        update_batch = bool(item.get("update_batch", False))
+        log_level = logging.NOTSET
+        if item.get("log_level") is not None:
+            log_level = psb.LOG_LEVELS.get(str(item["log_level"]).lower(), logging.NOTSET)
+            if log_level == logging.NOTSET:
+                psb.log_event(f"channel {name}: unknown log_level {item['log_level']!r}", level="warning")
+        hot_reload = bool(item.get("hot_reload", True))
+        checkpoint = bool(item.get("checkpoint", True))
+        full_cache = bool(item.get("full_cache", True))
+        inputs = item.get("inputs") or ()
+        if isinstance(inputs, str):
+            inputs = (inputs,)
+        inputs = tuple(str(x) for x in inputs)
+        if len(inputs) > 1:
+            psb.log_event(f"channel {name}: one input per channel, using {inputs[0]}", level="warning")
+            inputs = inputs[:1]
+        try:
+            log_sample = max(1, int(item.get("log_sample", 1)))
+        except (TypeError, ValueError):
+            psb.log_event(f"channel {name}: invalid log_sample {item.get('log_sample')!r}", level="warning")
+            log_sample = 1
+        try:
+            batch_window_ms = max(0.0, float(item.get("batch_window_ms", 0.0)))
+        except (TypeError, ValueError):
+            psb.log_event(f"channel {name}: invalid batch_window_ms {item.get('batch_window_ms')!r}", level="warning")
+            batch_window_ms = 0.0
+        try:
+            history_budget_mb = max(0.0, float(item.get("history_budget_mb", 0.0)))
+        except (TypeError, ValueError):
+            psb.log_event(f"channel {name}: invalid history_budget_mb {item.get('history_budget_mb')!r}", level="warning")
+            history_budget_mb = 0.0
+        psb.log_event(
+            f"channel enabled: {name} ({plugin}) params={params} "
+            f"compute_policy={policy.mode} update_batch={update_batch}"
+        )
+        channels.append(
+            ChannelConfig(
+                name=name,
+                plugin=plugin,
+                params=params,
+                compute_policy=policy,
+                update_batch=update_batch,
+                log_level=log_level,
+                log_sample=log_sample,
+                hot_reload=hot_reload,
+                checkpoint=checkpoint,
+                full_cache=full_cache,
+                inputs=inputs,
+                batch_window_ms=batch_window_ms,
+                history_budget_mb=history_budget_mb,
+            )
+        )
+    return _order_channels(channels)
+
+
+def _order_channels(channels: list[ChannelConfig]) -> list[ChannelConfig]:
+    """Topological order of the plugin DAG (upstream channels first).
+
+    Channels whose input is unknown or disabled, or that sit on a cycle, are
+    dropped with a warning (with anything downstream of them). Sets ``consumed``
+    on channels another channel takes its input from.
+    """
+    by_name = {ch.name: ch for ch in channels}
+    ordered: list[ChannelConfig] = []
+    placed: set[str] = set()
+    waiting = [ch for ch in channels]
+    while waiting:
+        ready = [ch for ch in waiting if all(src in placed for src in ch.inputs)]
+        if not ready:
+            break
+        for ch in ready:
+            ordered.append(ch)
+            placed.add(ch.name)
+        waiting = [ch for ch in waiting if ch.name not in placed]
+    for ch in waiting:
+        missing = [src for src in ch.inputs if src not in by_name]
+        why = f"unknown input {missing[0]}" if missing else "input cycle or unavailable upstream"
+        psb.log_event(f"channel {ch.name}: {why}, not started", level="warning")
+    consumed = {src for ch in ordered for src in ch.inputs}
+    return [
+        ch if (ch.name in consumed) == ch.consumed else replace(ch, consumed=ch.name in consumed)
+        for ch in ordered
+    ]
+
+
+def _wire_channels(workers: dict[str, ChannelWorker]) -> None:
+    """Point every upstream channel at the inboxes of the channels it feeds."""
+    outputs: dict[str, dict[str, LocalInput]] = {name: {} for name in workers}
+    for name, w in workers.items():
+        for src in w.cfg.inputs:
+            if src in outputs and w.inbox is not None:
+                outputs[src][name] = w.inbox
+    for name, w in workers.items():
+        if outputs[name] != w._outputs or w._next_outputs is not None:
+            w.set_outputs(outputs[name])
+
+
+def _apply_channels(workers: dict[str, ChannelWorker], channels: list[ChannelConfig], start) -> None:
+    """Diff the running channels against a new config and apply it.
+
+    Removed channels are stopped, new ones started, a changed plugin spec restarts
+    that channel, and any other change is applied in place by the worker. Unchanged
+    channels are not touched. Downstream channels are then rewired to their inputs.
+    """
+    t0 = time.perf_counter()
+    wanted = {ch.name: ch for ch in channels}
+    removed = [n for n in workers if n not in wanted]
+    # a dead worker (e.g. plugin failed to load) is restarted by any config change
+    # so is one whose input or bridge connection changes (plugin DAG)
+    restarted = [
+        n for n in workers
+        if n in wanted
+        and (
+            wanted[n].plugin != workers[n].cfg.plugin
+            or wanted[n].inputs != workers[n].cfg.inputs
+            or wanted[n].uses_bridge != workers[n].cfg.uses_bridge
+            or not workers[n].is_alive()
+        )
+    ]
+    stopped = [workers.pop(n) for n in removed + restarted]
+    for w in stopped:
+        w.stop()
+    for w in stopped:
+        w.join(timeout=2.0)
+        if w.is_alive():
+            psb.log_event(f"[{w.cfg.name}] worker did not stop in time", level="warning")
+    added, changed = [], []
+    for name, ch in wanted.items():
+        w = workers.get(name)
+        if w is None:
+            start(ch)
+            if name not in restarted:
+                added.append(name)
+        elif w.reconfigure(ch):
+            changed.append(name)
+    _wire_channels(workers)
+    psb.log_event(
+        f"config reloaded in {(time.perf_counter() - t0) * 1000.0:.1f} ms: "
+        f"added={added} removed={removed} restarted={restarted} changed={changed}"
+    )
+
+
+def _check_history_budget(workers: dict[str, ChannelWorker], budget_bytes: int) -> None:
+    """Hub main thread: refresh the tracemalloc sample and give each channel its
+    share of the hub history budget (from the plugin memory the channels last measured)."""
+    hub_memory.sample_traced()
+    current = list(workers.values())
+    specs: dict[str, int] = {}
+    for w in current:
+        specs[w.cfg.plugin] = specs.get(w.cfg.plugin, 0) + 1
+    usage = {}
+    for w in current:
+        w.plugin_sharers = specs[w.cfg.plugin]
+        usage[w.cfg.name] = int(w.metrics.gauges.get("plugin_memory_bytes", 0))
+    for w, share in zip(current, hub_memory.budget_shares(usage, budget_bytes).values()):
+        w.history_cap = share
+
+
+STARTUP_PHASES = ("import", "init", "checkpoint", "warmup", "bridge", "live")
+
+
+def _log_startup(workers: dict[str, ChannelWorker], phases: dict[str, float], detailed: bool) -> None:
+    """Time until every channel was live; with ``detailed`` (--profile-startup) also the
+    hub phases and each channel's (ms, ``live`` counted from hub import)."""
+    live = {name: w.metrics.gauges.get("startup_live_ms") for name, w in workers.items()}
+    failed = sorted(name for name, ms in live.items() if ms is None)
+    done = [ms for ms in live.values() if ms is not None]
+    psb.log_event(
+        f"startup: {len(done)}/{len(live)} channels live in {max(done, default=0.0):.1f} ms"
+        + (f" failed={failed}" if failed else "")
+    )
+    if not detailed:
+        return
+    psb.log_event("startup hub " + " ".join(f"{k}={v:.1f}" for k, v in phases.items()))
+    for name in sorted(live, key=lambda n: live[n] if live[n] is not None else float("inf")):
+        gauges = workers[name].metrics.gauges
+        parts = " ".join(
+            f"{k}={gauges[f'startup_{k}_ms']:.1f}" for k in STARTUP_PHASES if f"startup_{k}_ms" in gauges
+        )
+        psb.log_event(f"startup [{name}] {workers[name].cfg.plugin} {parts or 'failed'}")
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(prog="pyshared_hub", add_help=False)
+    ap.add_argument(
+        "--log-level",
+        default=os.environ.get("PYSHARED_LOG_LEVEL", "debug"),
+        choices=sorted(psb.LOG_LEVELS),
+        type=str.lower,
+    )
+    ap.add_argument(
+        "--log-io",
+        action="store_true",
+        default=os.environ.get("PYSHARED_LOG_IO", "") not in ("", "0"),
+        help="log every bridge read/write",
+    )
+    ap.add_argument("--sync-log", action="store_true", help="write log lines on the calling thread")
+    ap.add_argument(
+        "--profile-startup",
+        action="store_true",
+        default=os.environ.get("PYSHARED_PROFILE_STARTUP", "") not in ("", "0"),
+        help="log hub and per-channel startup phases (ms)",
+    )
+    ap.add_argument(
+        "--gc-threshold",
+        type=hub_gc.parse_thresholds,
+        default=os.environ.get("PYSHARED_GC_THRESHOLD", ",".join(str(t) for t in hub_gc.THRESHOLDS)),
+        help="gen0,gen1,gen2 collection thresholds ('default' keeps Python's)",
+    )
+    ap.add_argument(
+        "--no-gc-freeze",
+        action="store_true",
+        default=os.environ.get("PYSHARED_GC_FREEZE", "1") == "0",
+        help="do not freeze the objects alive once every channel is loaded",
+    )
+    ap.add_argument(
+        "--history-budget-mb",
+        type=float,
+        default=float(os.environ.get("PYSHARED_HISTORY_BUDGET_MB", "0") or 0),
+        help="plugin memory budget of the whole hub; 0 = none",
+    )
+    ap.add_argument(
+        "--metrics",
+        default=os.environ.get("PYSHARED_METRICS", ""),
+        metavar="ADDR",
+        help="serve Prometheus metrics on PORT, HOST:PORT or unix:PATH",
+    )
+    args, unknown = ap.parse_known_args(argv)
+    if unknown[:1] and unknown[0] in ("bench", "sim", "results"):
+        # "python -m pyshared_hub" run inside this directory lands here, not in __main__
+        ap.error(f"{unknown[0]}: run python -m pyshared_hub {unknown[0]} from src/ (or PyPlot-MT.pyz {unknown[0]})")
+    return args
 
 
 def main() -> None:
-    logging.basicConfig(level=logging.DEBUG, format="[%(asctime)s] %(levelname)s: %(message)s")
+    args = _parse_args()
+    level = psb.LOG_LEVELS[args.log_level]
+    listener = None
+    if args.sync_log:
+        logging.basicConfig(level=level, format=psb.LOG_FORMAT)
+    else:
+        listener = psb.start_async_logging(level)
+    try:
+        _run_hub(args)
+    finally:
+        if listener is not None:
+            listener.stop()
+
+
+def _run_hub(args: argparse.Namespace) -> None:
     log = logging.getLogger("PySharedHub")
-    psb.LOG_IO = True
-    psb.log_event("debug enabled (LOG_IO=True)")
+    psb.LOG_IO = bool(args.log_io)
+    psb.log_event(f"log level={args.log_level} LOG_IO={psb.LOG_IO} async={not args.sync_log}")
 
     psb.log_event("hub start")
+    trace_frames = int(os.environ.get("PYSHARED_TRACEMALLOC", "0") or 0)
+    if trace_frames > 0:
+        # before the plugins are imported, so their allocations are attributed
+        hub_memory.start_tracing(trace_frames)
+    hub_gc.install()
+    psb.log_event(f"gc thresholds={hub_gc.set_thresholds(args.gc_threshold)}")
+    phases = {"boot": (time.perf_counter() - HUB_T0) * 1000.0}
+    t0 = time.perf_counter()
     base_cfg = psb.load_bridge_config(log)
     raw_cfg, _ = psb.load_raw_config(log)
+    phases["config"] = (time.perf_counter() - t0) * 1000.0
     context = {
         "send_bars": raw_cfg.get("send_bars") if raw_cfg else None,
+        # derived series (log, log returns, ...) shared read-only across channels
+        "derived": hub_cache.DERIVED,
     }
 
-    channels = _build_channels()
+    t0 = time.perf_counter()
+    cfg_path = _external_config_path()
+    cfg_mtime = _config_mtime(cfg_path)
+    channels = build_channels()
+    phases["channels"] = (time.perf_counter() - t0) * 1000.0
     if not channels:
         log.error("No channels defined in hub_config.CHANNELS")
         return
 
-    workers = []
-    for ch in channels:
+    workers: dict[str, ChannelWorker] = {}
+
+    def _start(ch: ChannelConfig) -> None:
         w = ChannelWorker(ch, base_cfg.dll_path, base_cfg.capacity_bytes, context)
         w.start()
-        workers.append(w)
+        workers[ch.name] = w
+
+    # every channel loads its plugin and connects in its own thread: one is live as
+    # soon as it is ready, whatever its peers are still importing
+    t0 = time.perf_counter()
+    for ch in channels:
+        _start(ch)
+    _wire_channels(workers)
+    phases["spawn"] = (time.perf_counter() - t0) * 1000.0
+
+    metrics_server = None
+    if args.metrics:
+        import hub_exporter
+
+        try:
+            metrics_server = hub_exporter.MetricsServer(args.metrics, lambda: list(workers.values())).start()
+            psb.log_event(f"metrics on {metrics_server.describe()}")
+        except (OSError, ValueError) as exc:
+            psb.log_event(f"metrics endpoint disabled ({args.metrics}): {exc}", level="warning")
 
     stop_event = threading.Event()
 
     def _stop(*_args):
         stop_event.set()
-        for w in workers:
+        for w in list(workers.values()):
             w.stop()
 
     signal.signal(signal.SIGINT, _stop)
     signal.signal(signal.SIGTERM, _stop)
+    if hasattr(signal, "SIGUSR1"):
+        # kill -USR1 <hub>: profile every channel for the default time (POSIX only)
+        def _profile_all(*_args):
+            for w in list(workers.values()):
+                w.request_profile()
+
+        signal.signal(signal.SIGUSR1, _profile_all)
 
+    next_cfg_check = time.monotonic() + CONFIG_CHECK_SECONDS
+    next_memory_check = time.monotonic() + hub_memory.MEMORY_CHECK_SECONDS
+    history_budget = int(args.history_budget_mb * 1024 * 1024)
+    startup_logged = False
     while not stop_event.is_set():
         time.sleep(0.2)
+        if not startup_logged and all(w.ready.is_set() or not w.is_alive() for w in workers.values()):
+            startup_logged = True
+            _log_startup(workers, phases, args.profile_startup)
+            if not args.no_gc_freeze:
+                # plugins are loaded: keep what they and the imports left out of later passes
+                frozen, ms = hub_gc.freeze()
+                psb.log_event(f"gc freeze: {frozen} objects in {ms:.1f} ms")
+        if time.monotonic() >= next_memory_check:
+            next_memory_check = time.monotonic() + hub_memory.MEMORY_CHECK_SECONDS
+            _check_history_budget(workers, history_budget)
+        if time.monotonic() < next_cfg_check:
+            continue
+        next_cfg_check = time.monotonic() + CONFIG_CHECK_SECONDS
+        mtime = _config_mtime(cfg_path)
+        if mtime == cfg_mtime or cfg_path is None:
+            continue
+        raw = _read_channels_file(cfg_path)
+        if raw is None:
+            psb.log_event(f"config unreadable, keeping current channels: {str(cfg_path)}", level="warning")
+            continue
+        cfg_mtime = mtime
+        _apply_channels(workers, build_channels(raw), _start)
 
-    for w in workers:
+    for w in workers.values():
         w.join(timeout=2.0)
+    if metrics_server is not None:
+        metrics_server.stop()
 
     psb.log_event("hub exit")
 